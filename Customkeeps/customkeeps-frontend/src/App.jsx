@@ -67,18 +67,28 @@ function AppInner() {
   const fetchCartItems = async () => {
     try {
       const token = localStorage.getItem("token");
-      const response = await fetch(`${API_URL}/api/cart/`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json",
-        },
-      });
+      // Cart is cursor-paginated; follow `next` until every line is loaded
+      const items = [];
+      let url = `${API_URL}/api/cart/`;
+      while (url) {
+        const response = await fetch(url, {
+          headers: {
+            Authorization: `Bearer ${token}`,
+            "Content-Type": "application/json",
+          },
+        });
+        if (!response.ok) return;
 
-      if (response.ok) {
         const data = await response.json();
-        console.log("Cart items fetched:", data);
-        setCartItems(data);
+        if (!data.results) {
+          items.push(...data);
+          break;
+        }
+        items.push(...data.results);
+        url = data.next;
       }
+      console.log("Cart items fetched:", items);
+      setCartItems(items);
     } catch (error) {
       console.error("Error fetching cart:", error);
     }
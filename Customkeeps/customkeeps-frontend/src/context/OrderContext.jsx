@@ -28,7 +28,7 @@ export function OrderProvider({ children }) {
     fetchOrders(token)
       .then((data) => {
         // If your backend returns a list of orders, you may need to map fields
-        setOrders(data);
+        setOrders(data.results ?? data);
       })
       .catch((err) => {
         console.error("Failed to load orders:", err);
@@ -101,7 +101,11 @@ export default function CartPage({
               <div key={item.id} className="cart-item-card">
                 {(item.design_image_url || item.designImageUrl) && (
                   <img
-                    src={item.design_image_url || item.designImageUrl}
+                    src={
+                      item.design_thumbnail_url ||
+                      item.design_image_url ||
+                      item.designImageUrl
+                    }
                     alt={item.product_name || item.productName}
                     className="cart-item-image"
                   />
@@ -13,7 +13,7 @@ export default function OrdersPage() {
   const fetchOrders = async () => {
     try {
       const token = localStorage.getItem("token");
-      const response = await fetch(`${API_URL}/api/orders/`, {
+      const response = await fetch(`${API_URL}/api/orders/?expand=items`, {
         headers: {
           Authorization: `Bearer ${token}`,
           "Content-Type": "application/json",
@@ -22,7 +22,7 @@ export default function OrdersPage() {
 
       if (response.ok) {
         const data = await response.json();
-        setOrders(data);
+        setOrders(data.results ?? data);
       }
     } catch (error) {
       console.error("Error fetching orders:", error);
@@ -85,7 +85,10 @@ export default function OrdersPage() {
                         <div key={index} className="order-item">
                           {item.design_image_url && (
                             <img
-                              src={item.design_image_url}
+                              src={
+                                item.design_thumbnail_url ||
+                                item.design_image_url
+                              }
                               alt={item.product_name}
                               className="order-item-image"
                             />
@@ -151,7 +154,9 @@ export default function OrdersPage() {
                     </div>
                     <div className="order-detail-row">
                       <span className="detail-label">Date:</span>
-                      <span className="detail-value date">{order.date}</span>
+                      <span className="detail-value date">
+                        {order.created_at?.slice(0, 10)}
+                      </span>
                     </div>
                   </div>
                 </div>
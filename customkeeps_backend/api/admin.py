@@ -1,27 +1,77 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseNotAllowed, HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.utils.html import format_html
-from .models import Product, CartItem, Order, OrderItem, Coupon
+from django.utils.http import url_has_allowed_host_and_scheme
+from .assets import design_asset_url
+from .thumbnails import design_thumbnail_url
+from .models import (
+    Product,
+    CartItem,
+    Order,
+    OrderItem,
+    OrderSummary,
+    Coupon,
+    DesignAsset,
+    PriceTier,
+    DailyOrderRollup,
+    DailySalesRollup,
+    OrderStatusTransition,
+)
+from .fulfillment import InvalidTransition, allowed_transitions, transition_orders
+from .reports import default_report_range, flush_sales_rollups, mark_days_dirty, sales_report
+from .summaries import rebuild_order_summary
+
+
+def design_image_src(obj, size=None):
+    """
+    Image source for a cart/order line: a thumbnail of the asset when a size
+    is given, the full asset otherwise, else the legacy stored value.
+    """
+    if obj.design_asset_id:
+        if size:
+            return design_thumbnail_url(obj.design_asset_id, size)
+        return design_asset_url(obj.design_asset_id)
+    return obj.design_image_url
+
+
+class PriceTierInline(admin.TabularInline):
+    model = PriceTier
+    extra = 0
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'price', 'description', 'template_image_url']
     search_fields = ['name']
+    inlines = [PriceTierInline]
+
+
+@admin.register(PriceTier)
+class PriceTierAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'product', 'min_quantity', 'discount_percent']
+    list_filter = ['product']
+    list_select_related = ['product']
 
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ['user', 'product_name', 'quantity', 'base_color', 'image_preview', 'created_at']
-    list_filter = ['created_at', 'base_color']
+    list_filter = ['product', 'created_at', 'base_color']
     search_fields = ['user__username', 'product_name']
     readonly_fields = ['image_preview']
+    list_select_related = ['user']
 
     def image_preview(self, obj):
         """Display thumbnail of design image"""
-        if obj.design_image_url:
+        if design_image_src(obj, 100):
             return format_html(
                 '<img src="{}" style="max-width: 100px; max-height: 100px; border-radius: 8px;" />',
-                obj.design_image_url
+                design_image_src(obj, 100)
             )
         return "No image"
 
@@ -31,28 +81,55 @@ class CartItemAdmin(admin.ModelAdmin):
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
-    readonly_fields = ['product_name', 'price', 'quantity', 'base_color', 'customization_text', 'image_preview']
+    readonly_fields = ['product', 'product_name', 'price', 'quantity', 'base_color', 'customization_text', 'image_preview']
     can_delete = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
     def image_preview(self, obj):
         """Display thumbnail of design image in inline"""
-        if obj.design_image_url:
+        if design_image_src(obj, 80):
             return format_html(
                 '<img src="{}" style="max-width: 80px; max-height: 80px; border-radius: 4px;" />',
-                obj.design_image_url
+                design_image_src(obj, 80)
             )
         return "No image"
 
     image_preview.short_description = 'Design'
 
 
+def transition_action(to_status, label):
+    """Admin action moving the selected orders to ``to_status`` in one batch."""
+
+    @admin.action(description=f'Move selected orders to "{label}"', permissions=['change'])
+    def action(modeladmin, request, queryset):
+        try:
+            result = transition_orders(queryset, to_status, changed_by=request.user, note='admin action')
+        except InvalidTransition as e:
+            modeladmin.message_user(request, str(e), messages.ERROR)
+            return
+        modeladmin.message_user(request, f'Moved {result.count} order(s) to "{label}".', messages.SUCCESS)
+
+    action.__name__ = f'move_to_{to_status}'
+    return action
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['order_id', 'user', 'final_amount', 'status', 'created_at']
+    list_display = ['order_id', 'customer', 'items_overview', 'final_amount', 'status', 'created_at']
     list_filter = ['status', 'created_at']
-    search_fields = ['order_id', 'user__username']
+    search_fields = ['order_id', 'summary__username']
+    # Items come from the summary row instead of an order item query per row;
+    # the user is joined for Order.__str__ (row checkbox labels)
+    list_select_related = ['summary', 'user']
     readonly_fields = ['order_id', 'created_at', 'updated_at', 'payment_intent_id']
     inlines = [OrderItemInline]
+    actions = [
+        transition_action(status, label)
+        for status, label in Order.STATUS_CHOICES
+        if status in allowed_transitions().values()
+    ]
 
     fieldsets = (
         ('Order Information', {
@@ -66,20 +143,66 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
 
+    def summary_of(self, obj):
+        try:
+            return obj.summary
+        except OrderSummary.DoesNotExist:
+            return None
+
+    @admin.display(description='Customer', ordering='summary__username')
+    def customer(self, obj):
+        summary = self.summary_of(obj)
+        return summary.username if summary else '-'
+
+    @admin.display(description='Items')
+    def items_overview(self, obj):
+        summary = self.summary_of(obj)
+        if summary is None or not summary.item_count:
+            return '-'
+        if summary.item_count == 1:
+            return f"{summary.first_item_name} x {summary.unit_count}"
+        return f"{summary.first_item_name} + {summary.item_count - 1} more ({summary.unit_count} units)"
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Orders created here have no summary yet; inline edits change it
+        rebuild_order_summary(form.instance.pk)
+
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product_name', 'quantity', 'price', 'base_color', 'image_preview']
-    list_filter = ['product_name', 'base_color']
+    # Filtering by the product FK is an indexed join, not a name scan
+    list_filter = ['product', 'base_color']
     search_fields = ['order__order_id', 'product_name']
     readonly_fields = ['image_preview_large']
+    list_select_related = ['order__user']
+    raw_id_fields = ['order']
+
+    # Saving a line here doesn't save its order, so mark the rollup days here
+    def rollup_days(self, order_ids):
+        created = Order.objects.filter(pk__in=order_ids).values_list('created_at', flat=True)
+        return [timezone.localdate(value) for value in created]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        mark_days_dirty(self.rollup_days([obj.order_id, form.initial.get('order')]))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        mark_days_dirty(self.rollup_days([obj.order_id]))
+
+    def delete_queryset(self, request, queryset):
+        days = self.rollup_days(queryset.values('order_id'))
+        super().delete_queryset(request, queryset)
+        mark_days_dirty(days)
 
     def image_preview(self, obj):
         """Display small thumbnail in list view"""
-        if obj.design_image_url:
+        if design_image_src(obj, 60):
             return format_html(
                 '<img src="{}" style="max-width: 60px; max-height: 60px; border-radius: 4px;" />',
-                obj.design_image_url
+                design_image_src(obj, 60)
             )
         return "No image"
 
@@ -87,18 +210,140 @@ class OrderItemAdmin(admin.ModelAdmin):
 
     def image_preview_large(self, obj):
         """Display larger image in detail view"""
-        if obj.design_image_url:
+        if design_image_src(obj, 300):
             return format_html(
                 '<img src="{}" style="max-width: 300px; max-height: 300px; border-radius: 8px; border: 2px solid #ddd;" />',
-                obj.design_image_url
+                design_image_src(obj, 300)
             )
         return "No image"
 
     image_preview_large.short_description = 'Design Preview'
 
 
+@admin.register(OrderStatusTransition)
+class OrderStatusTransitionAdmin(admin.ModelAdmin):
+    list_display = ['order', 'from_status', 'to_status', 'changed_by', 'note', 'created_at']
+    list_filter = ['to_status', 'created_at']
+    search_fields = ['order__order_id', 'note']
+    list_select_related = ['order__user', 'changed_by']
+    raw_id_fields = ['order', 'changed_by']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Coupon)
 class CouponAdmin(admin.ModelAdmin):
     list_display = ['code', 'discount_percent', 'valid_from', 'valid_to', 'active']
     search_fields = ['code']
     list_filter = ['active', 'valid_from', 'valid_to']
+
+
+@admin.register(DesignAsset)
+class DesignAssetAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'content_type', 'size', 'created_at']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'file', 'content_type', 'size', 'created_at']
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """
+    Rollups are derived data: browse them, rebuild them with manage.py
+    rebuild_sales_rollups. Pages only read them; "Update rollups" (a POST)
+    adds the orders placed since the last update.
+    """
+    date_hierarchy = 'date'
+    change_list_template = 'admin/api/rollup_change_list.html'
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                'update/',
+                self.admin_site.admin_view(self.update_view),
+                name=f'{opts.app_label}_{opts.model_name}_update',
+            ),
+        ] + super().get_urls()
+
+    def update_view(self, request):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        added, days = flush_sales_rollups()
+        self.message_user(
+            request, f'Added {added} order(s) and recomputed {days} day(s).', messages.SUCCESS
+        )
+        opts = self.model._meta
+        next_url = request.POST.get('next')
+        if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+            next_url = reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+        return HttpResponseRedirect(next_url)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyOrderRollup)
+class DailyOrderRollupAdmin(RollupAdmin):
+    list_display = ['date', 'status', 'coupon_code', 'order_count', 'total_amount', 'discount_amount', 'final_amount']
+    list_filter = ['status', 'coupon_code']
+    change_list_template = 'admin/api/dailyorderrollup/change_list.html'
+
+    def get_urls(self):
+        return [
+            path(
+                'dashboard/',
+                self.admin_site.admin_view(self.dashboard_view),
+                name='api_sales_dashboard',
+            ),
+        ] + super().get_urls()
+
+    def dashboard_view(self, request):
+        """Sales dashboard for ?start=&end= (local dates), read from the rollups only."""
+        start, end = default_report_range()
+        start = parse_date(request.GET.get('start') or '') or start
+        end = parse_date(request.GET.get('end') or '') or end
+
+        by_status = sales_report('orders', start, end, ['status'])
+        totals = {
+            name: sum(row[name] for row in by_status)
+            for name in ['order_count', 'total_amount', 'discount_amount', 'final_amount']
+        }
+        products = sales_report('products', start, end, ['product_name'])
+        products.sort(key=lambda row: (-row['units'], row['product_name']))
+        coupons = [
+            row for row in sales_report('orders', start, end, ['coupon_code'])
+            if row['coupon_code']
+        ]
+        coupons.sort(key=lambda row: -row['order_count'])
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Sales dashboard',
+            'start': start,
+            'end': end,
+            'totals': totals,
+            'by_status': by_status,
+            'days': sales_report('orders', start, end, ['date']),
+            'top_products': products[:10],
+            'coupons': coupons,
+        }
+        return TemplateResponse(request, 'admin/api/sales_dashboard.html', context)
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(RollupAdmin):
+    list_display = ['date', 'product_name', 'base_color', 'status', 'coupon_code', 'order_count', 'units', 'revenue']
+    list_filter = ['status', 'product_name', 'base_color']
+    search_fields = ['product_name', 'coupon_code']
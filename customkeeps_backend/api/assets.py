@@ -0,0 +1,117 @@
+"""
+Content-addressed storage for customer design images.
+
+Uploaded designs are stored once per SHA-256 digest in a pluggable Django
+storage backend (``settings.DESIGN_ASSET_STORAGE``). Cart and order rows only
+keep the digest, so the image bytes never travel through the database or the
+cart/order JSON payloads.
+"""
+import base64
+import binascii
+import hashlib
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+
+# Magic-number prefixes -> (content type, file extension)
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+]
+
+SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+
+class InvalidDesignAsset(ValueError):
+    """Raised when uploaded bytes are not an acceptable design image."""
+
+
+@lru_cache(maxsize=None)
+def get_design_asset_storage():
+    """Return the storage backend configured in DESIGN_ASSET_STORAGE."""
+    config = settings.DESIGN_ASSET_STORAGE
+    storage_class = import_string(config["BACKEND"])
+    return storage_class(**config.get("OPTIONS", {}))
+
+
+def sniff_image_type(data: bytes):
+    """Return (content_type, extension) based on the file header."""
+    for signature, content_type, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type, extension
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    raise InvalidDesignAsset("Design must be a PNG, JPEG, GIF or WebP image.")
+
+
+def is_sha256(value: str) -> bool:
+    return bool(SHA256_RE.fullmatch(value))
+
+
+def is_data_url(value) -> bool:
+    return isinstance(value, str) and value.startswith("data:")
+
+
+def decode_data_url(value: str) -> bytes:
+    """Decode a ``data:<type>;base64,<payload>`` URL into raw bytes."""
+    header, sep, payload = value.partition(",")
+    if not sep or not header.endswith(";base64"):
+        raise InvalidDesignAsset("Design image must be a base64 data URL.")
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidDesignAsset("Design image data is not valid base64.")
+
+
+def write_design_file(data: bytes):
+    """
+    Validate and persist raw image bytes in the design asset storage.
+
+    Returns (sha256, storage_name, content_type). Writing the same bytes
+    twice is a no-op because the storage name is derived from the digest.
+    """
+    if not data:
+        raise InvalidDesignAsset("Design image is empty.")
+    if len(data) > settings.DESIGN_ASSET_MAX_BYTES:
+        raise InvalidDesignAsset("Design image is too large.")
+
+    content_type, extension = sniff_image_type(data)
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{digest[:2]}/{digest}.{extension}"
+
+    storage = get_design_asset_storage()
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(data))
+
+    return digest, name, content_type
+
+
+def store_design_bytes(data: bytes):
+    """Return the DesignAsset for ``data``, creating it if it is new."""
+    from .models import DesignAsset
+
+    digest = hashlib.sha256(data).hexdigest()
+    asset = DesignAsset.objects.filter(pk=digest).first()
+    if asset is not None:
+        return asset
+
+    digest, name, content_type = write_design_file(data)
+    asset = DesignAsset(sha256=digest, file=name, content_type=content_type, size=len(data))
+    # A concurrent upload of the same bytes wrote the same row; keep either
+    DesignAsset.objects.bulk_create([asset], ignore_conflicts=True)
+    return asset
+
+
+def design_asset_url(sha256: str, request=None) -> str:
+    """Public URL of an asset; absolute when a request is available."""
+    url = reverse("design-asset-detail", args=[sha256])
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
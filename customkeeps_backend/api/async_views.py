@@ -0,0 +1,217 @@
+"""
+Async versions of the I/O-bound endpoints, served in ASGI mode.
+
+With ``ASGI_MODE`` on (uvicorn workers, see gunicorn.conf.py) the product
+list, order history, coupon preview and checkout/pay URLs point here
+instead of at their DRF views. While a request waits on Stripe or the
+database, the worker's event loop serves other requests, so one process
+holds many waiting shoppers instead of one per thread.
+
+DRF views can't be async, so these are plain Django async views with the
+same contract as their DRF counterparts in views.py: JWT auth
+(``ClaimsJWTAuthentication.aauthenticate``), JSON bodies, the same response
+bodies and error shapes, and the same URL names, so query budgets and
+metrics line up. Database reads go through the async ORM; shared code that
+may touch the database (pricing, coupon lookup, catalog rendering) runs via
+``sync_to_async``.
+"""
+import json
+from functools import wraps
+
+import stripe
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    MethodNotAllowed,
+    NotAuthenticated,
+    ParseError,
+    ValidationError,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .auth import ClaimsJWTAuthentication
+from .cart import quote_cart_lines
+from .catalog import catalog_response
+from .checkout import acheckout_payment_intent
+from .coupons import resolve_coupon
+from .models import CartItem, OrderSummary, Product
+from .pagination import CreatedAtCursorPagination
+from .payments import PaymentsUnavailable
+from .serializers import OrderSummarySerializer, ProductSerializer
+from .summaries import acached_order_history
+from .views import OrderViewSet, coupon_preview_data, payment_intent_data
+
+authentication = ClaimsJWTAuthentication()
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    """Rendered like DRF's JSONRenderer renders ``Response(data)``."""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type="application/json",
+        status=status,
+        headers=headers,
+    )
+
+
+def exception_response(request, exc):
+    """What DRF's default exception handler answers for ``exc``."""
+    headers = {}
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        headers["WWW-Authenticate"] = authentication.authenticate_header(request)
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def parse_body(request):
+    if not request.body:
+        return {}
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body)
+        except ValueError as e:
+            raise ParseError(f"JSON parse error - {e}")
+    return request.POST
+
+
+def get_query_list(request, name):
+    value = request.GET.get(name, "")
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def async_api_view(methods):
+    """
+    ``@api_view(methods)`` + ``@permission_classes([IsAuthenticated])`` for
+    an async view: sets ``request.user`` and ``request.data`` and answers
+    API errors the way DRF does.
+    """
+
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method)
+                result = await authentication.aauthenticate(request)
+                if result is None:
+                    raise NotAuthenticated()
+                request.user = result[0]
+                request.data = parse_body(request)
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                return exception_response(request, exc)
+
+        return wrapper
+
+    return decorator
+
+
+@async_api_view(["GET"])
+async def product_list(request):
+    """GET /api/products/ (``ProductViewSet.list``)."""
+
+    def render():
+        serializer = ProductSerializer(
+            Product.objects.all(), many=True, context={"request": request}
+        )
+        return JSONRenderer().render(serializer.data)
+
+    return await sync_to_async(catalog_response)(request, render)
+
+
+_sync_order_list = OrderViewSet.as_view({"get": "list"})
+
+
+@async_api_view(["GET"])
+async def order_list(request):
+    """
+    GET /api/orders/ (``OrderViewSet.list``): summary pages are read with
+    the async ORM and cached per user; ``?expand=items`` pages, which need
+    the order lines, are served by the DRF viewset.
+    """
+    expand = get_query_list(request, "expand")
+    if "items" in expand:
+        return await sync_to_async(_sync_order_list)(request)
+
+    drf_request = Request(request)
+    fields = get_query_list(request, "fields")
+    context = {"request": drf_request}
+    serializer = OrderSummarySerializer(fields=fields, expand=expand, context=context)
+    columns = set(serializer.get_model_field_names())
+    columns.update(field.lstrip("-") for field in CreatedAtCursorPagination.ordering)
+    queryset = OrderSummary.objects.filter(user_id=request.user.id).only(*sorted(columns))
+
+    async def render():
+        paginator = CreatedAtCursorPagination()
+        page = await paginator.apaginate_queryset(queryset, drf_request)
+        data = OrderSummarySerializer(
+            page, many=True, fields=fields, expand=expand, context=context
+        ).data
+        return paginator.get_paginated_response(data).data
+
+    data = await acached_order_history(request.user.id, request.build_absolute_uri(), render)
+    return json_response(data)
+
+
+@async_api_view(["POST"])
+async def preview_coupon(request):
+    """POST /api/preview_coupon/ (``views.preview_coupon``)."""
+    coupon = await sync_to_async(resolve_coupon)(request.data.get("coupon_code"))
+    if coupon is None:
+        return json_response(
+            {"valid": False, "error": "Invalid coupon code."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    cart_items = [item async for item in CartItem.objects.filter(user_id=request.user.id)]
+    quote = await sync_to_async(quote_cart_lines)(cart_items, coupon.code)
+    return json_response(coupon_preview_data(coupon, quote))
+
+
+@async_api_view(["POST"])
+async def pay_view(request):
+    """
+    POST /api/checkout/pay/ (``views.pay_view``). Stripe is awaited on the
+    event loop, so a slow Stripe holds no worker thread.
+    """
+    try:
+        cart_items = [item async for item in CartItem.objects.filter(user_id=request.user.id)]
+        if not cart_items:
+            return json_response(
+                {"error": "Cart is empty"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        quote = await sync_to_async(quote_cart_lines)(
+            cart_items, request.data.get("coupon_code")
+        )
+        if quote.amount_cents <= 0:
+            return json_response(
+                {"error": "Invalid payment amount."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        payment_intent = await acheckout_payment_intent(request.user, cart_items, quote)
+        return json_response(payment_intent_data(payment_intent, quote))
+    except ValidationError:
+        raise
+    except PaymentsUnavailable as e:
+        return json_response(
+            {"error": str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "2"},
+        )
+    except stripe.StripeError as e:
+        # Declined or rejected by Stripe; anything else is a server error
+        return json_response(
+            {"error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
@@ -0,0 +1,150 @@
+"""
+Stateless JWT authentication.
+
+simplejwt's ``JWTAuthentication`` loads the User row on every request. Our
+access tokens instead carry what the API needs about the user (id,
+username, staff flags) plus ``auth``, a digest of the user's password hash,
+active flag and staff flags at the time the token was issued.
+``ClaimsJWTAuthentication`` builds a ``ClaimsUser`` from those claims and
+checks the digest against the current user, which is kept in a small
+in-process TTL cache: most requests run no auth query at all.
+
+Changing a password, deactivating a user or changing their staff flags
+changes the digest, so older tokens stop working. User saves evict the
+user from this process's cache right away; other processes notice when
+their entry expires (``AUTH_USER_CACHE_TTL`` seconds).
+
+Tokens issued before the ``auth`` claim existed fall back to the regular
+per-request User lookup until they expire.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import LocalCache
+
+AUTH_STATE_CLAIM = "auth"
+
+
+def auth_state(user) -> str:
+    """Digest of everything whose change must invalidate the user's tokens."""
+    payload = "|".join(
+        [user.password, str(user.is_active), str(user.is_staff), str(user.is_superuser)]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+# Process-local only: User rows (password hashes included) stay out of the
+# shared cache
+user_cache = LocalCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+def user_id_from_claim(value):
+    """simplejwt writes ids as strings; cache and query by the real pk type."""
+    return get_user_model()._meta.pk.to_python(value)
+
+
+def get_cached_user(user_id):
+    """The User with ``user_id`` (or None), from the TTL cache or one query."""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+
+async def aget_cached_user(user_id):
+    """``get_cached_user`` for async views (async ORM on a miss)."""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await get_user_model().objects.filter(pk=user_id).afirst()
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+
+def forget_cached_user(user_id):
+    user_cache.delete(user_id)
+
+
+class ClaimsUser(TokenUser):
+    """
+    The authenticated user as described by the access token. Use ``.id``
+    for queries (``filter(user_id=request.user.id)``); ``.user`` loads the
+    full User from the TTL cache when a view really needs it.
+    """
+
+    def __str__(self):
+        return self.username
+
+    @cached_property
+    def id(self):
+        return user_id_from_claim(self.token[api_settings.USER_ID_CLAIM])
+
+    @property
+    def user(self):
+        return get_cached_user(self.id)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        state = validated_token.get(AUTH_STATE_CLAIM)
+        if state is None:
+            # Issued before stateless auth: look the user up as simplejwt does
+            return super().get_user(validated_token)
+        user = get_cached_user(self.claimed_user_id(validated_token))
+        return self.claims_user(user, validated_token, state)
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` for async views, which take a plain Django request.
+        Returns (user, token), or None when no token was sent.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        state = validated_token.get(AUTH_STATE_CLAIM)
+        if state is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+        else:
+            user = await aget_cached_user(self.claimed_user_id(validated_token))
+            user = self.claims_user(user, validated_token, state)
+        return user, validated_token
+
+    def claimed_user_id(self, validated_token):
+        try:
+            return user_id_from_claim(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def claims_user(self, user, validated_token, state):
+        if user is None or not user.is_active or auth_state(user) != state:
+            raise AuthenticationFailed("Token is no longer valid", code="token_revoked")
+        return ClaimsUser(validated_token)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair carrying the claims ``ClaimsJWTAuthentication`` relies on."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.get_username()
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        token[AUTH_STATE_CLAIM] = auth_state(user)
+        return token
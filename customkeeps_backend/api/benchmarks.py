@@ -0,0 +1,282 @@
+"""
+Checkout funnel benchmark.
+
+Drives the API the way the storefront does, through Django's test client
+(full middleware, JWT auth and URL routing), and records latency, SQL query
+count and response size per endpoint. Run it with
+``python manage.py bench_checkout``; see that command for database setup.
+
+``run_server_load`` instead drives a running server over HTTP with many
+concurrent shoppers, to compare deployment profiles (gunicorn.conf.py):
+``python manage.py bench_server``.
+"""
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .metrics import percentile
+
+BENCH_PASSWORD = "bench-Pa55word!"
+BENCH_COUPON = "BENCH10"
+
+
+def summarize(values, digits=2):
+    return {
+        "p50": round(percentile(values, 50), digits),
+        "p95": round(percentile(values, 95), digits),
+        "p99": round(percentile(values, 99), digits),
+        "mean": round(sum(values) / len(values), digits),
+        "max": round(max(values), digits),
+    }
+
+
+class FunnelRecorder:
+    """Issues requests and keeps per-endpoint samples."""
+
+    def __init__(self):
+        self.client = Client()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def request(self, method, path, data=None, token=None, expect=(200, 201)):
+        headers = {}
+        if token:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        kwargs = {}
+        if data is not None:
+            kwargs = {"data": json.dumps(data), "content_type": "application/json"}
+
+        name = f"{method} {resolve(path.split('?')[0]).url_name}"
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method.lower())(path, **kwargs, **headers)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.samples[name].append(
+            {"latency_ms": elapsed_ms, "queries": len(queries), "bytes": size}
+        )
+        if response.status_code not in expect:
+            self.errors[name] += 1
+        return response
+
+    def report(self):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            endpoints[name] = {
+                "count": len(samples),
+                "errors": self.errors.get(name, 0),
+                "latency_ms": summarize([s["latency_ms"] for s in samples]),
+                "queries": summarize([s["queries"] for s in samples], digits=1),
+                "response_bytes": summarize([s["bytes"] for s in samples], digits=0),
+            }
+        return endpoints
+
+
+def seed_benchmark_data():
+    """Create the coupon the funnel applies; products come from migrations."""
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from .models import Coupon
+
+    now = timezone.now()
+    Coupon.objects.update_or_create(
+        code=BENCH_COUPON,
+        defaults={
+            "discount_percent": 10,
+            "valid_from": now - timedelta(days=1),
+            "valid_to": now + timedelta(days=1),
+            "active": True,
+        },
+    )
+
+
+def run_checkout_funnel(recorder, cart_lines=3, orders_per_user=1):
+    """
+    One virtual shopper: register -> token -> products -> cart adds ->
+    preview_coupon -> checkout/pay -> orders/create_from_cart -> orders list.
+    """
+    username = f"bench-{uuid.uuid4().hex[:12]}"
+    recorder.request(
+        "POST",
+        "/api/register/",
+        {"username": username, "email": f"{username}@example.com", "password": BENCH_PASSWORD},
+    )
+    token = recorder.request(
+        "POST", "/api/token/", {"username": username, "password": BENCH_PASSWORD}
+    ).json()["access"]
+
+    products = recorder.request("GET", "/api/products/", token=token).json()
+
+    for _ in range(orders_per_user):
+        for line in range(cart_lines):
+            product = products[line % len(products)]
+            recorder.request(
+                "POST",
+                "/api/cart/",
+                {
+                    "product_name": product["name"],
+                    "price": product["price"],
+                    "quantity": line + 1,
+                    "base_color": "White",
+                    "customization_text": f"line {line}",
+                },
+                token=token,
+            )
+        recorder.request("GET", "/api/cart/", token=token)
+
+        recorder.request(
+            "POST",
+            "/api/preview_coupon/",
+            {"coupon_code": BENCH_COUPON, "cart_total": "1000.00"},
+            token=token,
+        )
+        intent = recorder.request(
+            "POST",
+            "/api/checkout/pay/",
+            {"coupon_code": BENCH_COUPON},
+            token=token,
+        ).json()
+        recorder.request(
+            "POST",
+            "/api/orders/create_from_cart/",
+            {"coupon_code": BENCH_COUPON, "payment_intent_id": intent.get("paymentIntentId", "")},
+            token=token,
+        )
+
+    recorder.request("GET", "/api/orders/", token=token)
+    recorder.request("GET", "/api/orders/?expand=items", token=token)
+
+
+def compare_to_baseline(current, baseline, tolerance):
+    """
+    Return human-readable regressions: p95 latency beyond ``tolerance``
+    (a fraction) or any increase in the maximum query count.
+    """
+    regressions = []
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if stats["queries"]["max"] > before["queries"]["max"]:
+            regressions.append(
+                f"{name}: max queries {before['queries']['max']} -> {stats['queries']['max']}"
+            )
+        limit = before["latency_ms"]["p95"] * (1 + tolerance)
+        if stats["latency_ms"]["p95"] > limit:
+            regressions.append(
+                f"{name}: p95 {before['latency_ms']['p95']}ms -> {stats['latency_ms']['p95']}ms"
+            )
+    return regressions
+
+
+class LoadRecorder:
+    """Per-endpoint latency samples and status counts from a load run."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client, name, method, path, token=None, data=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        started = time.perf_counter()
+        response = await client.request(method, path, json=data, headers=headers)
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+        self.statuses[name][response.status_code] += 1
+        return response
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            endpoints[name] = {
+                "count": len(samples),
+                "per_second": round(len(samples) / elapsed, 1),
+                "statuses": dict(self.statuses[name]),
+                "latency_ms": summarize(samples),
+            }
+        return endpoints
+
+
+async def _sign_up(client, slots):
+    """Register and log in one bench shopper; retries while hashing is saturated."""
+    username = f"load-{uuid.uuid4().hex[:12]}"
+    credentials = {"username": username, "password": BENCH_PASSWORD}
+    async with slots:
+        for path in ("/api/register/", "/api/token/"):
+            while True:
+                response = await client.post(
+                    path, json={**credentials, "email": f"{username}@example.com"}
+                )
+                if response.status_code != 503:
+                    break
+                await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+            response.raise_for_status()
+    return response.json()["access"]
+
+
+async def _shop(client, recorder, token, deadline, coupon):
+    """One shopper's loop: browse, add to cart, preview, pay, check orders, clear."""
+    products = (await recorder.request(client, "GET products", "GET", "/api/products/", token)).json()
+    rounds = 0
+    while time.monotonic() < deadline:
+        product = random.choice(products)
+        await recorder.request(
+            client, "POST cart", "POST", "/api/cart/", token,
+            {"product_name": product["name"], "quantity": random.randint(1, 50)},
+        )
+        await recorder.request(
+            client, "POST preview_coupon", "POST", "/api/preview_coupon/", token,
+            {"coupon_code": coupon},
+        )
+        await recorder.request(
+            client, "POST checkout/pay", "POST", "/api/checkout/pay/", token,
+            {"coupon_code": coupon},
+        )
+        await recorder.request(client, "GET orders", "GET", "/api/orders/", token)
+        await recorder.request(client, "GET products", "GET", "/api/products/", token)
+        await recorder.request(client, "DELETE cart/clear", "DELETE", "/api/cart/clear/", token)
+        rounds += 1
+    return rounds
+
+
+async def run_server_load(base_url, shoppers=50, duration=30.0, coupon=BENCH_COUPON, signup_concurrency=4):
+    """
+    Sign up ``shoppers`` users on the server at ``base_url``, then run them
+    all at once for ``duration`` seconds. Returns (endpoint stats, summary).
+    """
+    import httpx
+
+    limits = httpx.Limits(max_connections=shoppers, max_keepalive_connections=shoppers)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        slots = asyncio.Semaphore(signup_concurrency)
+        tokens = await asyncio.gather(*[_sign_up(client, slots) for _ in range(shoppers)])
+
+        recorder = LoadRecorder()
+        started = time.monotonic()
+        rounds = await asyncio.gather(
+            *[_shop(client, recorder, token, started + duration, coupon) for token in tokens]
+        )
+        elapsed = time.monotonic() - started
+
+    endpoints = recorder.report(elapsed)
+    requests = sum(stats["count"] for stats in endpoints.values())
+    summary = {
+        "elapsed_s": round(elapsed, 1),
+        "checkouts": sum(rounds),
+        "checkouts_per_second": round(sum(rounds) / elapsed, 1),
+        "requests_per_second": round(requests / elapsed, 1),
+    }
+    return endpoints, summary
@@ -0,0 +1,251 @@
+"""
+Two-tier caching for the api app.
+
+``settings.CACHES["default"]`` is the shared tier: Redis when ``REDIS_URL``
+is set (any Redis-compatible server, a local one in development), otherwise
+per-process local memory. ``TieredCache`` puts a small per-process LRU
+(``LocalCache``) in front of it, so hot entries are served without a round
+trip or unpickling, and the web workers share one copy of everything else.
+
+Keys are namespaced and versioned: ``<namespace>:<scope>:<generation>:<name>``.
+``invalidate()`` bumps the generation of a namespace (or of one scope in it,
+e.g. one user's entries), which orphans every older entry at once; orphans
+age out of both tiers on their own. Each process caches generations for
+``generation_ttl`` seconds, which bounds how long other processes keep
+serving the previous generation. Namespaces that must not lag pass 0 and
+read the generation from the shared tier every time.
+
+``get_or_set`` protects expensive recomputes from stampedes: concurrent
+misses for a key in one process wait for the first to finish, and across
+processes the first to claim a short-lived lock in the shared tier
+recomputes while the others wait (up to ``CACHE_LOCK_WAIT`` seconds) for
+its result.
+
+Recomputes read the primary database even in requests allowed to use the
+replica (routing.py): a cached value lives much longer than replication
+lag, so one computed from a lagging replica would stay stale.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .routing import primary
+
+MISSING = object()
+
+_LOCK_STRIPES = 64
+_SAFE_KEY_LENGTH = 120
+
+
+class LocalCache:
+    """
+    A small thread-safe LRU cache for one process. Entries expire after
+    ``ttl`` seconds unless ``set`` gives them their own.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class TieredCache:
+    """Namespaced, versioned cache: a ``LocalCache`` over a Django cache."""
+
+    def __init__(
+        self,
+        namespace,
+        local_ttl=None,
+        local_size=None,
+        generation_ttl=None,
+        alias="default",
+    ):
+        self.namespace = namespace
+        self.alias = alias
+        self.local_ttl = settings.CACHE_LOCAL_TTL if local_ttl is None else local_ttl
+        self.generation_ttl = (
+            settings.CACHE_LOCAL_TTL if generation_ttl is None else generation_ttl
+        )
+        self.local = LocalCache(
+            local_size or settings.CACHE_LOCAL_MAX_ENTRIES, self.local_ttl
+        )
+        self._generations = LocalCache(
+            settings.CACHE_LOCAL_MAX_ENTRIES, self.generation_ttl
+        )
+        self._stripes = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def _generation_key(self, scope):
+        return f"{self.namespace}:{scope or ''}:generation"
+
+    def generation(self, scope=None) -> int:
+        """Current generation of ``scope``: the millisecond time it last changed."""
+        key = self._generation_key(scope)
+        if self.generation_ttl:
+            generation = self._generations.get(key)
+            if generation is not None:
+                return generation
+
+        generation = self.shared.get(key)
+        if generation is None:
+            # Unknown (cold or evicted): start a new generation, which at
+            # worst recomputes what was cached under the lost one
+            self.shared.add(key, _now_ms(), timeout=None)
+            generation = self.shared.get(key)
+        if self.generation_ttl:
+            self._generations.set(key, generation)
+        return generation
+
+    def invalidate(self, scope=None) -> int:
+        """
+        Orphan every entry of ``scope``; returns the new generation. Inside a
+        transaction it is bumped again on commit, since entries recomputed
+        in between may have read the data from before the change.
+        """
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._bump(scope))
+        return self._bump(scope)
+
+    def _bump(self, scope):
+        key = self._generation_key(scope)
+        generation = max(_now_ms(), (self.shared.get(key) or 0) + 1)
+        self.shared.set(key, generation, timeout=None)
+        self._generations.set(key, generation)
+        return generation
+
+    def key(self, name, scope=None) -> str:
+        name = str(name)
+        if len(name) > _SAFE_KEY_LENGTH or not name.isprintable() or " " in name:
+            name = hashlib.sha256(name.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{scope or ''}:{self.generation(scope)}:{name}"
+
+    def _local_ttl(self, timeout):
+        if timeout is None:
+            return self.local_ttl
+        return min(self.local_ttl, timeout)
+
+    def get(self, name, default=None, scope=None):
+        value = self._lookup(self.key(name, scope))
+        return default if value is MISSING else value
+
+    def set(self, name, value, timeout, scope=None):
+        self._set(self.key(name, scope), value, timeout)
+
+    def _set(self, key, value, timeout):
+        self.shared.set(key, value, timeout=timeout)
+        self.local.set(key, value, self._local_ttl(timeout))
+
+    async def aget_or_set(self, name, acompute, timeout, scope=None):
+        """
+        ``get_or_set`` for async code, with ``acompute`` a coroutine function.
+        The shared tier is used off the event loop. There is no stampede
+        lock: use it for cheap, per-user values.
+        """
+        key = await sync_to_async(self.key, thread_sensitive=False)(name, scope)
+        value = await sync_to_async(self._lookup, thread_sensitive=False)(key)
+        if value is MISSING:
+            with primary():
+                value = await acompute()
+            await sync_to_async(self._set, thread_sensitive=False)(key, value, timeout)
+        return value
+
+    def delete(self, name, scope=None):
+        key = self.key(name, scope)
+        self.shared.delete(key)
+        self.local.delete(key)
+
+    def get_or_set(self, name, compute, timeout, scope=None):
+        """
+        The cached value of ``name``, or ``compute()`` stored for ``timeout``
+        seconds (``timeout`` may be a function of the computed value).
+        Concurrent misses compute it once.
+        """
+        key = self.key(name, scope)
+        value = self._lookup(key)
+        if value is not MISSING:
+            return value
+
+        with self._stripes[hash(key) % _LOCK_STRIPES]:
+            # Another thread of this process may have filled it meanwhile
+            value = self._lookup(key)
+            if value is not MISSING:
+                return value
+
+            lock_key = f"{key}:lock"
+            locked = self.shared.add(lock_key, 1, timeout=settings.CACHE_LOCK_TIMEOUT)
+            if not locked:
+                value = self._wait_for(key)
+                if value is not MISSING:
+                    return value
+                # The other process is taking too long; compute it ourselves
+            try:
+                with primary():
+                    value = compute()
+                self._set(key, value, timeout(value) if callable(timeout) else timeout)
+            finally:
+                if locked:
+                    self.shared.delete(lock_key)
+        return value
+
+    def _lookup(self, key):
+        value = self.local.get(key, MISSING)
+        if value is MISSING:
+            value = self.shared.get(key, MISSING)
+            if value is not MISSING:
+                self.local.set(key, value)
+        return value
+
+    def _wait_for(self, key):
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self._lookup(key)
+            if value is not MISSING:
+                return value
+        return MISSING
+
+    def clear_local(self):
+        """Drop this process's copies (the shared tier is left alone)."""
+        self.local.clear()
+        self._generations.clear()
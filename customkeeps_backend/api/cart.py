@@ -0,0 +1,170 @@
+"""
+Cart line matching and cart mutations.
+
+Two cart lines are the same line when their customization fingerprint
+matches: a SHA-256 over the product, base color, customization text and
+design reference. The fingerprint is stored on CartItem with a unique
+(user, fingerprint) constraint, so merging an add into an existing line is
+an index probe, and concurrent adds can't create duplicate lines.
+"""
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+
+def customization_fingerprint(product_name, base_color, customization_text,
+                              design_asset_id, design_image_url) -> str:
+    payload = json.dumps(
+        [
+            product_name or "",
+            base_color or "",
+            customization_text or "",
+            design_asset_id or "",
+            design_image_url or "",
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def reprice_cart_lines(items, table):
+    """
+    Price cart lines at their product's current catalog price from the
+    cached price table, rather than the price stored when they were added.
+    Lines added before products were referenced are matched by name. Lines
+    whose product no longer exists are rejected. No queries.
+    """
+    from .pricing import from_cents
+
+    gone = set()
+    for item in items:
+        if item.product_id is None:
+            resolved = table.resolve(item.product_name)
+            if resolved is not None:
+                item.product_id = resolved[0]
+        cents = table.id_prices.get(item.product_id)
+        if cents is None:
+            gone.add(item.product_name)
+            continue
+        item.price = from_cents(cents)
+    if gone:
+        raise ValidationError(
+            {"cart": [f"No longer available: {', '.join(sorted(gone))}. Remove them from your cart."]}
+        )
+    return items
+
+
+def quote_cart_lines(items, coupon_code=None):
+    """Quote cart lines at current catalog prices, with one price table lookup."""
+    from .pricing import get_price_table, quote_cart
+
+    # Lines saved before quantities were validated must not lower the total
+    invalid = sorted({item.product_name for item in items if item.quantity < 1})
+    if invalid:
+        raise ValidationError(
+            {"cart": [f"Quantity must be at least 1: {', '.join(invalid)}. Fix or remove them."]}
+        )
+    table = get_price_table()
+    return quote_cart(reprice_cart_lines(items, table), coupon_code, table)
+
+
+def add_cart_line(user_id, data):
+    """
+    Add a line to user ``user_id``'s cart, merging it into an identical line.
+
+    Returns (item, created). Tries to bump the quantity of the line with the
+    same fingerprint first; if there is none, inserts. An insert that loses
+    a race with a concurrent add hits the unique constraint and falls back
+    to the increment.
+    """
+    from .models import CartItem
+
+    item = CartItem(user_id=user_id, **data)
+    item.fingerprint = item.compute_fingerprint()
+    existing = CartItem.objects.filter(user_id=user_id, fingerprint=item.fingerprint)
+
+    def merge():
+        return existing.update(
+            quantity=F("quantity") + item.quantity, updated_at=timezone.now()
+        )
+
+    if merge():
+        return existing.get(), False
+    try:
+        with transaction.atomic():
+            item.save()
+        return item, True
+    except IntegrityError:
+        merge()
+        return existing.get(), False
+
+
+@transaction.atomic
+def apply_cart_operations(user_id, operations):
+    """
+    Apply validated add/update/remove operations to user ``user_id``'s cart.
+
+    The cart is read once (and locked); the changes are then written with at
+    most one DELETE, one bulk UPDATE and one bulk INSERT. Returns the
+    resulting cart lines.
+    """
+    from .models import CartItem
+
+    items = list(CartItem.objects.select_for_update().filter(user_id=user_id))
+    by_id = {item.pk: item for item in items}
+    by_fingerprint = {item.fingerprint: item for item in items}
+
+    to_create, to_update, to_delete = [], {}, set()
+
+    for index, operation in enumerate(operations):
+        op = operation["op"]
+
+        if op == "add":
+            new_item = CartItem(user_id=user_id, **operation["item"])
+            new_item.fingerprint = new_item.compute_fingerprint()
+            existing = by_fingerprint.get(new_item.fingerprint)
+            if existing is None:
+                by_fingerprint[new_item.fingerprint] = new_item
+                to_create.append(new_item)
+                continue
+            existing.quantity += new_item.quantity
+            if existing.pk:
+                to_update[existing.pk] = existing
+            continue
+
+        item = by_id.get(operation["id"])
+        if item is None:
+            raise ValidationError(
+                {"operations": {index: ["Cart item not found."]}}
+            )
+
+        if op == "update" and operation["quantity"] > 0:
+            item.quantity = operation["quantity"]
+            to_update[item.pk] = item
+        else:
+            # "remove", or an update down to zero
+            del by_id[item.pk]
+            by_fingerprint.pop(item.fingerprint, None)
+            to_update.pop(item.pk, None)
+            to_delete.add(item.pk)
+
+    if to_delete:
+        CartItem.objects.filter(pk__in=to_delete).delete()
+    if to_update:
+        now = timezone.now()
+        for item in to_update.values():
+            item.updated_at = now
+        CartItem.objects.bulk_update(to_update.values(), ["quantity", "updated_at"])
+    if to_create:
+        CartItem.objects.bulk_create(to_create)
+
+    remaining = [item for item in items if item.pk not in to_delete]
+    return sorted(
+        remaining + to_create,
+        key=lambda item: (item.created_at, item.pk or 0),
+        reverse=True,
+    )
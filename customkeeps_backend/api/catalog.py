@@ -0,0 +1,67 @@
+"""
+Versioned cache of the rendered product catalog.
+
+The catalog only changes when staff edit products, so the rendered JSON is
+cached under the current catalog version, which is the generation of the
+"catalog" namespace of the tiered cache (cache.py). Product save/delete
+signals bump it (see signals.py), which both invalidates the cached body
+and changes the ETag/Last-Modified the list endpoint hands out. Other
+processes pick up a new version within ``CACHE_LOCAL_TTL`` seconds, and a
+cold catalog is rendered by one worker while the others wait for it.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import TieredCache
+
+# A body never changes under its version, so processes may keep it as long
+# as the shared tier does
+catalog_cache = TieredCache("catalog", local_ttl=settings.CATALOG_CACHE_TIMEOUT)
+
+
+def get_catalog_version() -> int:
+    """Current catalog version: the millisecond timestamp of the last change."""
+    return catalog_cache.generation()
+
+
+def bump_catalog_version() -> int:
+    return catalog_cache.invalidate()
+
+
+def catalog_etag(version: int) -> str:
+    return f'"catalog-{version}"'
+
+
+def catalog_last_modified(version: int) -> float:
+    return version / 1000
+
+
+def get_catalog_json(version: int, render) -> bytes:
+    """Return the rendered catalog for ``version``, calling ``render()`` on a miss."""
+    return catalog_cache.get_or_set(
+        f"json:{version}", render, settings.CATALOG_CACHE_TIMEOUT
+    )
+
+
+def catalog_response(request, render):
+    """
+    The product list response. Clients revalidate with If-None-Match /
+    If-Modified-Since and get a 304 while the catalog is unchanged;
+    otherwise the pre-rendered JSON is returned without touching the
+    database or the serializer.
+    """
+    version = get_catalog_version()
+    etag = catalog_etag(version)
+    last_modified = catalog_last_modified(version)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is None:
+        body = get_catalog_json(version, render)
+        response = HttpResponse(body, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,160 @@
+"""
+The PaymentIntent that goes with a checkout cart.
+
+Carts are priced with ``pricing.quote_cart``, both here and when the cart is
+turned into an order, so the amount charged always matches the order.
+
+Each user has at most one open checkout PaymentIntent, cached with the
+fingerprint of the cart it was priced for. Paying again for an unchanged
+cart reuses the cached intent without calling Stripe; a changed cart
+updates the existing intent's amount instead of creating a new one.
+
+The cached intent stays payable because it leaves the cache when it can
+no longer be: creating the order forgets it (``forget_checkout_intent``),
+and the entry expires after ``CHECKOUT_INTENT_CACHE_TIMEOUT``. When Stripe
+refuses an update because the intent was paid or canceled meanwhile, the
+checkout starts over under a new generation, so the idempotency key can't
+hand the old intent back.
+"""
+import hashlib
+import json
+import uuid
+
+import stripe
+from django.conf import settings
+from django.core.cache import cache
+
+from .payments import (
+    acreate_payment_intent,
+    aupdate_payment_intent,
+    create_payment_intent,
+    update_payment_intent,
+)
+
+
+def cart_fingerprint(cart_items, coupon_code) -> str:
+    """Digest of everything that affects the amount: lines, quantities, prices, coupon."""
+    payload = json.dumps(
+        [
+            sorted([item.fingerprint, item.quantity, str(item.price)] for item in cart_items),
+            coupon_code or "",
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _intent_cache_key(user_id):
+    return f"checkout:intent:{user_id}"
+
+
+def _checkout_generation(user_id):
+    """
+    Random token identifying the user's current checkout. It is part of the
+    Stripe idempotency key, so double-submits collapse into one intent while
+    buying the same cart again later gets a fresh one.
+    """
+    return cache.get_or_set(_generation_cache_key(user_id), _new_generation, None)
+
+
+def _generation_cache_key(user_id):
+    return f"checkout:generation:{user_id}"
+
+
+def _new_generation():
+    return uuid.uuid4().hex
+
+
+def _is_current(cached, fingerprint, quote):
+    return (
+        bool(cached)
+        and cached["fingerprint"] == fingerprint
+        and cached["amount"] == quote.amount_cents
+    )
+
+
+def _metadata(user, quote):
+    return {
+        "user_id": user.id,
+        "username": user.username,
+        "coupon_code": quote.coupon.code if quote.coupon else "",
+    }
+
+
+def _entry(fingerprint, intent, quote):
+    return {
+        "fingerprint": fingerprint,
+        "id": intent["id"],
+        "client_secret": intent["client_secret"],
+        "amount": quote.amount_cents,
+    }
+
+
+def checkout_payment_intent(user, cart_items, quote):
+    """
+    Return the intent for paying ``quote`` (the quote of ``cart_items``): the
+    cached intent when the cart is unchanged, else the user's open intent
+    updated to the new amount, else a new one.
+    """
+    fingerprint = cart_fingerprint(cart_items, quote.coupon.code if quote.coupon else "")
+    key = _intent_cache_key(user.id)
+    cached = cache.get(key)
+    if _is_current(cached, fingerprint, quote):
+        return cached
+
+    metadata = _metadata(user, quote)
+    intent = None
+    if cached:
+        try:
+            intent = update_payment_intent(cached["id"], quote.amount_cents, metadata)
+        except stripe.InvalidRequestError:
+            # Paid or canceled since; start over with a new generation, or the
+            # idempotency key would hand back that intent
+            intent = None
+            cache.set(_generation_cache_key(user.id), _new_generation(), None)
+    if intent is None:
+        intent = create_payment_intent(
+            quote.amount_cents,
+            metadata=metadata,
+            idempotency_key=f"checkout-{user.id}-{_checkout_generation(user.id)}-{fingerprint}",
+        )
+
+    entry = _entry(fingerprint, intent, quote)
+    cache.set(key, entry, settings.CHECKOUT_INTENT_CACHE_TIMEOUT)
+    return entry
+
+
+async def acheckout_payment_intent(user, cart_items, quote):
+    """``checkout_payment_intent`` for async views."""
+    fingerprint = cart_fingerprint(cart_items, quote.coupon.code if quote.coupon else "")
+    key = _intent_cache_key(user.id)
+    cached = await cache.aget(key)
+    if _is_current(cached, fingerprint, quote):
+        return cached
+
+    metadata = _metadata(user, quote)
+    intent = None
+    if cached:
+        try:
+            intent = await aupdate_payment_intent(cached["id"], quote.amount_cents, metadata)
+        except stripe.InvalidRequestError:
+            intent = None
+            await cache.aset(_generation_cache_key(user.id), _new_generation(), None)
+    if intent is None:
+        generation = await cache.aget_or_set(
+            _generation_cache_key(user.id), _new_generation, None
+        )
+        intent = await acreate_payment_intent(
+            quote.amount_cents,
+            metadata=metadata,
+            idempotency_key=f"checkout-{user.id}-{generation}-{fingerprint}",
+        )
+
+    entry = _entry(fingerprint, intent, quote)
+    await cache.aset(key, entry, settings.CHECKOUT_INTENT_CACHE_TIMEOUT)
+    return entry
+
+
+def forget_checkout_intent(user_id):
+    """Drop the cached intent once its cart has become an order."""
+    cache.delete_many([_intent_cache_key(user_id), _generation_cache_key(user_id)])
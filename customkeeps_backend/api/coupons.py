@@ -0,0 +1,83 @@
+"""
+Coupon resolution shared by coupon preview and checkout.
+
+Codes are normalized to uppercase on save, so lookups are an exact match on
+the unique ``Coupon.code`` index instead of an ``iexact`` scan. Resolved
+coupons, and codes that don't exist, are kept in the tiered cache
+(cache.py); coupon edits invalidate it through the signals in signals.py.
+Validity windows are checked on every call, so caching never extends a
+coupon's life.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import TieredCache
+
+
+@dataclass(frozen=True)
+class CouponSnapshot:
+    code: str
+    discount_percent: Decimal
+    valid_from: datetime
+    valid_to: datetime
+    active: bool
+
+    @classmethod
+    def from_model(cls, coupon):
+        return cls(
+            code=coupon.code,
+            discount_percent=coupon.discount_percent,
+            valid_from=coupon.valid_from,
+            valid_to=coupon.valid_to,
+            active=coupon.active,
+        )
+
+    def is_valid(self, now=None) -> bool:
+        now = now or timezone.now()
+        return self.active and self.valid_from <= now <= self.valid_to
+
+
+coupon_cache = TieredCache(
+    "coupons",
+    local_ttl=settings.COUPON_CACHE_TTL,
+    local_size=settings.COUPON_CACHE_MAX_ENTRIES,
+)
+
+
+def normalize_code(code) -> str:
+    return str(code or "").strip().upper()
+
+
+def _load_coupon(code):
+    from .models import Coupon
+
+    coupon = Coupon.objects.filter(code=code).first()
+    return CouponSnapshot.from_model(coupon) if coupon is not None else None
+
+
+def _coupon_cache_timeout(snapshot):
+    if snapshot is None:
+        return settings.COUPON_NEGATIVE_CACHE_TTL
+    return settings.COUPON_CACHE_TTL
+
+
+def resolve_coupon(code, now=None):
+    """Return the CouponSnapshot for ``code`` if it is usable now, else None."""
+    code = normalize_code(code)
+    if not code:
+        return None
+
+    snapshot = coupon_cache.get_or_set(
+        code, lambda: _load_coupon(code), timeout=_coupon_cache_timeout
+    )
+    if snapshot is None or not snapshot.is_valid(now):
+        return None
+    return snapshot
+
+
+def invalidate_coupons():
+    coupon_cache.invalidate()
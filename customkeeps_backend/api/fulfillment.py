@@ -0,0 +1,108 @@
+"""
+Bulk order status transitions for fulfillment.
+
+Orders move forward through ``Order.STATUS_CHOICES`` one step at a time
+(preparing -> ready_for_delivery -> in_transit -> delivered -> completed).
+``transition_orders`` moves a whole batch in one transaction: it locks and
+checks the orders, changes them with a single UPDATE, appends one
+``OrderStatusTransition`` row per order, brings the order summaries up to
+date and marks the batch's days dirty in the sales rollups. A batch with any
+order that cannot make the move is rejected as a whole.
+
+``QuerySet.update`` sends no signals, so the summaries and rollups are
+handled here rather than by signals.py.
+"""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from .reports import mark_days_dirty
+from .summaries import sync_order_summaries
+
+
+def status_pipeline():
+    from .models import Order
+
+    return [status for status, _ in Order.STATUS_CHOICES]
+
+
+def allowed_transitions():
+    """{status: status it may advance to}; the last status goes nowhere."""
+    pipeline = status_pipeline()
+    return dict(zip(pipeline, pipeline[1:]))
+
+
+class InvalidTransition(Exception):
+    """Some orders of a batch cannot move to the requested status."""
+
+    def __init__(self, to_status, invalid):
+        # invalid: {order code: current status}
+        self.to_status = to_status
+        self.invalid = invalid
+        super().__init__(
+            f"{len(invalid)} order(s) cannot move to {to_status}: "
+            + ", ".join(f"{code} ({status})" for code, status in sorted(invalid.items()))
+        )
+
+
+@dataclass
+class TransitionResult:
+    to_status: str
+    order_codes: list = field(default_factory=list)
+
+    @property
+    def count(self):
+        return len(self.order_codes)
+
+
+@transaction.atomic
+def transition_orders(orders, to_status, changed_by=None, note=""):
+    """
+    Move every order in the queryset ``orders`` to ``to_status``.
+
+    Raises ``ValueError`` for an unknown status and ``InvalidTransition``
+    (changing nothing) when any order is not at the step before it.
+    """
+    from .models import Order, OrderStatusTransition
+
+    pipeline = status_pipeline()
+    if to_status not in pipeline:
+        raise ValueError(f"Unknown status: {to_status}")
+    allowed = allowed_transitions()
+
+    # Lock the batch so a concurrent transition can't interleave
+    rows = list(
+        Order.objects.select_for_update()
+        .filter(pk__in=orders.values("pk"))
+        .order_by("id")
+        .values_list("id", "order_id", "status", "created_at")
+    )
+    invalid = {
+        code: status for _, code, status, _ in rows if allowed.get(status) != to_status
+    }
+    if invalid:
+        raise InvalidTransition(to_status, invalid)
+    if not rows:
+        return TransitionResult(to_status)
+
+    ids = [pk for pk, _, _, _ in rows]
+    now = timezone.now()
+    Order.objects.filter(id__in=ids).update(status=to_status, updated_at=now)
+    OrderStatusTransition.objects.bulk_create(
+        [
+            OrderStatusTransition(
+                order_id=pk,
+                from_status=status,
+                to_status=to_status,
+                changed_by_id=changed_by.pk if changed_by else None,
+                note=note,
+            )
+            for pk, _, status, _ in rows
+        ]
+    )
+    sync_order_summaries(ids, status=to_status)
+
+    mark_days_dirty(timezone.localdate(created_at) for _, _, _, created_at in rows)
+
+    return TransitionResult(to_status, [code for _, code, _, _ in rows])
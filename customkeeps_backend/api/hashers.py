@@ -0,0 +1,39 @@
+"""
+Password hasher profiles.
+
+``PASSWORD_HASHER_PROFILE`` picks the hasher new passwords are stored with:
+
+* ``pbkdf2`` (default): PBKDF2-SHA256, ``PASSWORD_PBKDF2_ITERATIONS`` rounds.
+* ``scrypt``: memory-hard, ``PASSWORD_SCRYPT_*`` cost parameters.
+* ``argon2``: Argon2id, ``PASSWORD_ARGON2_*`` cost parameters. Needs the
+  optional ``argon2-cffi`` package.
+
+The classes below keep Django's algorithm names and only take their cost
+parameters from settings, so every profile can still verify hashes written
+by the others. On login, a password stored with another profile or with
+different parameters is rehashed with the current one (hashing.py), which
+makes switching profiles or retuning costs a settings change.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+    block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+    parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
+    maxmem = settings.PASSWORD_SCRYPT_MAXMEM
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
@@ -0,0 +1,106 @@
+"""
+Password hashing off the request threads.
+
+Hashing a password is deliberately slow (tens to hundreds of milliseconds
+of CPU with the production hasher profiles), and registration and login
+used to do it inline on the web worker. A burst of logins could then tie
+up every worker on key stretching.
+
+``hash_password`` and ``verify_password`` run the hasher on a small
+dedicated thread pool that doubles as a bulkhead, like the Stripe pool in
+payments.py: at most ``PASSWORD_HASHING_MAX_CONCURRENCY`` hashes run at once
+and ``PASSWORD_HASHING_MAX_QUEUED`` more may wait. Past that, or when a
+hash overruns ``PASSWORD_HASHING_DEADLINE``, ``HashingUnavailable`` is raised
+right away and the register and token views answer 503. The hashers
+release the GIL (hashlib's PBKDF2 and scrypt, argon2-cffi), so the pool runs
+hashes in parallel.
+
+Only the hashing runs on the pool; database reads and writes stay on the
+request thread. ``PooledModelBackend`` is the login path: it verifies on
+the pool and transparently rehashes a password stored with an older hasher
+or weaker parameters (see hashers.py). A rehash changes the stored hash and
+so the user's token digest (auth.py), which ends their older sessions.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth import hashers
+from django.contrib.auth.backends import ModelBackend
+
+
+class HashingUnavailable(Exception):
+    """Too many passwords are being hashed to take another one right now."""
+
+
+@lru_cache(maxsize=None)
+def _get_pool():
+    executor = ThreadPoolExecutor(
+        max_workers=settings.PASSWORD_HASHING_MAX_CONCURRENCY,
+        thread_name_prefix="hashing",
+    )
+    slots = threading.BoundedSemaphore(
+        settings.PASSWORD_HASHING_MAX_CONCURRENCY + settings.PASSWORD_HASHING_MAX_QUEUED
+    )
+    return executor, slots
+
+
+def run_hashing(func, *args, **kwargs):
+    """Run ``func`` on the hashing pool, failing fast when it is saturated."""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingUnavailable("Too many sign-ins right now, please try again.")
+    try:
+        future = executor.submit(func, *args, **kwargs)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is held until the hash really finishes, even if we stop waiting
+    future.add_done_callback(lambda _: slots.release())
+
+    try:
+        return future.result(timeout=settings.PASSWORD_HASHING_DEADLINE)
+    except FutureTimeout:
+        raise HashingUnavailable("Sign-in timed out, please try again.")
+
+
+def hash_password(raw_password):
+    """``make_password`` with the preferred hasher, on the pool."""
+    return run_hashing(hashers.make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """
+    ``user.check_password`` with the hashing on the pool: True when
+    ``raw_password`` matches. A matching password stored with an outdated
+    hasher is rehashed (also on the pool) and saved.
+    """
+    matches, must_update = run_hashing(
+        hashers.verify_password, raw_password, user.password
+    )
+    if matches and must_update:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=["password"])
+    return matches
+
+
+class PooledModelBackend(ModelBackend):
+    """``ModelBackend`` that verifies passwords on the hashing pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            hash_password(password)
+            return None
+        if verify_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
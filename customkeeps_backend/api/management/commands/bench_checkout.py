@@ -0,0 +1,131 @@
+import json
+import shutil
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.assets import get_design_asset_storage
+from api.benchmarks import (
+    FunnelRecorder,
+    compare_to_baseline,
+    run_checkout_funnel,
+    seed_benchmark_data,
+)
+from api.payments import get_stripe_client
+from api.stripe_stub import StripeStubServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the checkout funnel (register -> token -> products -> cart -> "
+        "coupon -> pay -> create_from_cart -> orders) against a throwaway test "
+        "database and a local Stripe stub, and write per-endpoint p50/p95/p99 "
+        "latency, query counts and response sizes as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Virtual shoppers to run.")
+        parser.add_argument("--cart-lines", type=int, default=3, help="Cart lines per order.")
+        parser.add_argument("--orders-per-user", type=int, default=1)
+        parser.add_argument("--stripe-latency", type=float, default=0.0,
+                            help="Seconds of simulated Stripe latency per call.")
+        parser.add_argument("--fast-hashing", action="store_true",
+                            help="Use a cheap password hasher so auth cost doesn't dominate.")
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--baseline", help="Earlier JSON report to compare against.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed p95 latency growth over the baseline (fraction).")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)["endpoints"]
+
+        endpoints = self.run(options)
+        report = {
+            "meta": {
+                "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "users": options["users"],
+                "cart_lines": options["cart_lines"],
+                "orders_per_user": options["orders_per_user"],
+                "stripe_latency": options["stripe_latency"],
+                "fast_hashing": options["fast_hashing"],
+            },
+            "endpoints": endpoints,
+        }
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+        self.print_table(endpoints)
+
+        if baseline is not None:
+            regressions = compare_to_baseline(endpoints, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+
+    def run(self, options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        for alias in connections:
+            # The read replica (api/routing.py) reads the test database too
+            if connections[alias].settings_dict["TEST"].get("MIRROR") == connection.alias:
+                connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        media_root = tempfile.mkdtemp(prefix="bench-media-")
+
+        overrides = {
+            "DESIGN_ASSET_STORAGE": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": media_root},
+            },
+            "DESIGN_THUMBNAIL_ROOT": media_root,
+        }
+        if options["fast_hashing"]:
+            overrides["PASSWORD_HASHERS"] = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+        try:
+            with StripeStubServer(latency=options["stripe_latency"]) as stub, override_settings(
+                STRIPE_API_BASE=stub.url, STRIPE_SECRET_KEY="sk_test_stub", **overrides
+            ):
+                get_design_asset_storage.cache_clear()
+                get_stripe_client.cache_clear()
+
+                seed_benchmark_data()
+                recorder = FunnelRecorder()
+                for _ in range(options["users"]):
+                    run_checkout_funnel(
+                        recorder,
+                        cart_lines=options["cart_lines"],
+                        orders_per_user=options["orders_per_user"],
+                    )
+                return recorder.report()
+        finally:
+            get_design_asset_storage.cache_clear()
+            get_stripe_client.cache_clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def print_table(self, endpoints):
+        header = f"{'endpoint':<36}{'n':>5}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'bytes':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, stats in endpoints.items():
+            latency = stats["latency_ms"]
+            self.stdout.write(
+                f"{name:<36}{stats['count']:>5}{stats['errors']:>5}"
+                f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+                f"{stats['queries']['max']:>9.0f}{stats['response_bytes']['p50']:>9.0f}"
+            )
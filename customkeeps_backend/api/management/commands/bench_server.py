@@ -0,0 +1,74 @@
+import asyncio
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import run_server_load, seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server: sign up N shoppers, then run them all at "
+        "once through products -> cart -> coupon -> pay -> orders -> clear cart "
+        "for a fixed time, and report throughput and per-endpoint p50/p95/p99 "
+        "latency. Start the server (gunicorn -c gunicorn.conf.py, in either "
+        "profile) with STRIPE_API_BASE pointing at `python -m api.stripe_stub` "
+        "so Stripe latency is controlled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--shoppers", type=int, default=50, help="Concurrent shoppers.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+        parser.add_argument("--seed", action="store_true",
+                            help="Create the bench coupon in this settings' database first.")
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_server needs httpx: pip install httpx")
+
+        if options["seed"]:
+            seed_benchmark_data()
+
+        endpoints, summary = asyncio.run(
+            run_server_load(
+                options["base_url"],
+                shoppers=options["shoppers"],
+                duration=options["duration"],
+            )
+        )
+        report = {
+            "meta": {
+                "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                "base_url": options["base_url"],
+                "shoppers": options["shoppers"],
+                "duration": options["duration"],
+                **summary,
+            },
+            "endpoints": endpoints,
+        }
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+        self.print_table(endpoints)
+        self.stdout.write(
+            f"\n{summary['requests_per_second']} requests/s, "
+            f"{summary['checkouts_per_second']} checkouts/s over {summary['elapsed_s']}s"
+        )
+
+    def print_table(self, endpoints):
+        header = f"{'endpoint':<24}{'n':>7}{'req/s':>8}{'non-2xx':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, stats in endpoints.items():
+            latency = stats["latency_ms"]
+            failed = sum(n for code, n in stats["statuses"].items() if code >= 300)
+            self.stdout.write(
+                f"{name:<24}{stats['count']:>7}{stats['per_second']:>8.1f}{failed:>9}"
+                f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+            )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.exports import EXPORT_FORMATS, export_order_lines, render_export
+from api.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream order lines for fulfillment as CSV or NDJSON, optionally "
+        "filtered by status and by local order date (--since..--until)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status", action="append", choices=[choice for choice, _ in Order.STATUS_CHOICES],
+            help="Only orders in this status (repeatable).",
+        )
+        parser.add_argument("--since", help="First order date (YYYY-MM-DD).")
+        parser.add_argument("--until", help="Last order date (YYYY-MM-DD).")
+        parser.add_argument("--output-format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--file", help="Write here instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=2000,
+                            help="Rows fetched from the database per round trip.")
+
+    def handle(self, *args, **options):
+        bounds = []
+        for name in ("since", "until"):
+            value = options[name]
+            day = parse_date(value) if value else None
+            if value and day is None:
+                raise CommandError(f"--{name} must be a date (YYYY-MM-DD), got {value!r}.")
+            bounds.append(day)
+        since, until = bounds
+
+        rows = export_order_lines(
+            statuses=options["status"], start=since, end=until, chunk_size=options["chunk_size"],
+        )
+        chunks = render_export(rows, options["output_format"])
+        if options["file"]:
+            with open(options["file"], "w", encoding="utf-8", newline="") as out:
+                out.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.reports import flush_sales_rollups, rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily sales rollups from the order tables, for every "
+        "date or for the local dates --since..--until (inclusive). With "
+        "--pending, only add new orders and recompute days marked dirty; run "
+        "that from cron, as it is what brings the reports up to date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First date to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--until", help="Last date to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--pending", action="store_true",
+                            help="Only add pending orders and recompute dirty days.")
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            if options["since"] or options["until"]:
+                raise CommandError("--pending takes no dates.")
+            added, days = flush_sales_rollups()
+            self.stdout.write(self.style.SUCCESS(
+                f"Added {added} pending orders and recomputed {days} dirty days."
+            ))
+            return
+
+        bounds = []
+        for name in ("since", "until"):
+            value = options[name]
+            day = parse_date(value) if value else None
+            if value and day is None:
+                raise CommandError(f"--{name} must be a date (YYYY-MM-DD), got {value!r}.")
+            bounds.append(day)
+        since, until = bounds
+        if since and until and since > until:
+            raise CommandError("--since must not be after --until.")
+
+        order_rows, sales_rows = rebuild_sales_rollups(since, until)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {order_rows} order rollup rows and {sales_rows} sales rollup rows."
+        ))
@@ -0,0 +1,161 @@
+"""
+Per-request performance metrics for the API.
+
+``RequestMetricsMiddleware`` (middleware.py) opens a ``RequestMetrics`` for
+every request, counts and times SQL through a connection execute wrapper and
+collects serializer time from ``timed("serialize")`` blocks. Finished
+requests are aggregated per endpoint in ``registry`` (served to staff at
+``/api/metrics/``), logged to the ``api.metrics`` logger and checked against
+``settings.API_QUERY_BUDGETS``.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar("api_request_metrics", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more SQL queries than its endpoint's declared budget."""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RequestMetrics:
+    """Counters for one request; also the SQL execute wrapper."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.spans = defaultdict(float)
+        self._depth = defaultdict(int)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        parts = [f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"']
+        parts += [f"{name};dur={ms:.1f}" for name, ms in self.spans.items()]
+        parts.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def collect_metrics():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the block's wall time to span ``name`` of the current request.
+
+    Nested blocks of the same name are counted once, so a serializer that
+    renders nested serializers isn't double-counted.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics._depth[name]:
+        yield
+        return
+
+    metrics._depth[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[name] -= 1
+        metrics.spans[name] += (time.perf_counter() - started) * 1000
+
+
+def query_budget(endpoint, method):
+    """Declared query budget for ``METHOD endpoint`` or ``endpoint``, if any."""
+    budgets = settings.API_QUERY_BUDGETS
+    return budgets.get(f"{method} {endpoint}", budgets.get(endpoint))
+
+
+class MetricsRegistry:
+    """In-process aggregate of request metrics, keyed by ``METHOD url-name``."""
+
+    def __init__(self, sample_size):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def record(self, key, status_code, metrics, response_bytes):
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = {
+                    "count": 0,
+                    "errors": 0,
+                    "queries_total": 0,
+                    "queries_max": 0,
+                    "db_ms_total": 0.0,
+                    "serialize_ms_total": 0.0,
+                    "bytes_total": 0,
+                    "latency_ms": deque(maxlen=self.sample_size),
+                }
+            stats["count"] += 1
+            stats["errors"] += status_code >= 500
+            stats["queries_total"] += metrics.queries
+            stats["queries_max"] = max(stats["queries_max"], metrics.queries)
+            stats["db_ms_total"] += metrics.db_ms
+            stats["serialize_ms_total"] += metrics.spans.get("serialize", 0.0)
+            stats["bytes_total"] += response_bytes or 0
+            stats["latency_ms"].append(metrics.total_ms)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {key: dict(stats, latency_ms=list(stats["latency_ms"]))
+                         for key, stats in self._endpoints.items()}
+
+        report = {}
+        for key, stats in sorted(endpoints.items()):
+            count, latencies = stats["count"], stats["latency_ms"]
+            report[key] = {
+                "count": count,
+                "errors": stats["errors"],
+                "queries_avg": round(stats["queries_total"] / count, 2),
+                "queries_max": stats["queries_max"],
+                "db_ms_avg": round(stats["db_ms_total"] / count, 2),
+                "serialize_ms_avg": round(stats["serialize_ms_total"] / count, 2),
+                "bytes_avg": round(stats["bytes_total"] / count),
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50), 2),
+                    "p95": round(percentile(latencies, 95), 2),
+                    "p99": round(percentile(latencies, 99), 2),
+                },
+            }
+        return report
+
+
+registry = MetricsRegistry(settings.API_METRICS_SAMPLE_SIZE)
@@ -0,0 +1,99 @@
+import logging
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import QueryBudgetExceeded, collect_metrics, query_budget, registry
+
+logger = logging.getLogger("api.metrics")
+
+
+def response_size(response):
+    if response.streaming:
+        length = response.get("Content-Length")
+        return int(length) if length else None
+    return len(response.content)
+
+
+def wrap_connections(stack, metrics):
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(metrics))
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure SQL queries, DB time, serializer time and response size for each
+    request, keyed by the resolved URL name (``checkout-pay``, ``order-list``).
+
+    Results go to the in-process metrics registry, the ``api.metrics`` logger
+    and, when ``API_SERVER_TIMING`` is on, a ``Server-Timing`` header. A
+    request that exceeds its entry in ``API_QUERY_BUDGETS`` is logged, or
+    raises ``QueryBudgetExceeded`` when ``API_QUERY_BUDGET_STRICT`` is set
+    (the default under ``manage.py test``).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.API_METRICS_ENABLED:
+            return self.get_response(request)
+
+        with collect_metrics() as metrics, ExitStack() as stack:
+            wrap_connections(stack, metrics)
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not settings.API_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        with collect_metrics() as metrics:
+            # The ORM runs queries on the request's thread-sensitive thread
+            # (the async ORM too), so that thread's connections get wrapped
+            stack = ExitStack()
+            await sync_to_async(wrap_connections)(stack, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        match = request.resolver_match
+        if match is None:
+            return response
+
+        endpoint = match.view_name
+        size = response_size(response)
+        registry.record(f"{request.method} {endpoint}", response.status_code, metrics, size)
+        if settings.API_SERVER_TIMING:
+            response["Server-Timing"] = metrics.server_timing()
+
+        logger.debug(
+            "%s %s %s queries=%d db=%.1fms serialize=%.1fms total=%.1fms bytes=%s",
+            request.method, endpoint, response.status_code, metrics.queries,
+            metrics.db_ms, metrics.spans.get("serialize", 0.0), metrics.total_ms, size,
+        )
+
+        budget = query_budget(endpoint, request.method)
+        if budget is not None and metrics.queries > budget:
+            message = (
+                f"{request.method} {endpoint} ran {metrics.queries} queries "
+                f"(budget {budget})"
+            )
+            if settings.API_QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:32
+
+import api.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_delete_designtemplate_product_template_image_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignAsset',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('file', models.FileField(max_length=255, storage=api.models.design_asset_storage, upload_to='')),
+                ('content_type', models.CharField(max_length=50)),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='cartitem',
+            name='design_image_url',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='design_image_url',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='cartitem',
+            name='design_asset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cart_items', to='api.designasset'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='design_asset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='order_items', to='api.designasset'),
+        ),
+    ]
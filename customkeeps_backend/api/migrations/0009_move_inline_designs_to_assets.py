@@ -0,0 +1,93 @@
+import base64
+import binascii
+import hashlib
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import migrations
+from django.utils.module_loading import import_string
+
+# Frozen copies of the api.assets helpers as of this migration, so later
+# changes to that module can't change what this migration does.
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png', 'png'),
+    (b'\xff\xd8\xff', 'image/jpeg', 'jpg'),
+    (b'GIF87a', 'image/gif', 'gif'),
+    (b'GIF89a', 'image/gif', 'gif'),
+]
+MAX_BYTES = 10 * 1024 * 1024
+
+
+class InvalidDesignAsset(ValueError):
+    pass
+
+
+def decode_data_url(value):
+    header, sep, payload = value.partition(',')
+    if not sep or not header.endswith(';base64'):
+        raise InvalidDesignAsset('Design image must be a base64 data URL.')
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidDesignAsset('Design image data is not valid base64.')
+
+
+def sniff_image_type(data):
+    for signature, content_type, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type, extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp', 'webp'
+    raise InvalidDesignAsset('Design must be a PNG, JPEG, GIF or WebP image.')
+
+
+def write_design_file(storage, data):
+    if not data:
+        raise InvalidDesignAsset('Design image is empty.')
+    if len(data) > MAX_BYTES:
+        raise InvalidDesignAsset('Design image is too large.')
+    content_type, extension = sniff_image_type(data)
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'{digest[:2]}/{digest}.{extension}'
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(data))
+    return digest, name, content_type
+
+
+def move_inline_designs(apps, schema_editor):
+    """Move base64 data URLs stored on cart/order lines into the asset store."""
+    DesignAsset = apps.get_model('api', 'DesignAsset')
+    config = settings.DESIGN_ASSET_STORAGE
+    storage = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+    for model_name in ['CartItem', 'OrderItem']:
+        Model = apps.get_model('api', model_name)
+        rows = (
+            Model.objects.filter(design_image_url__startswith='data:')
+            .only('id', 'design_image_url')
+            .iterator(chunk_size=100)
+        )
+        for row in rows:
+            try:
+                data = decode_data_url(row.design_image_url)
+                digest, name, content_type = write_design_file(storage, data)
+            except InvalidDesignAsset:
+                # Leave unreadable legacy values untouched
+                continue
+
+            DesignAsset.objects.get_or_create(
+                sha256=digest,
+                defaults={'file': name, 'content_type': content_type, 'size': len(data)},
+            )
+            Model.objects.filter(pk=row.pk).update(design_asset_id=digest, design_image_url='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_designasset'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_inline_designs, migrations.RunPython.noop),
+    ]
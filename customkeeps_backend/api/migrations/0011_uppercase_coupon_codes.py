@@ -0,0 +1,47 @@
+from django.db import migrations
+
+CODE_MAX_LENGTH = 32
+
+
+def uppercase_codes(apps, schema_editor):
+    """
+    Normalize existing coupon codes so exact lookups on the unique index match.
+
+    A code whose uppercase form another coupon already owns can't take it;
+    it is renamed to ``<CODE>-DUP<id>`` and deactivated, and reported, so no
+    coupon is left unreachable under a lowercase code that still looks live.
+    """
+    Coupon = apps.get_model('api', 'Coupon')
+    existing = set(Coupon.objects.values_list('code', flat=True))
+    renamed = []
+
+    for coupon in Coupon.objects.order_by('id'):
+        normalized = coupon.code.strip().upper()
+        if normalized == coupon.code:
+            continue
+        existing.discard(coupon.code)
+        if normalized in existing:
+            original = coupon.code
+            suffix = f'-DUP{coupon.pk}'
+            normalized = normalized[:CODE_MAX_LENGTH - len(suffix)] + suffix
+            coupon.active = False
+            renamed.append((original, normalized))
+        existing.add(normalized)
+        coupon.code = normalized
+        coupon.save(update_fields=['code', 'active'])
+
+    if renamed:
+        print('\n  Coupons whose uppercase code was taken, renamed and deactivated:')
+        for original, normalized in renamed:
+            print(f'    {original!r} -> {normalized}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_user_created_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_codes, migrations.RunPython.noop),
+    ]
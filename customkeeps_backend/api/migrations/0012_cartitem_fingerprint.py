@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_uppercase_coupon_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, help_text='SHA-256 of the customization; identical lines are merged', max_length=64),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,57 @@
+import hashlib
+import json
+
+from django.db import migrations
+
+
+def customization_fingerprint(product_name, base_color, customization_text,
+                              design_asset_id, design_image_url):
+    # Frozen copy of api.cart.customization_fingerprint as of this migration
+    payload = json.dumps(
+        [
+            product_name or '',
+            base_color or '',
+            customization_text or '',
+            design_asset_id or '',
+            design_image_url or '',
+        ],
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """Fingerprint existing cart lines, merging duplicates into the oldest line."""
+    CartItem = apps.get_model('api', 'CartItem')
+
+    kept = {}
+    for item in CartItem.objects.order_by('created_at', 'id').iterator(chunk_size=500):
+        fingerprint = customization_fingerprint(
+            item.product_name,
+            item.base_color,
+            item.customization_text,
+            item.design_asset_id,
+            item.design_image_url,
+        )
+        key = (item.user_id, fingerprint)
+        if key in kept:
+            keeper = kept[key]
+            keeper.quantity += item.quantity
+            keeper.save(update_fields=['quantity'])
+            item.delete()
+            continue
+
+        item.fingerprint = fingerprint
+        item.save(update_fields=['fingerprint'])
+        kept[key] = item
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_cartitem_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_backfill_cartitem_fingerprints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('user', 'fingerprint'), name='cartitem_user_fingerprint_uniq'),
+        ),
+    ]
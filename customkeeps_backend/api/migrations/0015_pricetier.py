@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_cartitem_user_fingerprint_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceTier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_quantity', models.PositiveIntegerField()),
+                ('discount_percent', models.DecimalField(decimal_places=2, help_text='Percent, like 10 for 10%', max_digits=5)),
+                ('product', models.ForeignKey(blank=True, help_text='Leave empty for the default tiers', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_tiers', to='api.product')),
+            ],
+            options={
+                'ordering': ['product', 'min_quantity'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'min_quantity'), name='pricetier_product_min_qty_uniq'), models.UniqueConstraint(condition=models.Q(('product__isnull', True)), fields=('min_quantity',), name='pricetier_default_min_qty_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def add_default_tiers(apps, schema_editor):
+    """The two bulk tiers that used to be hard-coded: 5+ units 5% off, 10+ units 10% off."""
+    PriceTier = apps.get_model('api', 'PriceTier')
+    for min_quantity, percent in [(5, Decimal('5.00')), (10, Decimal('10.00'))]:
+        PriceTier.objects.get_or_create(
+            product=None,
+            min_quantity=min_quantity,
+            defaults={'discount_percent': percent},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_pricetier'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_default_tiers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_default_price_tiers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150)),
+                ('order_code', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('preparing', 'Preparing'), ('ready_for_delivery', 'Ready for Delivery'), ('in_transit', 'In Transit'), ('delivered', 'Delivered'), ('completed', 'Completed')], max_length=30)),
+                ('item_count', models.PositiveIntegerField(default=0, help_text='Number of order lines')),
+                ('unit_count', models.PositiveIntegerField(default=0, help_text='Total quantity across lines')),
+                ('first_item_name', models.CharField(blank=True, max_length=200)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('final_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('coupon_code', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('first_item_design_asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.designasset')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='api.order')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'order summaries',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at', 'id'], name='ordersummary_user_created_idx'), models.Index(fields=['-created_at', 'id'], name='ordersummary_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+def backfill_summaries(apps, schema_editor):
+    """Build the summary row of every existing order."""
+    Order = apps.get_model('api', 'Order')
+    OrderSummary = apps.get_model('api', 'OrderSummary')
+
+    orders = (
+        Order.objects.filter(summary__isnull=True)
+        .select_related('user')
+        .prefetch_related('items')
+        .order_by('id')
+        .iterator(chunk_size=500)
+    )
+    batch = []
+    for order in orders:
+        items = sorted(order.items.all(), key=lambda item: item.id)
+        first = items[0] if items else None
+        batch.append(OrderSummary(
+            order=order,
+            user_id=order.user_id,
+            username=order.user.username,
+            order_code=order.order_id,
+            status=order.status,
+            item_count=len(items),
+            unit_count=sum(item.quantity for item in items),
+            first_item_name=first.product_name if first else '',
+            first_item_design_asset_id=first.design_asset_id if first else None,
+            total_amount=order.total_amount,
+            discount_amount=order.discount_amount,
+            final_amount=order.final_amount,
+            coupon_code=order.coupon_code,
+            created_at=order.created_at,
+        ))
+        if len(batch) >= 500:
+            OrderSummary.objects.bulk_create(batch)
+            batch = []
+    OrderSummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_ordersummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_backfill_order_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrderRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('preparing', 'Preparing'), ('ready_for_delivery', 'Ready for Delivery'), ('in_transit', 'In Transit'), ('delivered', 'Delivered'), ('completed', 'Completed')], max_length=30)),
+                ('coupon_code', models.CharField(blank=True, default='', max_length=50)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('final_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'status', 'coupon_code'), name='dailyorderrollup_key_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('product_name', models.CharField(max_length=200)),
+                ('base_color', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('preparing', 'Preparing'), ('ready_for_delivery', 'Ready for Delivery'), ('in_transit', 'In Transit'), ('delivered', 'Delivered'), ('completed', 'Completed')], max_length=30)),
+                ('coupon_code', models.CharField(blank=True, default='', max_length=50)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product_name', 'base_color', 'status', 'coupon_code'), name='dailysalesrollup_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.db import migrations
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    Build the daily rollups of every existing order. A frozen copy of what
+    api.reports.rebuild_sales_rollups did for all dates when this migration
+    was written.
+    """
+    Order = apps.get_model('api', 'Order')
+    OrderItem = apps.get_model('api', 'OrderItem')
+    DailyOrderRollup = apps.get_model('api', 'DailyOrderRollup')
+    DailySalesRollup = apps.get_model('api', 'DailySalesRollup')
+
+    DailyOrderRollup.objects.all().delete()
+    DailySalesRollup.objects.all().delete()
+
+    orders = (
+        Order.objects.annotate(date=TruncDate('created_at'), coupon=Coalesce('coupon_code', Value('')))
+        .values('date', 'status', 'coupon')
+        .annotate(
+            order_count=Count('id'),
+            total=Sum('total_amount'),
+            discount=Sum('discount_amount'),
+            final=Sum('final_amount'),
+        )
+        .order_by()
+    )
+    DailyOrderRollup.objects.bulk_create(
+        [
+            DailyOrderRollup(
+                date=row['date'],
+                status=row['status'],
+                coupon_code=row['coupon'],
+                order_count=row['order_count'],
+                total_amount=row['total'],
+                discount_amount=row['discount'],
+                final_amount=row['final'],
+            )
+            for row in orders.iterator()
+        ],
+        batch_size=1000,
+    )
+
+    lines = (
+        OrderItem.objects.annotate(
+            date=TruncDate('order__created_at'),
+            status=F('order__status'),
+            coupon=Coalesce('order__coupon_code', Value('')),
+        )
+        .values('date', 'product_name', 'base_color', 'status', 'coupon')
+        .annotate(
+            order_count=Count('order', distinct=True),
+            units=Sum('quantity'),
+            revenue=Sum(F('price') * F('quantity'), output_field=MONEY),
+        )
+        .order_by()
+    )
+    DailySalesRollup.objects.bulk_create(
+        [
+            DailySalesRollup(
+                date=row['date'],
+                product_name=row['product_name'],
+                base_color=row['base_color'],
+                status=row['status'],
+                coupon_code=row['coupon'],
+                order_count=row['order_count'],
+                units=row['units'],
+                revenue=row['revenue'],
+            )
+            for row in lines.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_orderstatustransition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='product',
+            field=models.ForeignKey(blank=True, help_text="Empty once the product is deleted; such lines can't be checked out", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cart_items', to='api.product'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='api.product'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['product', 'order'], name='orderitem_product_order_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import Min
+
+
+def backfill_line_products(apps, schema_editor):
+    """Point existing cart and order lines at the product with their name."""
+    Product = apps.get_model('api', 'Product')
+    CartItem = apps.get_model('api', 'CartItem')
+    OrderItem = apps.get_model('api', 'OrderItem')
+
+    # If names were ever duplicated, the oldest product wins
+    products = Product.objects.values('name').annotate(first_id=Min('id'))
+    for row in products:
+        for model in (CartItem, OrderItem):
+            model.objects.filter(product__isnull=True, product_name=row['name']).update(product_id=row['first_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_product_references'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_line_products, migrations.RunPython.noop),
+    ]
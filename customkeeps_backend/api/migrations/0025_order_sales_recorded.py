@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_backfill_line_products'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyRollupDay',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+        # Existing orders are already in the rollups (0020); new ones aren't
+        migrations.AddField(
+            model_name='order',
+            name='sales_recorded',
+            field=models.BooleanField(default=True),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='sales_recorded',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('sales_recorded', False)), fields=['id'], name='order_sales_pending_idx'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .assets import get_design_asset_storage
+from .cart import customization_fingerprint
+
 
 class Product(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image_url = models.URLField(blank=True, null=True)
@@ -17,19 +20,108 @@ class Product(models.Model):
         return self.name
 
 
+class PriceTier(models.Model):
+    """
+    Bulk discount for buying at least ``min_quantity`` units of a product.
+    Tiers without a product are the defaults for products that have none.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='price_tiers',
+        help_text="Leave empty for the default tiers",
+    )
+    min_quantity = models.PositiveIntegerField()
+    discount_percent = models.DecimalField(max_digits=5, decimal_places=2, help_text="Percent, like 10 for 10%")
+
+    class Meta:
+        ordering = ['product', 'min_quantity']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'min_quantity'], name='pricetier_product_min_qty_uniq'),
+            models.UniqueConstraint(
+                fields=['min_quantity'],
+                condition=models.Q(product__isnull=True),
+                name='pricetier_default_min_qty_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.product.name if self.product_id else "Default"
+        return f"{scope}: {self.min_quantity}+ units, {self.discount_percent}% off"
+
+
+def design_asset_storage():
+    return get_design_asset_storage()
+
+
+class DesignAsset(models.Model):
+    """An uploaded design image, addressed by the SHA-256 of its bytes."""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file = models.FileField(storage=design_asset_storage, max_length=255)
+    content_type = models.CharField(max_length=50)
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.content_type})"
+
+
 class CartItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cart_items')
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='cart_items',
+        help_text="Empty once the product is deleted; such lines can't be checked out",
+    )
     product_name = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.IntegerField(default=1)
     base_color = models.CharField(max_length=50, default='White')
     customization_text = models.TextField(blank=True, null=True)
-    design_image_url = models.TextField(default='')
+    design_image_url = models.TextField(default='', blank=True)
+    design_asset = models.ForeignKey(
+        DesignAsset,
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+        related_name='cart_items',
+    )
+    fingerprint = models.CharField(
+        max_length=64,
+        editable=False,
+        help_text="SHA-256 of the customization; identical lines are merged",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', 'id'], name='cartitem_user_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'fingerprint'], name='cartitem_user_fingerprint_uniq'),
+        ]
+
+    def compute_fingerprint(self):
+        return customization_fingerprint(
+            self.product_name,
+            self.base_color,
+            self.customization_text,
+            self.design_asset_id,
+            self.design_image_url,
+        )
+
+    def save(self, *args, **kwargs):
+        self.fingerprint = self.compute_fingerprint()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'fingerprint'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} - {self.product_name}"
@@ -52,11 +144,25 @@ class Order(models.Model):
     coupon_code = models.CharField(max_length=50, blank=True, null=True)
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='preparing')
     payment_intent_id = models.CharField(max_length=200, blank=True, null=True)
+    # Counted in the daily sales rollups yet (api/reports.py)
+    sales_recorded = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', 'id'], name='order_user_created_idx'),
+            # Exports and reports by date range, with or without a status filter
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # The few orders still to be folded into the rollups
+            models.Index(
+                fields=['id'],
+                condition=models.Q(sales_recorded=False),
+                name='order_sales_pending_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id} - {self.user.username}"
@@ -64,17 +170,158 @@ class Order(models.Model):
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='order_items',
+    )
+    # Name and price as ordered; the product may change or go away later
     product_name = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.IntegerField()
     base_color = models.CharField(max_length=50, default='White')
     customization_text = models.TextField(blank=True, null=True)
-    design_image_url = models.TextField(default='')
+    design_image_url = models.TextField(default='', blank=True)
+    design_asset = models.ForeignKey(
+        DesignAsset,
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+        related_name='order_items',
+    )
+
+    class Meta:
+        indexes = [
+            # Per-product sales: the product's lines with their orders
+            models.Index(fields=['product', 'order'], name='orderitem_product_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product_name} x {self.quantity}"
 
 
+class OrderStatusTransition(models.Model):
+    """Append-only log of order status changes made through api/fulfillment.py."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_transitions')
+    from_status = models.CharField(max_length=30, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=30, choices=Order.STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    note = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['order', '-created_at'], name='ordertransition_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+class OrderSummary(models.Model):
+    """
+    Denormalized list row for an order: totals, status and a preview of its
+    items, so order history and the admin changelist read one table with no
+    item or user join. Maintained by api/summaries.py.
+    """
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='summary')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='order_summaries')
+    username = models.CharField(max_length=150)
+    order_code = models.CharField(max_length=50)
+    status = models.CharField(max_length=30, choices=Order.STATUS_CHOICES)
+    item_count = models.PositiveIntegerField(default=0, help_text="Number of order lines")
+    unit_count = models.PositiveIntegerField(default=0, help_text="Total quantity across lines")
+    first_item_name = models.CharField(max_length=200, blank=True)
+    first_item_design_asset = models.ForeignKey(
+        DesignAsset,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+    )
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    final_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    coupon_code = models.CharField(max_length=50, blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'order summaries'
+        indexes = [
+            models.Index(fields=['user', '-created_at', 'id'], name='ordersummary_user_created_idx'),
+            models.Index(fields=['-created_at', 'id'], name='ordersummary_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_code} - {self.username}"
+
+
+class DailyOrderRollup(models.Model):
+    """Order totals per day, status and coupon. Maintained by api/reports.py."""
+    date = models.DateField()
+    status = models.CharField(max_length=30, choices=Order.STATUS_CHOICES)
+    coupon_code = models.CharField(max_length=50, blank=True, default='')
+    order_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    final_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status', 'coupon_code'], name='dailyorderrollup_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status} {self.coupon_code or '-'}: {self.order_count} orders"
+
+
+class DailySalesRollup(models.Model):
+    """
+    Units and line revenue (after bulk discount, before coupons) per day,
+    product, base color, order status and coupon. Maintained by api/reports.py.
+    """
+    date = models.DateField()
+    product_name = models.CharField(max_length=200)
+    base_color = models.CharField(max_length=50)
+    status = models.CharField(max_length=30, choices=Order.STATUS_CHOICES)
+    coupon_code = models.CharField(max_length=50, blank=True, default='')
+    order_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'product_name', 'base_color', 'status', 'coupon_code'],
+                name='dailysalesrollup_key_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.product_name} ({self.base_color}): {self.units} units"
+
+
+class DirtyRollupDay(models.Model):
+    """A local date whose rollups must be recomputed. Maintained by api/reports.py."""
+    date = models.DateField(primary_key=True)
+
+    def __str__(self):
+        return str(self.date)
+
+
 class Coupon(models.Model):
     code = models.CharField(max_length=32, unique=True)
     discount_percent = models.DecimalField(max_digits=5, decimal_places=2, help_text="Percent, like 10 for 10%")
@@ -82,5 +329,10 @@ class Coupon(models.Model):
     valid_to = models.DateTimeField()
     active = models.BooleanField(default=True)
 
+    def save(self, *args, **kwargs):
+        # Codes are stored uppercase so lookups can use the unique index
+        self.code = self.code.strip().upper()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.code} ({self.discount_percent}%)"
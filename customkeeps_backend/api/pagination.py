@@ -0,0 +1,107 @@
+from rest_framework.pagination import CursorPagination
+
+
+def reverse_ordering(ordering):
+    """``("-created_at", "id")`` -> ``("created_at", "-id")``"""
+    return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (-created_at, id).
+
+    Each page is an index range scan on (user, created_at, id), so the cost of
+    a page does not grow with the size of a customer's history, and pages stay
+    stable while new rows are inserted.
+    """
+    ordering = ("-created_at", "id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.set_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        ``paginate_queryset`` for async views (``request`` is a DRF Request
+        wrapping the Django one): the same cursors and links, with the page
+        read through the async ORM.
+        """
+        window = self.page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.set_page([row async for row in window])
+
+    def page_window(self, queryset, request, view=None):
+        """
+        Decode the cursor and return the slice of ``queryset`` holding the
+        page plus one row, which tells whether another page follows.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+        self.offset, self.reverse, self.current_position = offset, reverse, current_position
+
+        if reverse:
+            queryset = queryset.order_by(*reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            order_attr = order.lstrip("-")
+            lookup = "lt" if self.cursor.reverse != order.startswith("-") else "gt"
+            queryset = queryset.filter(**{f"{order_attr}__{lookup}": current_position})
+
+        return queryset[offset:offset + self.page_size + 1]
+
+    def set_page(self, results):
+        """Keep the page out of the rows read by ``page_window`` and set the links."""
+        offset, reverse, current_position = self.offset, self.reverse, self.current_position
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class CartCursorPagination(CreatedAtCursorPagination):
+    # A cart is normally shown in full, so use one generous page
+    page_size = 100
@@ -0,0 +1,199 @@
+"""
+Stripe calls for checkout.
+
+All PaymentIntent traffic goes through one process-wide ``StripeClient``
+backed by a pooled ``requests`` session, so TLS connections to Stripe are
+reused, and every call has explicit connect/read timeouts and a bounded
+number of network retries (with the idempotency key stripe-python sends on
+retries).
+
+Calls run on a small dedicated thread pool that doubles as a bulkhead: at
+most ``STRIPE_MAX_CONCURRENCY`` calls are in flight and
+``STRIPE_MAX_QUEUED`` more may wait. Past that, or when a call overruns
+``STRIPE_CALL_DEADLINE``, ``PaymentsUnavailable`` is raised right away and
+the view answers 503, so a slow Stripe ties up a bounded number of web
+workers instead of all of them.
+
+The async views (ASGI mode) call the ``*_async`` Stripe methods instead,
+over httpx on the worker's event loop: a call waiting on Stripe holds no
+thread at all. ``STRIPE_ASYNC_MAX_CONCURRENCY`` caps them per process, and
+the loop's connections are closed when the server shuts the app down.
+
+Point ``STRIPE_API_BASE`` at ``python -m api.stripe_stub`` to run offline.
+"""
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+class PaymentsUnavailable(Exception):
+    """Stripe is too slow or too busy to take this call right now."""
+
+
+def _stripe_client(http_client):
+    base_addresses = {"api": settings.STRIPE_API_BASE} if settings.STRIPE_API_BASE else None
+    return stripe.StripeClient(
+        settings.STRIPE_SECRET_KEY,
+        http_client=http_client,
+        max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+        base_addresses=base_addresses,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_stripe_client():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=settings.STRIPE_MAX_CONCURRENCY
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return _stripe_client(
+        stripe.RequestsClient(
+            session=session,
+            timeout=(settings.STRIPE_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT),
+        )
+    )
+
+
+# Event loop -> (StripeClient, its HTTPXClient)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_stripe_client():
+    """
+    Client for the ``*_async`` Stripe methods. An httpx connection pool
+    belongs to one event loop, so each loop gets its own client; close it
+    with ``aclose_async_stripe_client`` before the loop ends.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        import httpx
+
+        http_client = stripe.HTTPXClient(
+            timeout=httpx.Timeout(
+                settings.STRIPE_READ_TIMEOUT, connect=settings.STRIPE_CONNECT_TIMEOUT
+            )
+        )
+        entry = _async_clients[loop] = (_stripe_client(http_client), http_client)
+    return entry[0]
+
+
+async def aclose_async_stripe_client():
+    """
+    Close the running loop's Stripe client and its connections, if it has
+    one. asgi.py calls this on lifespan shutdown.
+    """
+    entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[1].close_async()
+
+
+@lru_cache(maxsize=None)
+def _get_pool():
+    executor = ThreadPoolExecutor(
+        max_workers=settings.STRIPE_MAX_CONCURRENCY, thread_name_prefix="stripe"
+    )
+    slots = threading.BoundedSemaphore(
+        settings.STRIPE_MAX_CONCURRENCY + settings.STRIPE_MAX_QUEUED
+    )
+    return executor, slots
+
+
+def call_stripe(func, *args, **kwargs):
+    """Run ``func`` on the Stripe pool, failing fast when it is saturated."""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PaymentsUnavailable("Payment service is busy, please try again.")
+    try:
+        future = executor.submit(func, *args, **kwargs)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is held until the call really finishes, even if we stop waiting
+    future.add_done_callback(lambda _: slots.release())
+
+    try:
+        return future.result(timeout=settings.STRIPE_CALL_DEADLINE)
+    except FutureTimeout:
+        raise PaymentsUnavailable("Payment service timed out, please try again.")
+    except stripe.APIConnectionError:
+        raise PaymentsUnavailable("Could not reach the payment service, please try again.")
+
+
+@lru_cache(maxsize=None)
+def _get_async_slots():
+    return threading.BoundedSemaphore(settings.STRIPE_ASYNC_MAX_CONCURRENCY)
+
+
+async def acall_stripe(func, *args, **kwargs):
+    """
+    ``call_stripe`` for async views: await the Stripe ``*_async`` method
+    ``func`` on the running loop. A waiting call holds no thread, so the cap
+    (``STRIPE_ASYNC_MAX_CONCURRENCY``) is higher and nothing queues.
+    """
+    slots = _get_async_slots()
+    if not slots.acquire(blocking=False):
+        raise PaymentsUnavailable("Payment service is busy, please try again.")
+    try:
+        return await asyncio.wait_for(func(*args, **kwargs), settings.STRIPE_CALL_DEADLINE)
+    except asyncio.TimeoutError:
+        raise PaymentsUnavailable("Payment service timed out, please try again.")
+    except stripe.APIConnectionError:
+        raise PaymentsUnavailable("Could not reach the payment service, please try again.")
+    finally:
+        slots.release()
+
+
+def _create_params(amount, metadata, currency):
+    return {
+        "amount": amount,
+        "currency": currency,
+        "automatic_payment_methods": {"enabled": True},
+        "metadata": metadata,
+    }
+
+
+def create_payment_intent(amount, metadata, idempotency_key, currency="php"):
+    client = get_stripe_client()
+    return call_stripe(
+        client.v1.payment_intents.create,
+        params=_create_params(amount, metadata, currency),
+        options={"idempotency_key": idempotency_key},
+    )
+
+
+def update_payment_intent(intent_id, amount, metadata):
+    client = get_stripe_client()
+    return call_stripe(
+        client.v1.payment_intents.update,
+        intent_id,
+        params={"amount": amount, "metadata": metadata},
+    )
+
+
+async def acreate_payment_intent(amount, metadata, idempotency_key, currency="php"):
+    client = get_async_stripe_client()
+    return await acall_stripe(
+        client.v1.payment_intents.create_async,
+        params=_create_params(amount, metadata, currency),
+        options={"idempotency_key": idempotency_key},
+    )
+
+
+async def aupdate_payment_intent(intent_id, amount, metadata):
+    client = get_async_stripe_client()
+    return await acall_stripe(
+        client.v1.payment_intents.update_async,
+        intent_id,
+        params={"amount": amount, "metadata": metadata},
+    )
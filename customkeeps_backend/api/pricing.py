@@ -0,0 +1,268 @@
+"""
+Cart pricing.
+
+Bulk discounts come from ``PriceTier`` rows: tiers attached to a product
+apply to that product, tiers without a product are the defaults for every
+other product. The tier table (with catalog prices and product ids) is
+cached and dropped by the signals in signals.py whenever tiers or products
+change; cart validation resolves products against it too, so pricing and
+validating a cart costs no catalog queries while it is warm. It lives in
+the tiered cache (cache.py), so one worker builds it for all of them.
+
+Quotes are computed in integer centavos. A cart is priced column-wise:
+prices, quantities and tier rates are gathered into parallel lists once and
+the line totals are computed over them, with one rounding step per line
+(bulk discount) and one for the cart (coupon). ``quote_carts`` prices many
+carts against a single tier table and coupon lookup.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import NamedTuple
+
+from django.conf import settings
+from .cache import TieredCache
+from .coupons import normalize_code, resolve_coupon
+
+pricing_cache = TieredCache("pricing")
+
+CENT = Decimal("0.01")
+
+
+def to_cents(amount) -> int:
+    return int((Decimal(amount) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+def to_basis_points(percent) -> int:
+    return int((Decimal(percent) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def apply_basis_points(cents: int, basis_points: int) -> int:
+    """``cents * basis_points / 10000``, rounded half up."""
+    return (cents * basis_points + 5000) // 10000
+
+
+@dataclass(frozen=True)
+class TierSchedule:
+    """Ascending minimum quantities and the discount (basis points) for each."""
+    min_quantities: tuple = ()
+    basis_points: tuple = ()
+
+    def rate_for(self, quantity: int):
+        """(min_quantity, basis_points) of the best tier for ``quantity``."""
+        index = bisect_right(self.min_quantities, quantity) - 1
+        if index < 0:
+            return 0, 0
+        return self.min_quantities[index], self.basis_points[index]
+
+
+@dataclass(frozen=True)
+class PriceTable:
+    default_tiers: TierSchedule
+    # product name -> TierSchedule, for products with their own tiers
+    product_tiers: dict
+    # product name -> catalog price in centavos
+    product_prices: dict
+    # product name -> product id (the oldest product, should names repeat)
+    product_ids: dict = field(default_factory=dict)
+    # product id -> catalog price in centavos
+    id_prices: dict = field(default_factory=dict)
+
+    def tiers_for(self, product_name) -> TierSchedule:
+        return self.product_tiers.get(product_name, self.default_tiers)
+
+    def resolve(self, product_name):
+        """(product id, price in centavos) of the product named ``product_name``, or None."""
+        product_id = self.product_ids.get(product_name)
+        if product_id is None:
+            return None
+        return product_id, self.id_prices[product_id]
+
+
+def build_price_table() -> PriceTable:
+    from .models import PriceTier, Product
+
+    rows = {}
+    for product_name, min_quantity, percent in (
+        PriceTier.objects.order_by("min_quantity")
+        .values_list("product__name", "min_quantity", "discount_percent")
+    ):
+        rows.setdefault(product_name, []).append((min_quantity, to_basis_points(percent)))
+
+    schedules = {
+        name: TierSchedule(tuple(q for q, _ in tiers), tuple(bp for _, bp in tiers))
+        for name, tiers in rows.items()
+    }
+    products = list(Product.objects.order_by("-id").values_list("id", "name", "price"))
+    return PriceTable(
+        default_tiers=schedules.pop(None, TierSchedule()),
+        product_tiers=schedules,
+        # Newest first, so the oldest product of a name is the one kept
+        product_prices={name: to_cents(price) for _, name, price in products},
+        product_ids={name: product_id for product_id, name, _ in products},
+        id_prices={product_id: to_cents(price) for product_id, _, price in products},
+    )
+
+
+def get_price_table() -> PriceTable:
+    return pricing_cache.get_or_set(
+        "table", build_price_table, settings.PRICING_CACHE_TIMEOUT
+    )
+
+
+def invalidate_price_table():
+    pricing_cache.invalidate()
+
+
+class CatalogLine(NamedTuple):
+    """A line priced at the current catalog price (quotes without a cart)."""
+    product_name: str
+    quantity: int
+    price: Decimal
+
+
+@dataclass(frozen=True)
+class LineQuote:
+    item: object
+    product_name: str
+    quantity: int
+    unit_price_cents: int
+    gross_cents: int
+    tier_min_quantity: int
+    bulk_discount_bp: int
+    bulk_discount_cents: int
+
+    @property
+    def net_cents(self) -> int:
+        return self.gross_cents - self.bulk_discount_cents
+
+    @property
+    def unit_price_after_bulk(self) -> Decimal:
+        """Effective per-unit price after the bulk discount, as stored on order lines."""
+        return (Decimal(self.net_cents) / 100 / self.quantity).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def as_dict(self):
+        return {
+            "product_name": self.product_name,
+            "quantity": self.quantity,
+            "unit_price": str(from_cents(self.unit_price_cents)),
+            "line_subtotal": str(from_cents(self.gross_cents)),
+            "tier_min_quantity": self.tier_min_quantity,
+            "bulk_discount_percent": str(Decimal(self.bulk_discount_bp) / 100),
+            "bulk_discount": str(from_cents(self.bulk_discount_cents)),
+            "line_total": str(from_cents(self.net_cents)),
+        }
+
+
+@dataclass
+class Quote:
+    lines: list = field(default_factory=list)
+    gross_cents: int = 0
+    bulk_discount_cents: int = 0
+    coupon: object = None
+    coupon_discount_cents: int = 0
+
+    @property
+    def subtotal_after_bulk_cents(self) -> int:
+        return self.gross_cents - self.bulk_discount_cents
+
+    @property
+    def amount_cents(self) -> int:
+        return self.subtotal_after_bulk_cents - self.coupon_discount_cents
+
+    @property
+    def raw_subtotal(self) -> Decimal:
+        return from_cents(self.gross_cents)
+
+    @property
+    def bulk_discount(self) -> Decimal:
+        return from_cents(self.bulk_discount_cents)
+
+    @property
+    def subtotal_after_bulk(self) -> Decimal:
+        return from_cents(self.subtotal_after_bulk_cents)
+
+    @property
+    def coupon_discount(self) -> Decimal:
+        return from_cents(self.coupon_discount_cents)
+
+    @property
+    def total_discount(self) -> Decimal:
+        return from_cents(self.bulk_discount_cents + self.coupon_discount_cents)
+
+    @property
+    def final_amount(self) -> Decimal:
+        return from_cents(self.amount_cents)
+
+    def as_dict(self):
+        return {
+            "lines": [line.as_dict() for line in self.lines],
+            "subtotal": str(self.raw_subtotal),
+            "bulk_discount": str(self.bulk_discount),
+            "subtotal_after_bulk": str(self.subtotal_after_bulk),
+            "coupon_code": self.coupon.code if self.coupon else "",
+            "coupon_discount": str(self.coupon_discount),
+            "total_discount": str(self.total_discount),
+            "final_amount": str(self.final_amount),
+        }
+
+
+def _price_lines(items, table):
+    """Price one cart's lines; ``items`` have product_name, price and quantity."""
+    items = list(items)
+    names = [item.product_name for item in items]
+    quantities = [item.quantity for item in items]
+    unit_cents = [to_cents(item.price) for item in items]
+    tiers = [table.tiers_for(name).rate_for(qty) for name, qty in zip(names, quantities)]
+
+    gross = [price * qty for price, qty in zip(unit_cents, quantities)]
+    discounts = [apply_basis_points(g, bp) for g, (_, bp) in zip(gross, tiers)]
+
+    return [
+        LineQuote(item, name, qty, price, g, min_qty, bp, d)
+        for item, name, qty, price, g, (min_qty, bp), d
+        in zip(items, names, quantities, unit_cents, gross, tiers, discounts)
+    ]
+
+
+def _quote(items, coupon, table) -> Quote:
+    lines = _price_lines(items, table)
+    quote = Quote(
+        lines=lines,
+        gross_cents=sum(line.gross_cents for line in lines),
+        bulk_discount_cents=sum(line.bulk_discount_cents for line in lines),
+        coupon=coupon,
+    )
+    if coupon:
+        quote.coupon_discount_cents = apply_basis_points(
+            quote.subtotal_after_bulk_cents, to_basis_points(coupon.discount_percent)
+        )
+    return quote
+
+
+def quote_cart(items, coupon_code=None, table=None) -> Quote:
+    """
+    Price cart lines: the product's bulk tier per line, then the coupon on
+    the bulk-discounted subtotal.
+    """
+    return _quote(items, resolve_coupon(coupon_code), table or get_price_table())
+
+
+def quote_carts(carts, table=None):
+    """
+    Price many carts in one call. ``carts`` is an iterable of
+    (items, coupon_code) pairs; each distinct coupon is resolved once.
+    """
+    table = table or get_price_table()
+    coupons = {}
+    quotes = []
+    for items, coupon_code in carts:
+        code = normalize_code(coupon_code)
+        if code not in coupons:
+            coupons[code] = resolve_coupon(code)
+        quotes.append(_quote(items, coupons[code], table))
+    return quotes
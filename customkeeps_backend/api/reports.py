@@ -0,0 +1,336 @@
+"""
+Sales reporting from pre-aggregated daily rollups.
+
+Two tables are kept (dates are local, ``settings.TIME_ZONE``):
+
+* ``DailyOrderRollup``: orders and order totals per date, status and coupon.
+* ``DailySalesRollup``: orders, units and line revenue per date, product,
+  base color, status and coupon.
+
+They are maintained off the write paths. Checkout only leaves its new order
+pending (``Order.sales_recorded`` False), so concurrent checkouts never
+queue on the same rollup rows. Any other change to orders (status changes,
+edits, deletes) only marks its days dirty (``mark_days_dirty``).
+``flush_sales_rollups`` adds the pending orders in one batch and recomputes
+only the dirty days from the source tables, in a constant number of
+queries. It runs off the request path: ``manage.py rebuild_sales_rollups
+--pending`` from cron, or the "Update rollups" button in the admin.
+``manage.py rebuild_sales_rollups`` recomputes any date range. Reports only
+ever read the small rollup tables, so they lag behind orders by at most one
+flush.
+
+Each order is counted once. Adding pending orders claims them
+(``sales_recorded`` -> True) in the same transaction as the increments,
+and a recompute claims the pending orders of its dates before counting the
+claimed ones, so an order committed meanwhile is left for the next flush.
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+ORDER_DIMENSIONS = ["date", "status", "coupon_code"]
+ORDER_MEASURES = ["order_count", "total_amount", "discount_amount", "final_amount"]
+SALES_DIMENSIONS = ["date", "product_name", "base_color", "status", "coupon_code"]
+SALES_MEASURES = ["order_count", "units", "revenue"]
+
+REPORTS = {
+    "orders": ("DailyOrderRollup", ORDER_DIMENSIONS, ORDER_MEASURES),
+    "products": ("DailySalesRollup", SALES_DIMENSIONS, SALES_MEASURES),
+}
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENT = Decimal("0.01")
+
+
+def order_contribution(order, items):
+    """Rollup deltas of one order: ({order key: measures}, {sales key: measures})."""
+    day = timezone.localdate(order.created_at)
+    coupon = order.coupon_code or ""
+    order_deltas = {
+        (day, order.status, coupon): {
+            "order_count": 1,
+            "total_amount": order.total_amount,
+            "discount_amount": order.discount_amount,
+            "final_amount": order.final_amount,
+        }
+    }
+    sales_deltas = {}
+    for item in items:
+        key = (day, item.product_name, item.base_color, order.status, coupon)
+        measures = sales_deltas.setdefault(
+            key, {"order_count": 1, "units": 0, "revenue": Decimal("0.00")}
+        )
+        measures["units"] += item.quantity
+        measures["revenue"] += item.price * item.quantity
+    return order_deltas, sales_deltas
+
+
+def _key_filter(dimensions, keys):
+    return reduce(or_, (Q(**dict(zip(dimensions, key))) for key in keys))
+
+
+def _increment(model, dimensions, measures, deltas):
+    """
+    Add ``deltas`` ({key: {measure: amount}}) to the rollup rows: insert the
+    missing rows, read them back and update them with one UPDATE. Three
+    queries however many keys there are.
+    """
+    if not deltas:
+        return
+
+    # Existing rows (possibly created by a concurrent flush) are left
+    # alone by the unique constraint
+    model.objects.bulk_create(
+        [model(**dict(zip(dimensions, key))) for key in deltas],
+        ignore_conflicts=True,
+    )
+    rows = {
+        tuple(getattr(row, name) for name in dimensions): row
+        for row in model.objects.filter(_key_filter(dimensions, deltas))
+    }
+    for key, amounts in deltas.items():
+        row = rows[key]
+        for name, amount in amounts.items():
+            setattr(row, name, F(name) + amount)
+    model.objects.bulk_update([rows[key] for key in deltas], measures)
+
+
+def _add_to_rollups(orders_with_items):
+    from .models import DailyOrderRollup, DailySalesRollup
+
+    order_deltas, sales_deltas = {}, {}
+    for order, items in orders_with_items:
+        for totals, deltas in zip((order_deltas, sales_deltas), order_contribution(order, items)):
+            for key, amounts in deltas.items():
+                measures = totals.setdefault(key, dict.fromkeys(amounts, 0))
+                for name, amount in amounts.items():
+                    measures[name] += amount
+    _increment(DailyOrderRollup, ORDER_DIMENSIONS, ORDER_MEASURES, order_deltas)
+    _increment(DailySalesRollup, SALES_DIMENSIONS, SALES_MEASURES, sales_deltas)
+
+
+def mark_days_dirty(days):
+    """Have the next flush recompute the rollups of each local date in ``days``."""
+    from .models import DirtyRollupDay
+
+    DirtyRollupDay.objects.bulk_create(
+        [DirtyRollupDay(date=day) for day in set(days)], ignore_conflicts=True
+    )
+
+
+def mark_order_day_dirty(order):
+    mark_days_dirty([timezone.localdate(order.created_at)])
+
+
+@transaction.atomic
+def add_pending_orders():
+    """Add every order not yet in the rollups. Returns how many were added."""
+    from .models import Order, OrderItem
+
+    orders = list(
+        Order.objects.select_for_update(skip_locked=True).filter(sales_recorded=False)
+    )
+    if not orders:
+        return 0
+    items = {}
+    for item in OrderItem.objects.filter(order__in=orders):
+        items.setdefault(item.order_id, []).append(item)
+    Order.objects.filter(pk__in=[order.pk for order in orders]).update(sales_recorded=True)
+    _add_to_rollups([(order, items.get(order.pk, [])) for order in orders])
+    return len(orders)
+
+
+@transaction.atomic
+def refresh_dirty_days():
+    """Recompute the rollups of the dirty days. Returns those days."""
+    from .models import DirtyRollupDay
+
+    # Cleared before the recompute: a change committed after this marks
+    # its day again (waiting for this transaction) instead of being lost
+    days = sorted(DirtyRollupDay.objects.select_for_update().values_list("date", flat=True))
+    if not days:
+        return days
+    DirtyRollupDay.objects.filter(date__in=days).delete()
+    _rebuild(date_runs(days))
+    return days
+
+
+def flush_sales_rollups():
+    """
+    Bring the rollups up to date: add pending orders, recompute dirty days.
+    Returns (orders added, days recomputed).
+    """
+    return add_pending_orders(), len(refresh_dirty_days())
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def created_between(start=None, end=None, field="created_at"):
+    """
+    Filter kwargs for ``field`` falling on local dates ``start``..``end``
+    (inclusive; open-ended when None), as a range so indexes apply.
+    """
+    lookups = {}
+    if start is not None:
+        lookups[f"{field}__gte"] = local_midnight(start)
+    if end is not None:
+        lookups[f"{field}__lt"] = local_midnight(end + timedelta(days=1))
+    return lookups
+
+
+def date_runs(days):
+    """The sorted dates ``days`` as (first, last) runs of consecutive dates."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def _in_runs(runs, to_filter):
+    return reduce(or_, (Q(**to_filter(start, end)) for start, end in runs))
+
+
+def _rollup_dates(start, end):
+    lookups = {}
+    if start is not None:
+        lookups["date__gte"] = start
+    if end is not None:
+        lookups["date__lte"] = end
+    return lookups
+
+
+def rebuild_sales_rollups(start=None, end=None):
+    """
+    Recompute the rollups for local dates ``start``..``end`` (inclusive;
+    open-ended when None) from the order tables. Returns the number of
+    (order, sales) rollup rows written.
+    """
+    return _rebuild([(start, end)])
+
+
+@transaction.atomic
+def _rebuild(runs):
+    """
+    Recompute the rollups of the local dates in ``runs`` ((start, end) pairs,
+    as for ``rebuild_sales_rollups``) with one query per step, however many
+    runs there are.
+    """
+    from .models import DailyOrderRollup, DailySalesRollup, Order, OrderItem
+
+    created = _in_runs(runs, created_between)
+    order_created = _in_runs(
+        runs, lambda start, end: created_between(start, end, "order__created_at")
+    )
+
+    # Claim the pending orders first and count only claimed ones: an order
+    # committed meanwhile stays pending and is added later, not twice
+    Order.objects.filter(created, sales_recorded=False).update(sales_recorded=True)
+    rollup_dates = _in_runs(runs, _rollup_dates)
+    DailyOrderRollup.objects.filter(rollup_dates).delete()
+    DailySalesRollup.objects.filter(rollup_dates).delete()
+
+    orders = (
+        Order.objects.filter(created, sales_recorded=True)
+        .annotate(date=TruncDate("created_at"), coupon=Coalesce("coupon_code", Value("")))
+        .values("date", "status", "coupon")
+        .annotate(
+            order_count=Count("id"),
+            total=Sum("total_amount"),
+            discount=Sum("discount_amount"),
+            final=Sum("final_amount"),
+        )
+        .order_by()
+    )
+    order_rows = DailyOrderRollup.objects.bulk_create(
+        [
+            DailyOrderRollup(
+                date=row["date"],
+                status=row["status"],
+                coupon_code=row["coupon"],
+                order_count=row["order_count"],
+                total_amount=row["total"],
+                discount_amount=row["discount"],
+                final_amount=row["final"],
+            )
+            for row in orders.iterator()
+        ],
+        batch_size=1000,
+    )
+
+    lines = (
+        OrderItem.objects.filter(order_created, order__sales_recorded=True)
+        .annotate(
+            date=TruncDate("order__created_at"),
+            status=F("order__status"),
+            coupon=Coalesce("order__coupon_code", Value("")),
+        )
+        .values("date", "product_name", "base_color", "status", "coupon")
+        .annotate(
+            order_count=Count("order", distinct=True),
+            units=Sum("quantity"),
+            revenue=Sum(F("price") * F("quantity"), output_field=MONEY),
+        )
+        .order_by()
+    )
+    sales_rows = DailySalesRollup.objects.bulk_create(
+        [
+            DailySalesRollup(
+                date=row["date"],
+                product_name=row["product_name"],
+                base_color=row["base_color"],
+                status=row["status"],
+                coupon_code=row["coupon"],
+                order_count=row["order_count"],
+                units=row["units"],
+                revenue=row["revenue"],
+            )
+            for row in lines.iterator()
+        ],
+        batch_size=1000,
+    )
+    return len(order_rows), len(sales_rows)
+
+
+def default_report_range(today=None):
+    """The last 30 days, including today."""
+    end = today or timezone.localdate()
+    return end - timedelta(days=29), end
+
+
+def sales_report(report, start: date, end: date, group_by):
+    """
+    Totals of ``report`` ("orders" or "products") between the local dates
+    ``start`` and ``end`` (inclusive), grouped by the ``group_by``
+    dimensions. Returns a list of dicts, dimensions first.
+    """
+    from . import models
+
+    model_name, dimensions, measures = REPORTS[report]
+    unknown = [name for name in group_by if name not in dimensions]
+    if unknown:
+        raise ValueError(f"Cannot group {report} by: {', '.join(unknown)}")
+
+    model = getattr(models, model_name)
+    rows = list(
+        model.objects.filter(date__gte=start, date__lte=end)
+        .values(*group_by)
+        .annotate(**{name: Sum(name) for name in measures})
+        .order_by(*group_by)
+    )
+    # Some backends (SQLite) sum decimals as floats; round back to centavos
+    for row in rows:
+        for name in measures:
+            if isinstance(row[name], Decimal):
+                row[name] = row[name].quantize(CENT)
+    return rows
@@ -0,0 +1,169 @@
+"""
+Primary/replica database routing.
+
+With ``DATABASE_REPLICA_URL`` set, settings add a ``replica`` alias and
+install ``PrimaryReplicaRouter``. Writes always go to ``default`` (the
+primary). Reads go to the replica only inside a request that opted in, for
+the read-only endpoints: product list/retrieve and order history/retrieve
+(``ReplicaReadsMixin`` on their viewsets). Everything else, including the
+async views, management commands and the shell, reads the primary as before.
+
+A replica lags the primary, so reads fall back to the primary when they
+could observe that lag:
+
+* after the request has written anything, or inside a transaction;
+* for ``DATABASE_REPLICA_STICKY_SECONDS`` after a user's successful write
+  request (checkout, cart changes, ...), so they read their own writes on
+  their next requests. The pin is kept in the shared cache, so it holds
+  across workers;
+* inside ``primary()``. ``TieredCache`` recomputes under it, since a cached
+  value outlives the lag by far and would otherwise keep a stale read.
+
+``ReplicaRoutingMiddleware`` scopes this state to a request and sets the
+sticky pin. The test runner (customkeeps_backend/test_runner.py) always
+configures a replica alias that mirrors ``default``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+
+_request_state = ContextVar("db_routing_request", default=None)
+_force_primary = ContextVar("db_routing_primary", default=False)
+
+
+class RoutingState:
+    """Per-request routing decisions."""
+
+    def __init__(self):
+        self.replica = False
+        self.wrote = False
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f"db:primary-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Route ``user_id``'s reads to the primary for the sticky window."""
+    cache.set(_pin_key(user_id), True, timeout=settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+def allow_replica_reads(user):
+    """Let the current request read from the replica, unless ``user`` is pinned."""
+    state = _request_state.get()
+    if state is None or not replica_configured():
+        return
+    state.replica = not (user.is_authenticated and is_pinned(user.pk))
+
+
+@contextmanager
+def primary():
+    """Read from the primary within the block, whatever the request allows."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (
+            state is None
+            or not state.replica
+            or state.wrote
+            or _force_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both aliases
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaReadsMixin:
+    """
+    Viewset mixin: the actions in ``replica_actions`` may read from the
+    replica. Decided after authentication, so a pinned user is known.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            allow_replica_reads(request.user)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Give each request its own routing state, and pin a user to the primary
+    after any successful write request of theirs.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _request_state.set(RoutingState())
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = _request_state.set(RoutingState())
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if replica_configured():
+            # The pin goes to the shared cache, and the user may be lazy (session)
+            await sync_to_async(self.finish)(request, response)
+        return response
+
+    def finish(self, request, response):
+        if request.method in ("GET", "HEAD", "OPTIONS") or response.status_code >= 400:
+            return
+        if not replica_configured():
+            return
+        # DRF and the async views set the JWT user on the Django request too
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
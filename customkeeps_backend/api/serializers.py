@@ -1,6 +1,69 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Product, Order, OrderItem, CartItem
+from .assets import (
+    InvalidDesignAsset,
+    decode_data_url,
+    design_asset_url,
+    is_data_url,
+    store_design_bytes,
+)
+from .metrics import timed
+from .pricing import CatalogLine, from_cents, get_price_table
+from .exports import EXPORT_FORMATS
+from .hashing import hash_password
+from .reports import REPORTS, default_report_range
+from .thumbnails import design_thumbnail_url
+from .models import Product, Order, OrderItem, OrderSummary, CartItem, DesignAsset
+
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose rendering time is reported as the ``serialize`` span."""
+
+    def to_representation(self, instance):
+        with timed("serialize"):
+            return super().to_representation(instance)
+
+
+class DynamicFieldsModelSerializer(TimedModelSerializer):
+    """
+    ModelSerializer with sparse fieldsets and opt-in heavy fields.
+
+    ``fields`` limits the output to the named fields; ``expand`` switches on
+    fields listed in ``Meta.expandable_fields``, which are left out otherwise.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = set(expand or [])
+        expandable = set(getattr(self.Meta, "expandable_fields", []))
+
+        for name in expandable - expand:
+            self.fields.pop(name, None)
+        if fields:
+            keep = set(fields) | (expandable & expand)
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+    def get_model_field_names(self):
+        """
+        Concrete model columns backing the remaining fields, for .only().
+
+        A field can name the columns it needs in a ``model_fields`` attribute;
+        otherwise its source attribute is used.
+        """
+        opts = self.Meta.model._meta
+        by_attname = {field.attname: field.name for field in opts.concrete_fields}
+        concrete = set(by_attname.values())
+
+        names = {opts.pk.name}
+        for field in self.fields.values():
+            sources = getattr(field, "model_fields", None) or [field.source.split(".")[0]]
+            for source in sources:
+                source = by_attname.get(source, source)
+                if source in concrete:
+                    names.add(source)
+        return sorted(names)
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -14,21 +77,129 @@ class RegisterSerializer(serializers.ModelSerializer):
         """
         Create a new Django auth User with a hashed password.
         This user will automatically appear in Django admin under Auth → Users.
+
+        Same as ``create_user``, with the password hashed on the hashing pool
+        (may raise ``HashingUnavailable``).
         """
-        return User.objects.create_user(
-            username=validated_data["username"],
-            email=validated_data.get("email", ""),
-            password=validated_data["password"],
+        user = User(
+            username=User.normalize_username(validated_data["username"]),
+            email=User.objects.normalize_email(validated_data.get("email", "")),
         )
+        user.password = hash_password(validated_data["password"])
+        user.save()
+        return user
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedModelSerializer):
     class Meta:
         model = Product
         fields = "__all__"
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class DesignAssetSerializer(TimedModelSerializer):
+    """
+    Upload a design image either as a multipart ``file`` or as a
+    ``data_url`` (what FileReader.readAsDataURL produces).
+    """
+    file = serializers.FileField(write_only=True, required=False)
+    data_url = serializers.CharField(write_only=True, required=False)
+    id = serializers.CharField(source="sha256", read_only=True)
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DesignAsset
+        fields = ["id", "file", "data_url", "content_type", "size", "url", "created_at"]
+        read_only_fields = ["content_type", "size", "created_at"]
+
+    def get_url(self, obj):
+        return design_asset_url(obj.sha256, self.context.get("request"))
+
+    def validate(self, attrs):
+        upload = attrs.get("file")
+        data_url = attrs.get("data_url")
+        if bool(upload) == bool(data_url):
+            raise serializers.ValidationError(
+                "Provide exactly one of 'file' or 'data_url'."
+            )
+        try:
+            if upload:
+                if upload.size > settings.DESIGN_ASSET_MAX_BYTES:
+                    raise InvalidDesignAsset("Design image is too large.")
+                attrs["content"] = upload.read()
+            else:
+                attrs["content"] = decode_data_url(data_url)
+        except InvalidDesignAsset as e:
+            raise serializers.ValidationError(str(e))
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return store_design_bytes(validated_data["content"])
+        except InvalidDesignAsset as e:
+            raise serializers.ValidationError(str(e))
+
+
+class DesignImageField(serializers.CharField):
+    """
+    ``design_image_url`` of a cart/order line.
+
+    Writes keep the raw value (data URLs are moved to the asset store by
+    DesignAssetReferenceMixin). Reads return the asset URL when the line
+    references an asset, and never load the legacy column if it was deferred.
+    """
+    model_fields = ["design_asset"]
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("allow_blank", True)
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if instance.design_asset_id:
+            return design_asset_url(instance.design_asset_id, self.context.get("request"))
+        if "design_image_url" in instance.get_deferred_fields():
+            return ""
+        return instance.design_image_url
+
+
+class DesignThumbnailField(serializers.Field):
+    """Read-only thumbnail URL for the line's design asset."""
+
+    def __init__(self, size=300, **kwargs):
+        self.size = size
+        kwargs["read_only"] = True
+        kwargs.setdefault("source", "design_asset_id")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return design_thumbnail_url(value, self.size, request=self.context.get("request"))
+
+
+class DesignAssetReferenceMixin:
+    """
+    Cart and order lines store a design asset reference instead of the image.
+
+    ``design_image_url`` is still accepted on input for older clients; inline
+    data URLs are moved into the asset store and replaced by the reference.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        image_url = attrs.get("design_image_url")
+        if is_data_url(image_url):
+            try:
+                attrs["design_asset"] = store_design_bytes(decode_data_url(image_url))
+            except InvalidDesignAsset as e:
+                raise serializers.ValidationError({"design_image_url": str(e)})
+            attrs["design_image_url"] = ""
+        return attrs
+
+
+class CartItemSerializer(DesignAssetReferenceMixin, DynamicFieldsModelSerializer):
+    quantity = serializers.IntegerField(min_value=1, required=False)
+    design_image_url = DesignImageField()
+    design_thumbnail_url = DesignThumbnailField()
+
     class Meta:
         model = CartItem
         fields = [
@@ -39,17 +210,191 @@ class CartItemSerializer(serializers.ModelSerializer):
             "base_color",
             "customization_text",
             "design_image_url",
+            "design_asset",
+            "design_thumbnail_url",
             "created_at",
         ]
-        read_only_fields = ["id", "created_at"]
+        # The price always comes from the catalog; a client-sent price is ignored
+        read_only_fields = ["id", "price", "created_at"]
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if "product_name" in attrs:
+            # Batches share one price table through the context
+            table = self.context.get("price_table") or get_price_table()
+            resolved = table.resolve(attrs["product_name"])
+            if resolved is None:
+                raise serializers.ValidationError({"product_name": "Unknown product."})
+            attrs["product_id"], cents = resolved
+            attrs["price"] = from_cents(cents)
+        return attrs
 
     def create(self, validated_data):
         # Always attach the authenticated user from the request
-        validated_data["user"] = self.context["request"].user
+        validated_data["user_id"] = self.context["request"].user.id
         return super().create(validated_data)
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class CartOperationSerializer(serializers.Serializer):
+    """
+    One operation of a batch cart mutation.
+
+    ``add`` carries the same fields as a cart line; ``update`` sets the
+    quantity of line ``id`` (0 removes it); ``remove`` deletes line ``id``.
+    """
+    op = serializers.ChoiceField(choices=["add", "update", "remove"])
+    id = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        if attrs["op"] in ("update", "remove") and "id" not in attrs:
+            raise serializers.ValidationError({"id": "This field is required."})
+        if attrs["op"] == "update" and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "This field is required."})
+        # Only an update may take a line down to 0
+        if attrs["op"] == "add" and attrs.get("quantity", 1) < 1:
+            raise serializers.ValidationError(
+                {"quantity": "Ensure this value is greater than or equal to 1."}
+            )
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=100
+    )
+
+    def validate_operations(self, value):
+        operations, errors = [], {}
+        # Every added line is checked against the same cached catalog
+        context = {**self.context, "price_table": get_price_table()}
+        for index, raw in enumerate(value):
+            operation = CartOperationSerializer(data=raw)
+            if not operation.is_valid():
+                errors[index] = operation.errors
+                continue
+            attrs = dict(operation.validated_data)
+
+            if attrs["op"] == "add":
+                item = CartItemSerializer(data=raw, context=context)
+                if not item.is_valid():
+                    errors[index] = item.errors
+                    continue
+                attrs["item"] = dict(item.validated_data)
+            operations.append(attrs)
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return operations
+
+
+class QuoteLineSerializer(serializers.Serializer):
+    product_name = serializers.CharField(max_length=200)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class QuoteCartSerializer(serializers.Serializer):
+    lines = QuoteLineSerializer(many=True, allow_empty=False, max_length=1000)
+    coupon_code = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_lines(self, value):
+        """Resolve each line to the product's current catalog price."""
+        prices = get_price_table().product_prices
+        unknown = sorted({line["product_name"] for line in value} - prices.keys())
+        if unknown:
+            raise serializers.ValidationError(f"Unknown products: {', '.join(unknown)}")
+        return [
+            CatalogLine(line["product_name"], line["quantity"], from_cents(prices[line["product_name"]]))
+            for line in value
+        ]
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    carts = QuoteCartSerializer(many=True, allow_empty=False, max_length=50)
+
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    """Query parameters of the sales report export."""
+    report = serializers.ChoiceField(choices=sorted(REPORTS), default="orders")
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    group_by = serializers.CharField(required=False, default="date")
+    output = serializers.ChoiceField(choices=["json", "csv"], default="json")
+
+    def validate(self, attrs):
+        default_start, default_end = default_report_range()
+        attrs.setdefault("start", default_start)
+        attrs.setdefault("end", default_end)
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": "Must not be after end."})
+
+        dimensions = REPORTS[attrs["report"]][1]
+        group_by = [name.strip() for name in attrs["group_by"].split(",") if name.strip()]
+        unknown = [name for name in group_by if name not in dimensions]
+        if unknown:
+            raise serializers.ValidationError(
+                {"group_by": f"Unknown dimensions: {', '.join(unknown)}. Choose from: {', '.join(dimensions)}."}
+            )
+        attrs["group_by"] = group_by or ["date"]
+        return attrs
+
+
+class OrderExportQuerySerializer(serializers.Serializer):
+    """Query parameters of the order export; every filter is optional."""
+    status = serializers.CharField(required=False, help_text="Comma-separated statuses.")
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    output = serializers.ChoiceField(choices=sorted(EXPORT_FORMATS), default="csv")
+
+    def validate_status(self, value):
+        statuses = [name.strip() for name in value.split(",") if name.strip()]
+        known = [choice for choice, _ in Order.STATUS_CHOICES]
+        unknown = [name for name in statuses if name not in known]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown statuses: {', '.join(unknown)}. Choose from: {', '.join(known)}."
+            )
+        return statuses
+
+    def validate(self, attrs):
+        if attrs.get("start") and attrs.get("end") and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": "Must not be after end."})
+        return attrs
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(
+        child=serializers.CharField(max_length=50), allow_empty=False, max_length=1000,
+        help_text="Order codes (Order.order_id).",
+    )
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    note = serializers.CharField(required=False, allow_blank=True, max_length=255, default="")
+
+
+class OrderItemSerializer(TimedModelSerializer):
+    design_image_url = DesignImageField(read_only=True)
+    design_thumbnail_url = DesignThumbnailField()
+
+    class Meta:
+        model = OrderItem
+        fields = [
+            "id",
+            "product_name",
+            "price",
+            "quantity",
+            "base_color",
+            "customization_text",
+            "design_image_url",
+            "design_asset",
+            "design_thumbnail_url",
+        ]
+
+
+class OrderItemSummarySerializer(DynamicFieldsModelSerializer):
+    """Order line for list views: no legacy alias fields."""
+    design_image_url = DesignImageField(read_only=True)
+    design_thumbnail_url = DesignThumbnailField()
+
     class Meta:
         model = OrderItem
         fields = [
@@ -60,10 +405,64 @@ class OrderItemSerializer(serializers.ModelSerializer):
             "base_color",
             "customization_text",
             "design_image_url",
+            "design_asset",
+            "design_thumbnail_url",
+        ]
+
+
+class OrderListSerializer(DynamicFieldsModelSerializer):
+    """
+    Compact order representation for order history.
+
+    Items are only included with ``?expand=items``; the full payload (with
+    legacy alias fields) is served by the detail route.
+    """
+    items = OrderItemSummarySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "order_id",
+            "status",
+            "total_amount",
+            "discount_amount",
+            "final_amount",
+            "coupon_code",
+            "created_at",
+            "items",
+        ]
+        expandable_fields = ["items"]
+
+
+class OrderSummarySerializer(DynamicFieldsModelSerializer):
+    """
+    Order history row read from the OrderSummary projection: the same
+    fields as OrderListSerializer (ids are the order's) plus an item preview.
+    """
+    id = serializers.IntegerField(source="order_id", read_only=True)
+    order_id = serializers.CharField(source="order_code", read_only=True)
+    first_item_thumbnail_url = DesignThumbnailField(size=100, source="first_item_design_asset_id")
+
+    class Meta:
+        model = OrderSummary
+        fields = [
+            "id",
+            "order_id",
+            "status",
+            "total_amount",
+            "discount_amount",
+            "final_amount",
+            "coupon_code",
+            "created_at",
+            "item_count",
+            "unit_count",
+            "first_item_name",
+            "first_item_thumbnail_url",
         ]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     date = serializers.DateTimeField(
         source="created_at", format="%Y-%m-%d", read_only=True
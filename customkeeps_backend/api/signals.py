@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import forget_cached_user
+from .catalog import bump_catalog_version
+from .coupons import invalidate_coupons
+from .models import CartItem, Coupon, Order, OrderItem, PriceTier, Product
+from .pricing import invalidate_price_table
+from .reports import mark_order_day_dirty
+from .summaries import forget_order_history, rebuild_order_summary, sync_order_summary
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+    invalidate_price_table()
+
+
+@receiver(post_save, sender=Product)
+def reprice_cart_items(sender, instance, created, **kwargs):
+    # Carts show the current price; checkout reprices from the catalog anyway
+    if not created:
+        CartItem.objects.filter(product=instance).exclude(price=instance.price).update(
+            price=instance.price
+        )
+
+
+@receiver(post_save, sender=PriceTier)
+@receiver(post_delete, sender=PriceTier)
+def invalidate_price_tiers(sender, **kwargs):
+    invalidate_price_table()
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_coupon_cache(sender, **kwargs):
+    invalidate_coupons()
+
+
+@receiver(post_save, sender=Order)
+def update_order_summary(sender, instance, created, **kwargs):
+    # New orders get their summary from whoever creates the lines
+    # (checkout, or OrderAdmin.save_related)
+    if not created:
+        sync_order_summary(instance)
+        mark_order_day_dirty(instance)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    mark_order_day_dirty(instance)
+    forget_order_history([instance.user_id])
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def rebuild_summary_for_item(sender, instance, origin=None, **kwargs):
+    # Skip cascades from deleting the order (or its user); the summary goes too
+    if origin is not None and not (
+        isinstance(origin, OrderItem) or getattr(origin, "model", None) is OrderItem
+    ):
+        return
+    # Line edits mark the rollups dirty in the admin (OrderAdmin saves the
+    # order, OrderItemAdmin marks the day), not once per line here
+    rebuild_order_summary(instance.order_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    # Other processes catch up within AUTH_USER_CACHE_TTL
+    forget_cached_user(instance.pk)
@@ -0,0 +1,161 @@
+"""
+Local stand-in for the Stripe PaymentIntents API.
+
+Implements just enough of ``/v1/payment_intents`` for the checkout flow to
+run offline: create, retrieve and update. Used by the checkout benchmark and
+handy for local development:
+
+    python -m api.stripe_stub --port 12111
+    STRIPE_API_BASE=http://127.0.0.1:12111 python manage.py runserver
+
+An optional ``latency`` (seconds) delays every response, to simulate a slow
+upstream.
+"""
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+def _parse_form(body: str) -> dict:
+    """Decode Stripe's form encoding, including ``metadata[key]=value`` pairs."""
+    params = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        if "[" in key and key.endswith("]"):
+            outer, inner = key[:-1].split("[", 1)
+            params.setdefault(outer, {})[inner] = value
+        else:
+            params[key] = value
+    return params
+
+
+class StripeStubHandler(BaseHTTPRequestHandler):
+    server_version = "StripeStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _intent_id(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[:2] != ["v1", "payment_intents"]:
+            return None, False
+        return (parts[2] if len(parts) > 2 else None), True
+
+    def _not_found(self):
+        self._send(404, {"error": {"type": "invalid_request_error", "message": "No such resource"}})
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.request_count += 1
+        intent_id, ok = self._intent_id()
+        intent = self.server.intents.get(intent_id)
+        if not ok or intent is None:
+            return self._not_found()
+        self._send(200, intent)
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        params = _parse_form(self.rfile.read(length).decode("utf-8"))
+        intent_id, ok = self._intent_id()
+        if not ok:
+            return self._not_found()
+
+        stub = self.server
+        with stub.lock:
+            stub.request_count += 1
+            if intent_id is None:
+                key = self.headers.get("Idempotency-Key")
+                if key and key in stub.idempotent:
+                    return self._send(200, stub.intents[stub.idempotent[key]])
+                intent_id = f"pi_stub_{next(stub.ids)}"
+                intent = {
+                    "id": intent_id,
+                    "object": "payment_intent",
+                    "client_secret": f"{intent_id}_secret_stub",
+                    "status": "requires_payment_method",
+                    "currency": params.get("currency", "php"),
+                    "amount": 0,
+                    "metadata": {},
+                }
+                stub.intents[intent_id] = intent
+                if key:
+                    stub.idempotent[key] = intent_id
+            intent = stub.intents.get(intent_id)
+            if intent is None:
+                return self._not_found()
+            if not intent["status"].startswith("requires_"):
+                # Like Stripe: a paid or canceled intent can't be changed
+                return self._send(400, {"error": {
+                    "type": "invalid_request_error",
+                    "message": f"This PaymentIntent has a status of {intent['status']}.",
+                }})
+            if "amount" in params:
+                intent["amount"] = int(params["amount"])
+            intent["metadata"].update(params.get("metadata", {}))
+        self._send(200, intent)
+
+
+class StripeStubServer(ThreadingHTTPServer):
+    """
+    In-process stub server; use as a context manager:
+
+        with StripeStubServer() as stub:
+            ... stub.url ...
+    """
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), StripeStubHandler)
+        self.latency = latency
+        self.intents = {}
+        self.idempotent = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients that give up on a slow response hang up mid-write; expected
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StripeStubServer(args.host, args.port, args.latency)
+    print(f"Stripe stub listening on {server.url}")
+    server.serve_forever()
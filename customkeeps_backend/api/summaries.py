@@ -0,0 +1,124 @@
+"""
+Maintenance of the OrderSummary projection.
+
+Checkout writes the summary in the same transaction as the order, from the
+lines it already has in memory. Later changes keep it current: order saves
+update the copied order columns (signals.py), item edits rebuild it, and
+code that changes orders with ``QuerySet.update`` calls
+``sync_order_summaries`` itself.
+
+Rendered order history pages are cached per user in the tiered cache
+(cache.py). Every change above invalidates that user's pages, and the
+generation is read from the shared tier on each request, so a new order
+shows up right away on every worker.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import TieredCache
+
+SUMMARY_ORDER_FIELDS = [
+    "status",
+    "total_amount",
+    "discount_amount",
+    "final_amount",
+    "coupon_code",
+]
+
+
+summary_cache = TieredCache("order_summaries", generation_ttl=0)
+
+
+def cached_order_history(user_id, name, render):
+    """The history page ``name`` of ``user_id``, calling ``render()`` on a miss."""
+    return summary_cache.get_or_set(
+        name, render, settings.ORDER_SUMMARY_CACHE_TIMEOUT, scope=user_id
+    )
+
+
+async def acached_order_history(user_id, name, arender):
+    """``cached_order_history`` for async views; ``arender`` is a coroutine function."""
+    return await summary_cache.aget_or_set(
+        name, arender, settings.ORDER_SUMMARY_CACHE_TIMEOUT, scope=user_id
+    )
+
+
+def forget_order_history(user_ids):
+    for user_id in set(user_ids):
+        summary_cache.invalidate(scope=user_id)
+
+
+def build_order_summary(order, items, username=None):
+    """Unsaved OrderSummary for ``order`` and its lines ``items``."""
+    from .models import OrderSummary
+
+    first = items[0] if items else None
+    return OrderSummary(
+        order=order,
+        user_id=order.user_id,
+        username=username if username is not None else order.user.username,
+        order_code=order.order_id,
+        status=order.status,
+        item_count=len(items),
+        unit_count=sum(item.quantity for item in items),
+        first_item_name=first.product_name if first else "",
+        first_item_design_asset_id=first.design_asset_id if first else None,
+        total_amount=order.total_amount,
+        discount_amount=order.discount_amount,
+        final_amount=order.final_amount,
+        coupon_code=order.coupon_code,
+        created_at=order.created_at,
+    )
+
+
+def record_order_summary(order, items, username=None):
+    """Insert the summary of a just-created order."""
+    summary = build_order_summary(order, items, username)
+    summary.save(force_insert=True)
+    forget_order_history([order.user_id])
+    return summary
+
+
+def rebuild_order_summary(order_id):
+    """Recompute an order's summary from the order and its lines."""
+    from .models import Order, OrderSummary
+
+    order = Order.objects.select_related("user").filter(pk=order_id).first()
+    if order is None:
+        return None
+    summary = build_order_summary(order, list(order.items.order_by("id")))
+    existing = OrderSummary.objects.filter(order_id=order_id).values_list("pk", flat=True).first()
+    if existing is not None:
+        summary.pk = existing
+    summary.save()
+    forget_order_history([order.user_id])
+    return summary
+
+
+def sync_order_summary(order):
+    """Copy the order's own columns onto its summary after an order save."""
+    from .models import OrderSummary
+
+    values = {field: getattr(order, field) for field in SUMMARY_ORDER_FIELDS}
+    updated = OrderSummary.objects.filter(order_id=order.pk).update(
+        **values, updated_at=timezone.now()
+    )
+    if not updated:
+        rebuild_order_summary(order.pk)
+    else:
+        forget_order_history([order.user_id])
+
+
+def sync_order_summaries(order_ids, **values):
+    """
+    Apply ``values`` (order columns just set with ``QuerySet.update``) to the
+    summaries of ``order_ids`` in one UPDATE.
+    """
+    from .models import OrderSummary
+
+    unknown = set(values) - set(SUMMARY_ORDER_FIELDS)
+    if unknown:
+        raise ValueError(f"Not summary columns: {', '.join(sorted(unknown))}")
+    summaries = OrderSummary.objects.filter(order_id__in=order_ids)
+    forget_order_history(summaries.order_by().values_list("user_id", flat=True).distinct())
+    return summaries.update(**values, updated_at=timezone.now())
@@ -0,0 +1,99 @@
+"""Helpers shared by the API test modules."""
+import importlib
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+from ..auth import user_cache
+from ..catalog import catalog_cache
+from ..coupons import coupon_cache
+from ..payments import aclose_async_stripe_client, get_stripe_client
+from ..pricing import pricing_cache
+from ..stripe_stub import StripeStubServer
+from ..summaries import summary_cache
+
+PASSWORD = "test-pass-123"
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def clear_caches():
+    """Empty the shared cache and every per-process tier in front of it."""
+    cache.clear()
+    user_cache.clear()
+    for tiered in (catalog_cache, coupon_cache, pricing_cache, summary_cache):
+        tiered.clear_local()
+
+
+def start_stripe_stub(test):
+    """Point the Stripe client of ``test`` at a local stub for its duration."""
+    stub = test.enterContext(StripeStubServer())
+    test.enterContext(override_settings(STRIPE_API_BASE=stub.url, STRIPE_SECRET_KEY="sk_test_stub"))
+    get_stripe_client.cache_clear()
+    test.addCleanup(get_stripe_client.cache_clear)
+    return stub
+
+
+def run_async(function, *args, **kwargs):
+    """
+    ``async_to_sync(function)(*args, **kwargs)``, closing the Stripe client
+    the call's event loop may have opened, as asgi.py does on shutdown.
+    """
+
+    async def call():
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            await aclose_async_stripe_client()
+
+    return async_to_sync(call)()
+
+
+def reload_urlconf():
+    """Re-run api/urls.py and the root URLconf, which read settings at import."""
+    from .. import urls
+
+    importlib.reload(urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def asgi_mode_urls():
+    """Serve the ``ASGI_MODE`` URLs (api/async_views.py) inside the block."""
+    try:
+        with override_settings(ASGI_MODE=True):
+            reload_urlconf()
+            yield
+    finally:
+        reload_urlconf()
+
+
+class JWTClientMixin:
+    """Request helpers for a TestCase, authenticated with a JWT like the frontend."""
+
+    def login(self, username, password=PASSWORD):
+        response = self.client.post(
+            "/api/token/",
+            {"username": username, "password": password},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.token = response.json()["access"]
+        return self.token
+
+    def api(self, method, path, data=None, token=None, status=None):
+        token = token if token is not None else getattr(self, "token", None)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        if method == "get":
+            response = self.client.get(path, data, **headers)
+        else:
+            response = getattr(self.client, method)(
+                path, data, content_type="application/json", **headers
+            )
+        if status is not None:
+            self.assertEqual(response.status_code, status, getattr(response, "data", None))
+        return response
@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .. import async_views, views
+from ..models import CartItem, Coupon, Order, OrderItem, Product
+from ..summaries import rebuild_order_summary
+from .base import (
+    PASSWORD,
+    JWTClientMixin,
+    asgi_mode_urls,
+    clear_caches,
+    run_async,
+    start_stripe_stub,
+)
+
+
+class AsgiModeUrlTests(TestCase):
+    def test_switches_io_bound_urls_to_async_views(self):
+        switched = {
+            "checkout-pay": (views.pay_view, async_views.pay_view),
+            "preview_coupon": (views.preview_coupon, async_views.preview_coupon),
+            "product-list": (views.ProductViewSet, async_views.product_list),
+            "order-list": (views.OrderViewSet, async_views.order_list),
+        }
+        for name, (sync_view, _) in switched.items():
+            match = resolve(reverse(name))
+            # Viewset actions resolve to a function carrying the viewset
+            self.assertIn(sync_view, (match.func, getattr(match.func, "cls", None)), name)
+
+        with asgi_mode_urls():
+            for name, (_, async_view) in switched.items():
+                match = resolve(reverse(name))
+                self.assertIs(match.func, async_view, name)
+                self.assertEqual(match.url_name, name)
+            # Everything else keeps its DRF view
+            self.assertIs(resolve("/api/cart/").func.cls, views.CartViewSet)
+
+        self.assertIs(resolve(reverse("checkout-pay")).func, views.pay_view)
+
+
+class AsyncViewParityTests(JWTClientMixin, TestCase):
+    """The async views answer exactly what their DRF counterparts answer."""
+
+    def setUp(self):
+        clear_caches()
+        self.stub = start_stripe_stub(self)
+        self.user = User.objects.create_user("async-shopper", password=PASSWORD)
+        self.login("async-shopper")
+        self.product = Product.objects.first()
+
+    def async_api(self, method, path, data=None):
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        call = getattr(self.async_client, method)
+        if method == "get":
+            return run_async(call, path, data, headers=headers)
+        return run_async(call, path, data, content_type="application/json", headers=headers)
+
+    def both(self, method, path, data=None, reset=False):
+        """(sync response, async response) for the same request."""
+        sync_response = self.api(method, path, data)
+        if reset:
+            clear_caches()
+        with asgi_mode_urls():
+            async_response = self.async_api(method, path, data)
+            # resolver_match is lazy, so read it while the URLs are switched
+            self.assertEqual(async_response.resolver_match.func.__module__, async_views.__name__)
+        return sync_response, async_response
+
+    def assert_same(self, method, path, data=None, reset=False):
+        sync_response, async_response = self.both(method, path, data, reset)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+        return sync_response
+
+    def add_to_cart(self, quantity=2):
+        response = self.api(
+            "post", "/api/cart/", {"product_name": self.product.name, "quantity": quantity}
+        )
+        self.assertIn(response.status_code, (200, 201))
+
+    def test_product_list(self):
+        self.assert_same("get", "/api/products/")
+        self.assert_same("get", "/api/products/", reset=True)
+
+    def test_order_list(self):
+        for number in range(3):
+            order = Order.objects.create(user=self.user, order_id=f"ORD-ASYNC-{number}")
+            OrderItem.objects.create(
+                order=order, product=self.product, product_name=self.product.name,
+                price=self.product.price, quantity=number + 1,
+            )
+            rebuild_order_summary(order.pk)
+
+        first = self.assert_same("get", "/api/orders/", {"page_size": 2}, reset=True).json()
+        self.assertEqual(len(first["results"]), 2)
+        self.assert_same("get", first["next"], reset=True)
+        self.assert_same("get", "/api/orders/", {"fields": "order_id,status"}, reset=True)
+        self.assert_same("get", "/api/orders/", {"expand": "items"}, reset=True)
+
+    def test_preview_coupon(self):
+        self.add_to_cart()
+        now = timezone.now()
+        Coupon.objects.create(
+            code="SAVE10", discount_percent=10,
+            valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1),
+        )
+        valid = self.assert_same("post", "/api/preview_coupon/", {"coupon_code": "save10"})
+        self.assertEqual(valid.status_code, 200)
+        invalid = self.assert_same("post", "/api/preview_coupon/", {"coupon_code": "NOPE"})
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_pay_reuses_the_cached_intent(self):
+        self.add_to_cart()
+        paid = self.api("post", "/api/checkout/pay/", {}, status=200).json()
+        requests = self.stub.request_count
+        with asgi_mode_urls():
+            for _ in range(2):
+                response = self.async_api("post", "/api/checkout/pay/", {})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), paid)
+        self.assertEqual(self.stub.request_count, requests)
+
+        # A changed cart updates the same intent on either path
+        self.add_to_cart(1)
+        with asgi_mode_urls():
+            updated = self.async_api("post", "/api/checkout/pay/", {}).json()
+        self.assertEqual(updated["paymentIntentId"], paid["paymentIntentId"])
+        self.assertNotEqual(updated["amount"], paid["amount"])
+        self.assertEqual(self.api("post", "/api/checkout/pay/", {}).json(), updated)
+
+    def test_pay_errors(self):
+        empty = self.assert_same("post", "/api/checkout/pay/", {})
+        self.assertEqual(empty.status_code, 400)
+
+        self.add_to_cart()
+        # Unknown coupons are ignored at payment, as the preview already said
+        self.assert_same("post", "/api/checkout/pay/", {"coupon_code": "NOPE"})
+
+        other = Product.objects.exclude(pk=self.product.pk).first()
+        CartItem.objects.create(
+            user=self.user, product=other, product_name=other.name, price=other.price, quantity=0
+        )
+        invalid = self.assert_same("post", "/api/checkout/pay/", {})
+        self.assertEqual(invalid.status_code, 400)
+
+        self.token = None
+        anonymous = self.assert_same("post", "/api/checkout/pay/", {})
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous["WWW-Authenticate"], 'Bearer realm="api"')
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..auth import AUTH_STATE_CLAIM, ClaimsJWTAuthentication, ClaimsUser, user_cache
+from .base import FAST_HASHERS, PASSWORD, JWTClientMixin, clear_caches, run_async
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ClaimsAuthenticationTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("claims", password=PASSWORD)
+        self.login("claims")
+
+    def user_queries(self, path="/api/cart/", status=200):
+        with CaptureQueriesContext(connection) as queries:
+            self.api("get", path, status=status)
+        return [query["sql"] for query in queries if '"auth_user"' in query["sql"]]
+
+    def test_token_carries_claims(self):
+        token = AccessToken(self.token)
+        self.assertEqual(token["username"], "claims")
+        self.assertFalse(token["is_staff"])
+        self.assertIn(AUTH_STATE_CLAIM, token)
+
+    def test_warm_requests_skip_the_user_query(self):
+        user_cache.clear()
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_claims_user(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.id, self.user.pk)
+        self.assertEqual(str(user), "claims")
+        self.assertEqual(user.user, self.user)
+
+    def test_async_authentication(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        user, _ = run_async(ClaimsJWTAuthentication().aauthenticate, request)
+        self.assertEqual(user.id, self.user.pk)
+        self.assertIsNone(run_async(ClaimsJWTAuthentication().aauthenticate, RequestFactory().get("/")))
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            run_async(ClaimsJWTAuthentication().aauthenticate, request)
+
+    def test_password_change_revokes_tokens(self):
+        self.user.set_password("another-pass-456")
+        self.user.save()
+        self.user_queries(status=401)
+        self.login("claims", "another-pass-456")
+        self.user_queries()
+
+    def test_deactivating_and_staff_changes_revoke_tokens(self):
+        for field, value in (("is_staff", True), ("is_active", False)):
+            self.login("claims")
+            setattr(self.user, field, value)
+            self.user.save()
+            self.user_queries(status=401)
+
+    def test_other_processes_notice_within_ttl(self):
+        self.user_queries()
+        # An update that sends no signal, as another process's save looks here
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.user_queries()
+        user_cache.clear()
+        self.user_queries(status=401)
+
+    def test_deleted_user(self):
+        self.user.delete()
+        self.user_queries(status=401)
+
+    def test_tokens_without_auth_claim_look_the_user_up(self):
+        self.token = str(AccessToken.for_user(self.user))
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 1)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import CartItem, Coupon, Order, Product
+from .base import PASSWORD, JWTClientMixin, clear_caches
+
+
+class CartBatchTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        User.objects.create_user("batcher", password=PASSWORD)
+        self.login("batcher")
+        self.products = list(Product.objects.all()[:3])
+
+    def batch(self, *operations):
+        return self.api("post", "/api/cart/batch/", {"operations": list(operations)})
+
+    def test_batch_add_needs_a_quantity(self):
+        product = self.products[0]
+        for quantity in (0, -3):
+            response = self.batch({"op": "add", "product_name": product.name, "quantity": quantity})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("quantity", response.json()["operations"]["0"])
+        self.assertFalse(CartItem.objects.exists())
+
+
+class CartListTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        User.objects.create_user("lister", password=PASSWORD)
+        self.login("lister")
+
+    def test_cart_has_no_line_limit_and_pages_follow_next(self):
+        for product in Product.objects.all()[:3]:
+            # Cold caches on the first add still fit the strict budget
+            self.api("post", "/api/cart/", {"product_name": product.name, "quantity": 1}, status=201)
+
+        ids, url = [], "/api/cart/?page_size=2"
+        while url:
+            page = self.api("get", url, status=200).json()
+            ids += [line["id"] for line in page["results"]]
+            url = page["next"]
+        self.assertCountEqual(ids, CartItem.objects.values_list("id", flat=True))
+        self.assertEqual(len(ids), 3)
+
+
+class CartQuantityTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("shopper", password=PASSWORD)
+        self.login("shopper")
+        self.product = Product.objects.first()
+
+    def test_add_rejects_non_positive_quantity(self):
+        for quantity in (0, -2):
+            response = self.api(
+                "post", "/api/cart/", {"product_name": self.product.name, "quantity": quantity}
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("quantity", response.json())
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_update_rejects_non_positive_quantity(self):
+        line = self.api(
+            "post", "/api/cart/", {"product_name": self.product.name, "quantity": 2}, status=201
+        ).json()
+        self.api("patch", f"/api/cart/{line['id']}/", {"quantity": -5}, status=400)
+        self.assertEqual(CartItem.objects.get(pk=line["id"]).quantity, 2)
+
+    def test_checkout_rejects_non_positive_lines(self):
+        self.api("post", "/api/cart/", {"product_name": self.product.name, "quantity": 2}, status=201)
+        # A line saved before quantities were validated
+        other = Product.objects.exclude(pk=self.product.pk).first()
+        CartItem.objects.create(
+            user=self.user, product=other, product_name=other.name, price=other.price, quantity=-3
+        )
+        self.api("get", "/api/cart/quote/", status=400)
+        self.api("post", "/api/checkout/pay/", {}, status=400)
+        self.api("post", "/api/orders/create_from_cart/", {}, status=400)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_order_rejects_zero_total(self):
+        self.api("post", "/api/cart/", {"product_name": self.product.name, "quantity": 1}, status=201)
+        now = timezone.now()
+        Coupon.objects.create(
+            code="FREE", discount_percent=100,
+            valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1),
+        )
+        self.api("post", "/api/orders/create_from_cart/", {"coupon_code": "FREE"}, status=400)
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,68 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..cart import quote_cart_lines
+from ..checkout import acheckout_payment_intent, checkout_payment_intent
+from ..models import CartItem, Product
+from .base import PASSWORD, JWTClientMixin, clear_caches, run_async, start_stripe_stub
+
+
+class CheckoutIntentTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        self.stub = start_stripe_stub(self)
+        self.user = User.objects.create_user("payer", password=PASSWORD)
+        product = Product.objects.first()
+        self.line = CartItem.objects.create(
+            user=self.user, product=product, product_name=product.name, price=product.price, quantity=2
+        )
+
+    def pay(self, intent_for=checkout_payment_intent):
+        cart_items = list(CartItem.objects.filter(user=self.user))
+        return intent_for(self.user, cart_items, quote_cart_lines(cart_items))["id"]
+
+    def apay(self):
+        return self.pay(partial(run_async, acheckout_payment_intent))
+
+    def test_unchanged_cart_reuses_intent_without_stripe(self):
+        first = self.pay()
+        requests = self.stub.request_count
+        self.assertEqual(self.pay(), first)
+        self.assertEqual(self.apay(), first)
+        self.assertEqual(self.stub.request_count, requests)
+
+    def test_changed_cart_updates_intent(self):
+        first = self.pay()
+        amount = self.stub.intents[first]["amount"]
+        CartItem.objects.filter(pk=self.line.pk).update(quantity=3)
+        requests = self.stub.request_count
+        self.assertEqual(self.pay(), first)
+        self.assertEqual(self.stub.request_count, requests + 1)
+        self.assertGreater(self.stub.intents[first]["amount"], amount)
+
+    def test_paid_intent_is_replaced_when_cart_changes(self):
+        first = self.pay()
+        self.stub.intents[first]["status"] = "succeeded"
+        CartItem.objects.filter(pk=self.line.pk).update(quantity=3)
+        second = self.pay()
+        self.assertNotEqual(second, first)
+        self.assertEqual(self.stub.intents[second]["status"], "requires_payment_method")
+
+        self.stub.intents[second]["status"] = "canceled"
+        CartItem.objects.filter(pk=self.line.pk).update(quantity=4)
+        third = self.apay()
+        self.assertNotIn(third, (first, second))
+        self.assertEqual(self.pay(), third)
+
+    def test_order_forgets_intent(self):
+        self.login("payer")
+        first = self.api("post", "/api/checkout/pay/", {}, status=200).json()["paymentIntentId"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api("post", "/api/orders/create_from_cart/", {"payment_intent_id": first}, status=201)
+
+        product = Product.objects.first()
+        self.api("post", "/api/cart/", {"product_name": product.name, "quantity": 2}, status=201)
+        second = self.api("post", "/api/checkout/pay/", {}, status=200).json()["paymentIntentId"]
+        self.assertNotEqual(second, first)
@@ -0,0 +1,89 @@
+import base64
+import hashlib
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from ..assets import get_design_asset_storage
+from ..models import CartItem, DesignAsset, Product
+from .base import PASSWORD, JWTClientMixin, clear_caches
+from .test_thumbnails import DesignStorageMixin, png_bytes
+
+
+def data_url(data, content_type="image/png"):
+    return f"data:{content_type};base64,{base64.b64encode(data).decode()}"
+
+
+class DesignAssetTests(DesignStorageMixin, JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        self.use_temporary_design_storage()
+        User.objects.create_user("designer", password=PASSWORD)
+        self.login("designer")
+        self.image = png_bytes()
+        self.digest = hashlib.sha256(self.image).hexdigest()
+
+    def upload(self, data, status=201):
+        return self.api("post", "/api/design-assets/", {"data_url": data_url(data)}, status=status)
+
+    def test_upload_is_content_addressed(self):
+        asset = self.upload(self.image).json()
+        self.assertEqual(asset["id"], self.digest)
+        self.assertEqual(asset["content_type"], "image/png")
+        self.assertEqual(asset["size"], len(self.image))
+        self.assertTrue(asset["url"].endswith(f"/api/design-assets/{self.digest}/"))
+        self.assertTrue(get_design_asset_storage().exists(f"{self.digest[:2]}/{self.digest}.png"))
+
+    def test_identical_uploads_share_one_asset(self):
+        first = self.upload(self.image).json()
+        response = self.client.post(
+            "/api/design-assets/",
+            {"file": SimpleUploadedFile("design.png", self.image, content_type="image/png")},
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertIn(response.status_code, (200, 201))
+        self.assertEqual(response.json()["id"], first["id"])
+        self.assertEqual(DesignAsset.objects.count(), 1)
+
+    def test_rejects_non_images(self):
+        self.upload(b"%PDF-1.7 not an image", status=400)
+        self.api("post", "/api/design-assets/", {"data_url": "data:image/png;base64,@@"}, status=400)
+        self.api("post", "/api/design-assets/", {}, status=400)
+        with override_settings(DESIGN_ASSET_MAX_BYTES=100):
+            self.upload(self.image, status=400)
+        self.assertFalse(DesignAsset.objects.exists())
+
+    def test_upload_needs_login(self):
+        self.upload(self.image, status=201)
+        self.token = None
+        self.upload(self.image, status=401)
+
+    def test_cart_line_data_url_moves_to_asset_store(self):
+        product = Product.objects.first()
+        line = self.api(
+            "post", "/api/cart/",
+            {"product_name": product.name, "quantity": 1, "design_image_url": data_url(self.image)},
+            status=201,
+        ).json()
+        self.assertEqual(line["design_asset"], self.digest)
+        self.assertTrue(line["design_image_url"].endswith(f"/api/design-assets/{self.digest}/"))
+        self.assertIn(f"/api/design-assets/{self.digest}/thumb/", line["design_thumbnail_url"])
+        # The row keeps the digest, not the image
+        self.assertEqual(CartItem.objects.get(pk=line["id"]).design_image_url, "")
+
+    def test_serves_bytes_with_immutable_caching(self):
+        self.upload(self.image)
+        url = f"/api/design-assets/{self.digest}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.image)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
+        self.assertIn("immutable", response["Cache-Control"])
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{self.digest}"')
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(self.client.get(f"/api/design-assets/{'0' * 64}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/design-assets/not-a-digest/").status_code, 404)
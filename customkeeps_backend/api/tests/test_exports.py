@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from ..exports import EXPORT_COLUMNS, export_order_lines
+from ..models import DesignAsset, Order, OrderItem
+from ..reports import local_midnight
+from .base import PASSWORD, JWTClientMixin, clear_caches
+
+SHA256 = "a" * 64
+
+
+class OrderExportTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        User.objects.create_superuser("staff", password=PASSWORD)
+        User.objects.create_user("customer", password=PASSWORD)
+        self.customer = User.objects.create_user("buyer", email="buyer@example.com")
+        self.today = timezone.localdate()
+        asset = DesignAsset.objects.create(
+            sha256=SHA256, file=f"aa/{SHA256}.png", content_type="image/png", size=1
+        )
+
+        self.old = self.place_order("ORD-OLD", self.today - timedelta(days=3), "delivered")
+        self.add_line(self.old, design_image_url="data:image/png;base64,AAAA")
+        self.new = self.place_order("ORD-NEW", self.today, "preparing")
+        self.add_line(self.new, design_asset=asset)
+        self.add_line(self.new, design_image_url="https://example.com/legacy.png", quantity=3)
+        self.login("staff")
+
+    def place_order(self, code, day, status):
+        order = Order.objects.create(
+            user=self.customer, order_id=code, status=status, final_amount=Decimal("99.00")
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=local_midnight(day) + timedelta(hours=9))
+        return order
+
+    def add_line(self, order, quantity=1, **design):
+        return OrderItem.objects.create(
+            order=order, product_name="Keychain", price=Decimal("10.00"), quantity=quantity, **design
+        )
+
+    def export(self, expect=200, **params):
+        response = self.api("get", "/api/exports/orders/", params, status=expect)
+        if expect != 200:
+            return response
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_one_row_per_line_oldest_first(self):
+        response, body = self.export()
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS)
+        self.assertEqual([row["order_id"] for row in rows], ["ORD-OLD", "ORD-NEW", "ORD-NEW"])
+        self.assertEqual(rows[2]["quantity"], "3")
+        self.assertEqual(rows[1]["email"], "buyer@example.com")
+
+    def test_designs_exported_as_references(self):
+        _, body = self.export(output="ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows[0]["design_image_url"], "")
+        self.assertNotIn("base64", body)
+        self.assertEqual(rows[1]["design_asset"], SHA256)
+        self.assertEqual(rows[1]["design_asset_url"], f"http://testserver/api/design-assets/{SHA256}/")
+        self.assertEqual(rows[2]["design_image_url"], "https://example.com/legacy.png")
+
+    def test_filters(self):
+        _, body = self.export(status="preparing", output="ndjson")
+        self.assertEqual({json.loads(line)["order_id"] for line in body.splitlines()}, {"ORD-NEW"})
+        day = (self.today - timedelta(days=3)).isoformat()
+        _, body = self.export(start=day, end=day, output="ndjson")
+        self.assertEqual({json.loads(line)["order_id"] for line in body.splitlines()}, {"ORD-OLD"})
+
+        self.export(400, status="lost")
+        self.export(400, start=self.today.isoformat(), end=day)
+        self.export(400, output="xlsx")
+
+    def test_one_query_however_many_lines(self):
+        for _ in range(20):
+            self.add_line(self.new)
+        with self.assertNumQueries(1):
+            rows = list(export_order_lines(chunk_size=5))
+        self.assertEqual(len(rows), 23)
+
+    def test_staff_only(self):
+        self.login("customer")
+        self.export(403)
+        self.token = None
+        self.export(401)
@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from ..fulfillment import InvalidTransition, transition_orders
+from ..models import DirtyRollupDay, Order, OrderStatusTransition, OrderSummary
+from ..reports import local_midnight
+from ..summaries import rebuild_order_summary
+from .base import PASSWORD, JWTClientMixin, clear_caches
+
+
+class FulfillmentTestMixin:
+    def setUp(self):
+        clear_caches()
+        self.staff = User.objects.create_superuser("staff", password=PASSWORD)
+        User.objects.create_user("customer", password=PASSWORD)
+        self.customer = User.objects.create_user("buyer")
+        self.today = timezone.localdate()
+
+    def place_order(self, code, status="preparing", day=None):
+        order = Order.objects.create(user=self.customer, order_id=code, status=status)
+        Order.objects.filter(pk=order.pk).update(
+            created_at=local_midnight(day or self.today) + timedelta(hours=9)
+        )
+        rebuild_order_summary(order.pk)
+        return order
+
+    def statuses(self, *codes):
+        return dict(Order.objects.filter(order_id__in=codes).values_list("order_id", "status"))
+
+
+class TransitionOrdersTests(FulfillmentTestMixin, TestCase):
+    def test_moves_batch_and_logs_each_order(self):
+        earlier = self.today - timedelta(days=2)
+        self.place_order("ORD-A", day=earlier)
+        self.place_order("ORD-B")
+        DirtyRollupDay.objects.all().delete()
+
+        result = transition_orders(
+            Order.objects.all(), "ready_for_delivery", changed_by=self.staff, note="packed"
+        )
+
+        self.assertEqual(result.count, 2)
+        self.assertEqual(sorted(result.order_codes), ["ORD-A", "ORD-B"])
+        self.assertEqual(
+            self.statuses("ORD-A", "ORD-B"),
+            {"ORD-A": "ready_for_delivery", "ORD-B": "ready_for_delivery"},
+        )
+        log = OrderStatusTransition.objects.order_by("order__order_id")
+        self.assertEqual(
+            list(log.values_list("order__order_id", "from_status", "to_status", "changed_by", "note")),
+            [
+                ("ORD-A", "preparing", "ready_for_delivery", self.staff.pk, "packed"),
+                ("ORD-B", "preparing", "ready_for_delivery", self.staff.pk, "packed"),
+            ],
+        )
+        self.assertEqual(
+            set(OrderSummary.objects.values_list("status", flat=True)), {"ready_for_delivery"}
+        )
+        self.assertCountEqual(
+            DirtyRollupDay.objects.values_list("date", flat=True), [earlier, self.today]
+        )
+
+    def test_all_or_none(self):
+        self.place_order("ORD-A")
+        self.place_order("ORD-B", status="in_transit")
+        with self.assertRaises(InvalidTransition) as raised:
+            transition_orders(Order.objects.all(), "ready_for_delivery")
+        self.assertEqual(raised.exception.invalid, {"ORD-B": "in_transit"})
+        self.assertEqual(
+            self.statuses("ORD-A", "ORD-B"), {"ORD-A": "preparing", "ORD-B": "in_transit"}
+        )
+        self.assertFalse(OrderStatusTransition.objects.exists())
+
+    def test_one_step_at_a_time(self):
+        self.place_order("ORD-A")
+        with self.assertRaises(InvalidTransition):
+            transition_orders(Order.objects.all(), "in_transit")
+        with self.assertRaises(InvalidTransition):
+            transition_orders(Order.objects.all(), "preparing")
+        with self.assertRaises(ValueError):
+            transition_orders(Order.objects.all(), "lost")
+
+    def test_empty_batch(self):
+        result = transition_orders(Order.objects.none(), "in_transit")
+        self.assertEqual(result.count, 0)
+
+
+class TransitionViewTests(FulfillmentTestMixin, JWTClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.place_order("ORD-A")
+        self.place_order("ORD-B")
+        self.login("staff")
+
+    def transition(self, codes, to_status, status=200, **extra):
+        return self.api(
+            "post", "/api/fulfillment/transitions/",
+            {"order_ids": codes, "status": to_status, **extra}, status=status,
+        ).json()
+
+    def test_moves_orders(self):
+        body = self.transition(["ORD-A", "ORD-B"], "ready_for_delivery", note="packed")
+        self.assertEqual(body["status"], "ready_for_delivery")
+        self.assertEqual(body["count"], 2)
+        self.assertEqual(OrderStatusTransition.objects.filter(changed_by=self.staff).count(), 2)
+
+    def test_invalid_orders_reject_the_batch(self):
+        self.transition(["ORD-A"], "ready_for_delivery")
+        body = self.transition(["ORD-A", "ORD-B"], "in_transit", status=400)
+        self.assertEqual(body["invalid"], {"ORD-B": "preparing"})
+        self.assertEqual(
+            self.statuses("ORD-A", "ORD-B"), {"ORD-A": "ready_for_delivery", "ORD-B": "preparing"}
+        )
+
+    def test_unknown_orders(self):
+        body = self.transition(["ORD-A", "ORD-MISSING"], "ready_for_delivery", status=400)
+        self.assertEqual(body["missing"], ["ORD-MISSING"])
+        self.assertEqual(self.statuses("ORD-A"), {"ORD-A": "preparing"})
+        self.transition([], "ready_for_delivery", status=400)
+        self.transition(["ORD-A"], "lost", status=400)
+
+    def test_staff_only(self):
+        self.login("customer")
+        self.transition(["ORD-A"], "ready_for_delivery", status=403)
+        self.token = None
+        self.transition(["ORD-A"], "ready_for_delivery", status=401)
+        self.assertEqual(self.statuses("ORD-A"), {"ORD-A": "preparing"})
+
+
+class TransitionAdminActionTests(FulfillmentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="staff", password=PASSWORD)
+
+    def run_action(self, action, *orders):
+        return self.client.post(
+            "/admin/api/order/",
+            {"action": action, "_selected_action": [order.pk for order in orders]},
+            follow=True,
+        )
+
+    def test_action_moves_selected_orders(self):
+        first, second = self.place_order("ORD-A"), self.place_order("ORD-B")
+        response = self.run_action("move_to_ready_for_delivery", first, second)
+        self.assertContains(response, "Moved 2 order(s)")
+        self.assertEqual(
+            list(OrderStatusTransition.objects.values_list("note", flat=True)),
+            ["admin action", "admin action"],
+        )
+
+    def test_action_reports_invalid_orders(self):
+        first = self.place_order("ORD-A")
+        second = self.place_order("ORD-B", status="delivered")
+        response = self.run_action("move_to_ready_for_delivery", first, second)
+        self.assertContains(response, "cannot move to ready_for_delivery")
+        self.assertEqual(
+            self.statuses("ORD-A", "ORD-B"), {"ORD-A": "preparing", "ORD-B": "delivered"}
+        )
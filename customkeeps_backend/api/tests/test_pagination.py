@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..models import Order
+from ..pagination import CreatedAtCursorPagination, reverse_ordering
+from ..summaries import rebuild_order_summary
+from .base import PASSWORD, JWTClientMixin, clear_caches
+
+
+class DRFCursorPagination(CursorPagination):
+    """DRF's own implementation, with the settings of CreatedAtCursorPagination."""
+    ordering = CreatedAtCursorPagination.ordering
+    page_size = 2
+    page_size_query_param = CreatedAtCursorPagination.page_size_query_param
+    max_page_size = CreatedAtCursorPagination.max_page_size
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("paged")
+        Order.objects.bulk_create(
+            Order(user=user, order_id=f"ORD-{number}") for number in range(7)
+        )
+        # Ties on created_at make the cursors carry an offset
+        start = timezone.now()
+        for number, order in enumerate(Order.objects.order_by("id")):
+            Order.objects.filter(pk=order.pk).update(
+                created_at=start - timedelta(minutes=number // 3)
+            )
+        self.queryset = Order.objects.all()
+
+    def paginate(self, url, paginator_class, use_async=False):
+        request = Request(APIRequestFactory().get(url))
+        paginator = paginator_class()
+        if use_async:
+            page = async_to_sync(paginator.apaginate_queryset)(self.queryset, request)
+        else:
+            page = paginator.paginate_queryset(self.queryset, request)
+        return (
+            [order.order_id for order in page],
+            paginator.get_next_link(),
+            paginator.get_previous_link(),
+        )
+
+    def assert_matches_drf(self, url):
+        expected = self.paginate(url, DRFCursorPagination)
+        self.assertEqual(self.paginate(url, CreatedAtCursorPagination), expected)
+        self.assertEqual(self.paginate(url, CreatedAtCursorPagination, use_async=True), expected)
+        return expected
+
+    def test_pages_match_drf_both_ways(self):
+        seen, url = [], "/api/orders/?page_size=2"
+        while url:
+            page, url, previous = self.assert_matches_drf(url)
+            seen += page
+        self.assertCountEqual(seen, self.queryset.values_list("order_id", flat=True))
+
+        back = []
+        while previous:
+            page, _, previous = self.assert_matches_drf(previous)
+            back = page + back
+        self.assertEqual(back, seen[:len(back)])
+        self.assertGreater(len(back), 0)
+
+    def test_reverse_ordering(self):
+        self.assertEqual(reverse_ordering(("-created_at", "id")), ("created_at", "-id"))
+
+
+class OrderHistoryPaginationTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("history", password=PASSWORD)
+        self.other = User.objects.create_user("someone-else")
+        for number in range(5):
+            self.place_order(self.user, f"ORD-H{number}")
+        self.place_order(self.other, "ORD-OTHER")
+        self.login("history")
+
+    def place_order(self, user, order_id):
+        order = Order.objects.create(user=user, order_id=order_id)
+        rebuild_order_summary(order.pk)
+        return order
+
+    def walk(self, url, insert_after_first=None):
+        seen = []
+        while url:
+            page = self.api("get", url, status=200).json()
+            self.assertNotIn("count", page)
+            seen += [row["order_id"] for row in page["results"]]
+            url = page["next"]
+            if insert_after_first:
+                self.place_order(self.user, insert_after_first)
+                insert_after_first = None
+        return seen
+
+    def test_pages_are_newest_first_and_only_the_users(self):
+        expected = list(
+            Order.objects.filter(user=self.user)
+            .order_by("-created_at", "id").values_list("order_id", flat=True)
+        )
+        self.assertEqual(self.walk("/api/orders/?page_size=2"), expected)
+
+    def test_new_orders_do_not_shift_later_pages(self):
+        seen = self.walk("/api/orders/?page_size=2", insert_after_first="ORD-NEW")
+        # The new order sorts first, before the cursor; nothing repeats or is skipped
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+        self.assertNotIn("ORD-NEW", seen)
+        self.assertEqual(self.walk("/api/orders/?page_size=2")[0], "ORD-NEW")
+
+    def test_page_size_is_capped(self):
+        request = Request(APIRequestFactory().get("/api/orders/", {"page_size": 1000}))
+        self.assertEqual(CreatedAtCursorPagination().get_page_size(request), 100)
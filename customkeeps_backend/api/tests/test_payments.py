@@ -0,0 +1,161 @@
+import asyncio
+import socket
+import threading
+import time
+
+import stripe
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from customkeeps_backend.asgi import application
+
+from .. import payments
+from ..models import CartItem, Product
+from ..payments import (
+    PaymentsUnavailable,
+    _async_clients,
+    aclose_async_stripe_client,
+    acall_stripe,
+    call_stripe,
+    get_async_stripe_client,
+    get_stripe_client,
+)
+from .base import PASSWORD, JWTClientMixin, clear_caches
+
+
+def reset_stripe_pools(test):
+    """Rebuild the pooled client and bulkheads from the current settings."""
+    for cached in (get_stripe_client, payments._get_pool, payments._get_async_slots):
+        cached.cache_clear()
+        test.addCleanup(cached.cache_clear)
+
+
+class StripeBulkheadTests(SimpleTestCase):
+    def setUp(self):
+        self.enterContext(override_settings(
+            STRIPE_MAX_CONCURRENCY=1, STRIPE_MAX_QUEUED=1, STRIPE_ASYNC_MAX_CONCURRENCY=1,
+            STRIPE_CALL_DEADLINE=5,
+        ))
+        reset_stripe_pools(self)
+
+    def test_one_pooled_client(self):
+        client = get_stripe_client()
+        self.assertIs(get_stripe_client(), client)
+
+    def test_busy_pool_fails_fast(self):
+        release = threading.Event()
+        callers = [
+            threading.Thread(target=call_stripe, args=(release.wait,)) for _ in range(2)
+        ]
+        for caller in callers:
+            caller.start()
+        try:
+            # One call running and one queued fill the bulkhead
+            time.sleep(0.1)
+            started = time.monotonic()
+            with self.assertRaisesMessage(PaymentsUnavailable, "busy"):
+                call_stripe(lambda: None)
+            self.assertLess(time.monotonic() - started, 1)
+        finally:
+            release.set()
+            for caller in callers:
+                caller.join()
+        self.assertEqual(call_stripe(lambda: "ok"), "ok")
+
+    @override_settings(STRIPE_CALL_DEADLINE=0.05)
+    def test_deadline(self):
+        release = threading.Event()
+        try:
+            with self.assertRaisesMessage(PaymentsUnavailable, "timed out"):
+                call_stripe(release.wait)
+        finally:
+            release.set()
+
+    def test_connection_errors(self):
+        def unreachable():
+            raise stripe.APIConnectionError("connection refused")
+
+        with self.assertRaisesMessage(PaymentsUnavailable, "Could not reach"):
+            call_stripe(unreachable)
+
+        async def aunreachable():
+            unreachable()
+
+        with self.assertRaisesMessage(PaymentsUnavailable, "Could not reach"):
+            async_to_sync(acall_stripe)(aunreachable)
+
+    def test_async_cap_and_deadline(self):
+        async def scenario():
+            running = asyncio.create_task(acall_stripe(asyncio.sleep, 0.2))
+            await asyncio.sleep(0)
+            with self.assertRaisesMessage(PaymentsUnavailable, "busy"):
+                await acall_stripe(asyncio.sleep, 0)
+            await running
+            with override_settings(STRIPE_CALL_DEADLINE=0.01):
+                with self.assertRaisesMessage(PaymentsUnavailable, "timed out"):
+                    await acall_stripe(asyncio.sleep, 1)
+
+        async_to_sync(scenario)()
+
+
+class PaymentsUnavailableViewTests(JWTClientMixin, TestCase):
+    def setUp(self):
+        clear_caches()
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            closed_port = probe.getsockname()[1]
+        self.enterContext(override_settings(
+            STRIPE_API_BASE=f"http://127.0.0.1:{closed_port}",
+            STRIPE_SECRET_KEY="sk_test_unreachable",
+            STRIPE_MAX_NETWORK_RETRIES=0,
+        ))
+        reset_stripe_pools(self)
+        user = User.objects.create_user("blocked", password=PASSWORD)
+        product = Product.objects.first()
+        CartItem.objects.create(
+            user=user, product=product, product_name=product.name, price=product.price, quantity=1
+        )
+        self.login("blocked")
+
+    def test_unreachable_stripe_answers_503(self):
+        response = self.api("post", "/api/checkout/pay/", {}, status=503)
+        self.assertEqual(response["Retry-After"], "2")
+        self.assertIn("error", response.json())
+
+
+class AsyncStripeClientTests(SimpleTestCase):
+    def test_one_client_per_loop_until_closed(self):
+        async def scenario():
+            client = get_async_stripe_client()
+            self.assertIs(get_async_stripe_client(), client)
+            http_client = _async_clients[asyncio.get_running_loop()][1]
+
+            await aclose_async_stripe_client()
+            self.assertTrue(http_client._client_async.is_closed)
+            self.assertIsNot(get_async_stripe_client(), client)
+            await aclose_async_stripe_client()
+            # Nothing left to close
+            await aclose_async_stripe_client()
+
+        async_to_sync(scenario)()
+
+    def test_lifespan_shutdown_closes_client(self):
+        async def scenario():
+            get_async_stripe_client()
+            http_client = _async_clients[asyncio.get_running_loop()][1]
+
+            events = asyncio.Queue()
+            for event in ("lifespan.startup", "lifespan.shutdown"):
+                events.put_nowait({"type": event})
+            sent = []
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await application({"type": "lifespan", "asgi": {"version": "3.0"}}, events.get, send)
+            self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+            self.assertTrue(http_client._client_async.is_closed)
+            self.assertNotIn(asyncio.get_running_loop(), _async_clients)
+
+        async_to_sync(scenario)()
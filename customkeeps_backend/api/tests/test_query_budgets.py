@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from ..benchmarks import BENCH_COUPON, seed_benchmark_data
+from ..metrics import QueryBudgetExceeded, registry
+from .base import FAST_HASHERS, PASSWORD, JWTClientMixin, clear_caches, start_stripe_stub
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class QueryBudgetTests(JWTClientMixin, TestCase):
+    """
+    Every endpoint in API_QUERY_BUDGETS, requested the way a client does.
+    Strict mode is on under manage.py test, so a request that runs over its
+    budget raises QueryBudgetExceeded and fails the test.
+    """
+
+    def setUp(self):
+        clear_caches()
+        registry.reset()
+        seed_benchmark_data()
+        start_stripe_stub(self)
+
+    def register(self):
+        return self.api(
+            "post",
+            "/api/register/",
+            {"username": "shopper", "email": "shopper@example.com", "password": PASSWORD},
+        )
+
+    def test_strict_under_test(self):
+        self.assertTrue(settings.API_QUERY_BUDGET_STRICT)
+
+    def test_over_budget_raises(self):
+        budgets = {**settings.API_QUERY_BUDGETS, "POST register": 0}
+        with override_settings(API_QUERY_BUDGETS=budgets):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.register()
+
+    def test_every_budgeted_endpoint(self):
+        self.assertEqual(self.register().status_code, 201)
+        self.login("shopper")
+
+        products = self.api("get", "/api/products/", status=200).json()
+        first, second = products[0], products[1 % len(products)]
+        self.api(
+            "post",
+            "/api/cart/",
+            {"product_name": first["name"], "price": first["price"], "quantity": 2,
+             "base_color": "White", "customization_text": "first"},
+            status=201,
+        )
+        self.api(
+            "post",
+            "/api/cart/batch/",
+            {"operations": [{"op": "add", "product_name": second["name"], "price": second["price"],
+                             "quantity": 1, "base_color": "Black", "customization_text": "second"}]},
+            status=200,
+        )
+        self.api("get", "/api/cart/", status=200)
+        self.api("get", "/api/cart/quote/", {"coupon_code": BENCH_COUPON}, status=200)
+        self.api(
+            "post",
+            "/api/preview_coupon/",
+            {"coupon_code": BENCH_COUPON, "cart_total": "1000.00"},
+            status=200,
+        )
+        self.api(
+            "post",
+            "/api/quotes/",
+            {"carts": [{"lines": [{"product_name": first["name"], "quantity": 3}],
+                        "coupon_code": BENCH_COUPON}]},
+            status=200,
+        )
+        intent = self.api(
+            "post", "/api/checkout/pay/", {"coupon_code": BENCH_COUPON}, status=200
+        ).json()
+        order = self.api(
+            "post",
+            "/api/orders/create_from_cart/",
+            {"coupon_code": BENCH_COUPON, "payment_intent_id": intent["paymentIntentId"]},
+            status=201,
+        ).json()
+        orders = self.api("get", "/api/orders/", status=200).json()["results"]
+        self.api("get", f"/api/orders/{orders[0]['id']}/", status=200)
+
+        User.objects.create_user("staff", password=PASSWORD, is_staff=True)
+        self.login("staff")
+        self.api("get", "/api/reports/sales/", {"group_by": "date,status"}, status=200)
+        self.api("get", "/api/exports/orders/", status=200)
+        self.api(
+            "post",
+            "/api/fulfillment/transitions/",
+            {"order_ids": [order["order_id"]], "status": "ready_for_delivery"},
+            status=200,
+        )
+
+        self.assertEqual(set(settings.API_QUERY_BUDGETS) - set(registry.snapshot()), set())
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import DailyOrderRollup, DirtyRollupDay, Order, OrderItem
+from ..reports import (
+    date_runs,
+    flush_sales_rollups,
+    local_midnight,
+    mark_days_dirty,
+    rebuild_sales_rollups,
+    sales_report,
+)
+from .base import PASSWORD, JWTClientMixin, clear_caches
+
+
+class RollupTestMixin:
+    def setUp(self):
+        clear_caches()
+        self.customer = User.objects.create_user("buyer")
+        self.today = timezone.localdate()
+
+    def place_order(self, day, amount="10.00", status="preparing"):
+        order = Order.objects.create(
+            user=self.customer, order_id=f"ORD-{Order.objects.count()}", status=status,
+            total_amount=Decimal(amount), final_amount=Decimal(amount),
+        )
+        OrderItem.objects.create(
+            order=order, product_name="Keychain", price=Decimal(amount), quantity=1
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=local_midnight(day) + timedelta(hours=12))
+        return order
+
+    def orders_on(self, day):
+        rows = sales_report("orders", day, day, ["date"])
+        return rows[0]["order_count"] if rows else 0
+
+
+class DirtyDayTests(RollupTestMixin, TestCase):
+    def test_date_runs(self):
+        days = [self.today + timedelta(days=n) for n in (0, 1, 2, 5, 7, 8)]
+        self.assertEqual(
+            date_runs(days),
+            [(days[0], days[2]), (days[3], days[3]), (days[4], days[5])],
+        )
+
+    def test_flush_recomputes_only_dirty_days(self):
+        first, middle, last = (self.today - timedelta(days=n) for n in (4, 2, 0))
+        for day in (first, middle, last):
+            self.place_order(day)
+        rebuild_sales_rollups()
+        # A clean day whose rollup no longer matches its orders is left alone
+        DailyOrderRollup.objects.filter(date=middle).update(order_count=99)
+        self.place_order(first)
+        self.place_order(last)
+        Order.objects.filter(sales_recorded=False).update(sales_recorded=True)
+        mark_days_dirty([first, last])
+
+        self.assertEqual(flush_sales_rollups(), (0, 2))
+        self.assertEqual(self.orders_on(first), 2)
+        self.assertEqual(self.orders_on(last), 2)
+        self.assertEqual(self.orders_on(middle), 99)
+        self.assertFalse(DirtyRollupDay.objects.exists())
+
+    def test_query_count_does_not_grow_with_dirty_days(self):
+        days = [self.today - timedelta(days=n) for n in range(0, 12, 2)]
+        for day in days:
+            self.place_order(day)
+        rebuild_sales_rollups()
+
+        mark_days_dirty(days[:1])
+        with CaptureQueriesContext(connection) as one_day:
+            flush_sales_rollups()
+        mark_days_dirty(days)
+        with CaptureQueriesContext(connection) as six_days:
+            flush_sales_rollups()
+        self.assertEqual(len(six_days), len(one_day))
+        for day in days:
+            self.assertEqual(self.orders_on(day), 1)
+
+    def test_pending_command(self):
+        self.place_order(self.today)
+        out = StringIO()
+        call_command("rebuild_sales_rollups", "--pending", stdout=out)
+        self.assertIn("Added 1 pending orders", out.getvalue())
+        self.assertEqual(self.orders_on(self.today), 1)
+
+
+class ReportReadTests(RollupTestMixin, JWTClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.create_superuser("staff", password=PASSWORD)
+        self.login("staff")
+        self.place_order(self.today)
+        rebuild_sales_rollups()
+        self.place_order(self.today)
+        mark_days_dirty([self.today])
+
+    def test_report_reads_rollups_without_flushing(self):
+        rows = self.api("get", "/api/reports/sales/", status=200).json()["rows"]
+        self.assertEqual([row["order_count"] for row in rows], [1])
+        self.assertTrue(Order.objects.filter(sales_recorded=False).exists())
+        self.assertTrue(DirtyRollupDay.objects.exists())
+
+    def test_admin_pages_read_and_update_posts(self):
+        self.client.login(username="staff", password=PASSWORD)
+        for url in (
+            "/admin/api/dailyorderrollup/",
+            "/admin/api/dailysalesrollup/",
+            "/admin/api/dailyorderrollup/dashboard/",
+        ):
+            self.assertContains(self.client.get(url), "Update rollups")
+        self.assertTrue(Order.objects.filter(sales_recorded=False).exists())
+        self.assertEqual(self.client.get("/admin/api/dailyorderrollup/update/").status_code, 405)
+
+        dashboard = "/admin/api/dailyorderrollup/dashboard/"
+        response = self.client.post("/admin/api/dailyorderrollup/update/", {"next": dashboard})
+        self.assertRedirects(response, dashboard)
+        self.assertEqual(self.orders_on(self.today), 2)
+        self.assertFalse(DirtyRollupDay.objects.exists())
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Order, Product
+from ..routing import (
+    REPLICA_DB_ALIAS,
+    RoutingState,
+    _request_state,
+    is_pinned,
+    primary,
+    replica_configured,
+)
+from .base import PASSWORD, JWTClientMixin, clear_caches
+
+
+class ReplicaRoutingTests(JWTClientMixin, TransactionTestCase):
+    """
+    The replica alias mirrors the test database (the test runner), so routed
+    reads see the same rows and the alias a query ran on can be checked.
+    """
+
+    databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+    serialized_rollback = True
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("reader", password=PASSWORD)
+        self.order = Order.objects.create(user=self.user, order_id="ORD-REPLICA")
+        self.login("reader")
+
+    def route(self, replica=True, wrote=False):
+        state = RoutingState()
+        state.replica, state.wrote = replica, wrote
+        token = _request_state.set(state)
+        self.addCleanup(_request_state.reset, token)
+
+    def replica_queries(self, method, path, data=None):
+        with CaptureQueriesContext(connections[REPLICA_DB_ALIAS]) as queries:
+            response = self.api(method, path, data)
+        self.assertLess(response.status_code, 400)
+        return len(queries)
+
+    def add_to_cart(self):
+        product = Product.objects.first()
+        self.replica_queries("post", "/api/cart/", {"product_name": product.name, "quantity": 1})
+
+    def test_replica_is_test_mirror(self):
+        self.assertTrue(replica_configured())
+        self.assertEqual(
+            connections[REPLICA_DB_ALIAS].settings_dict["NAME"],
+            connections[DEFAULT_DB_ALIAS].settings_dict["NAME"],
+        )
+
+    def test_reads_default_outside_requests(self):
+        self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_reads_replica_when_allowed(self):
+        self.route()
+        self.assertEqual(Product.objects.all().db, REPLICA_DB_ALIAS)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).order_id, "ORD-REPLICA")
+
+    def test_reads_primary_after_write_in_primary_and_in_transaction(self):
+        self.route()
+        with primary():
+            self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+        with transaction.atomic():
+            self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+        Order.objects.filter(pk=self.order.pk).update(status="delivered")
+        self.assertEqual(Product.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_writes_go_to_primary(self):
+        self.route()
+        self.assertEqual(Order.objects.create(user=self.user, order_id="ORD-2")._state.db, DEFAULT_DB_ALIAS)
+
+    def test_order_detail_reads_replica(self):
+        self.assertGreater(self.replica_queries("get", f"/api/orders/{self.order.pk}/"), 0)
+        self.assertFalse(is_pinned(self.user.pk))
+
+    def test_write_pins_user_to_primary(self):
+        self.add_to_cart()
+        self.assertTrue(is_pinned(self.user.pk))
+        self.assertEqual(self.replica_queries("get", f"/api/orders/{self.order.pk}/"), 0)
+
+    @override_settings(DATABASE_REPLICA_STICKY_SECONDS=0)
+    def test_pin_expires(self):
+        self.add_to_cart()
+        self.assertGreater(self.replica_queries("get", f"/api/orders/{self.order.pk}/"), 0)
@@ -0,0 +1,119 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .. import thumbnails
+from ..assets import get_design_asset_storage, store_design_bytes
+from ..models import DesignAsset
+from ..thumbnails import cached_thumbnail
+
+
+def png_bytes(size=(400, 300)):
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, (200, 10, 10, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class DesignStorageMixin:
+    """Keep design assets and thumbnails in a temporary directory."""
+
+    def use_temporary_design_storage(self):
+        root = tempfile.mkdtemp(prefix="design-test-")
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.enterContext(override_settings(
+            DESIGN_ASSET_STORAGE={
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": f"{root}/assets"},
+            },
+            DESIGN_THUMBNAIL_ROOT=f"{root}/thumbnails",
+        ))
+        get_design_asset_storage.cache_clear()
+        self.addCleanup(get_design_asset_storage.cache_clear)
+        # The model field resolved its storage at import time
+        self.enterContext(patch.object(
+            DesignAsset._meta.get_field("file"), "storage", get_design_asset_storage()
+        ))
+
+
+class DesignThumbnailTests(DesignStorageMixin, TestCase):
+    def setUp(self):
+        self.use_temporary_design_storage()
+
+    def thumbnail(self, asset, size=100, fmt="webp"):
+        return self.client.get(f"/api/design-assets/{asset.sha256}/thumb/{size}.{fmt}")
+
+    def test_renders_and_caches(self):
+        asset = store_design_bytes(png_bytes())
+        response = self.thumbnail(asset)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertEqual(Image.open(io.BytesIO(b"".join(response.streaming_content))).size, (100, 75))
+        self.assertIsNotNone(cached_thumbnail(asset.sha256, 100, "webp"))
+
+    def test_cached_thumbnail_served_without_database(self):
+        asset = store_design_bytes(png_bytes())
+        self.assertEqual(self.thumbnail(asset, fmt="jpg").status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.thumbnail(asset, fmt="jpg")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        # JPEG has no alpha channel; the transparent design is flattened
+        self.assertEqual(Image.open(io.BytesIO(b"".join(response.streaming_content))).mode, "RGB")
+
+    def test_immutable_caching_and_not_modified(self):
+        asset = store_design_bytes(png_bytes())
+        response = self.thumbnail(asset)
+        etag = f'"{asset.sha256}-100.webp"'
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                f"/api/design-assets/{asset.sha256}/thumb/100.webp", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_unknown_specs_and_assets(self):
+        asset = store_design_bytes(png_bytes())
+        self.assertEqual(self.thumbnail(asset, size=101).status_code, 404)
+        self.assertEqual(self.thumbnail(asset, fmt="png").status_code, 404)
+        missing = DesignAsset(sha256="0" * 64)
+        self.assertEqual(self.thumbnail(missing).status_code, 404)
+
+    def test_evicted_after_lookup(self):
+        asset = store_design_bytes(png_bytes())
+        self.assertEqual(self.thumbnail(asset).status_code, 200)
+        path = cached_thumbnail(asset.sha256, 100, "webp")
+        with patch("api.views.cached_thumbnail", return_value=path):
+            os.unlink(path)
+            response = self.thumbnail(asset)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(path))
+
+    @override_settings(DESIGN_THUMBNAIL_EVICTION_INTERVAL=100)
+    def test_eviction_scans_only_past_the_limit(self):
+        asset = store_design_bytes(png_bytes())
+        with patch.dict(thumbnails._tracked, {"bytes": 0, "renders": 0}), patch(
+            "api.thumbnails.evict_thumbnails", wraps=thumbnails.evict_thumbnails
+        ) as evict:
+            for size in (60, 80):
+                self.assertEqual(self.thumbnail(asset, size).status_code, 200)
+            self.assertEqual(evict.call_count, 0)
+
+            with override_settings(DESIGN_THUMBNAIL_CACHE_MAX_BYTES=1):
+                self.assertEqual(self.thumbnail(asset, 300).status_code, 200)
+            self.assertEqual(evict.call_count, 1)
+            self.assertIsNone(cached_thumbnail(asset.sha256, 60, "webp"))
+            self.assertEqual(thumbnails._tracked["renders"], 0)
+
+    def test_undecodable_asset(self):
+        asset = store_design_bytes(png_bytes()[:60])
+        self.assertEqual(self.thumbnail(asset).status_code, 422)
+
+    def test_decompression_bomb(self):
+        asset = store_design_bytes(png_bytes())
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            self.assertEqual(self.thumbnail(asset, fmt="jpg").status_code, 422)
@@ -0,0 +1,170 @@
+"""
+Sized thumbnails of design assets.
+
+Thumbnails are rendered with Pillow on first request, written to a local
+disk cache (``settings.DESIGN_THUMBNAIL_ROOT``) and reused afterwards. The
+cache is bounded by ``settings.DESIGN_THUMBNAIL_CACHE_MAX_BYTES``; when it
+grows past the limit the least recently used files are evicted. Each process
+keeps a running total of the cache size, so the directory is only walked
+when that total passes the limit or every few renders. Since a
+thumbnail is derived from immutable, content-addressed bytes, its URL never
+changes meaning and can be cached by browsers forever.
+"""
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpg": ("JPEG", "image/jpeg"),
+}
+
+_eviction_lock = threading.Lock()
+# Bytes this process believes the cache holds (None until the first scan),
+# and renders since the last scan, which other processes' renders may add to
+_tracked = {"bytes": None, "renders": 0}
+
+
+class UnsupportedThumbnail(ValueError):
+    """Raised for a size or format that is not in the allowed set."""
+
+
+class UnrenderableAsset(ValueError):
+    """Raised when an asset's bytes can't be decoded into a thumbnail."""
+
+
+def thumbnail_path(sha256: str, size: int, fmt: str) -> str:
+    return os.path.join(
+        settings.DESIGN_THUMBNAIL_ROOT, sha256[:2], f"{sha256}-{size}.{fmt}"
+    )
+
+
+def thumbnail_etag(sha256: str, size: int, fmt: str) -> str:
+    return f'"{sha256}-{size}.{fmt}"'
+
+
+def validate_thumbnail_spec(size: int, fmt: str):
+    if size not in settings.DESIGN_THUMBNAIL_SIZES:
+        raise UnsupportedThumbnail(f"Unsupported thumbnail size: {size}")
+    if fmt not in THUMBNAIL_FORMATS:
+        raise UnsupportedThumbnail(f"Unsupported thumbnail format: {fmt}")
+
+
+def cached_thumbnail(sha256: str, size: int, fmt: str):
+    """Return the cached thumbnail path, or None if it has not been rendered."""
+    path = thumbnail_path(sha256, size, fmt)
+    try:
+        # Touch so eviction sees this file as recently used
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def render_thumbnail(asset, size: int, fmt: str) -> str:
+    """Render ``asset`` into the thumbnail cache and return the file path."""
+    validate_thumbnail_spec(size, fmt)
+    pil_format, _ = THUMBNAIL_FORMATS[fmt]
+    path = thumbnail_path(asset.sha256, size, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    try:
+        with asset.file.open("rb") as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size), Image.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        # Uploads are only sniffed, so a truncated file or a decompression
+        # bomb (Pillow's MAX_IMAGE_PIXELS) gets this far
+        raise UnrenderableAsset(f"Design asset {asset.sha256} can't be rendered: {e}") from e
+
+    if pil_format == "JPEG" and image.mode != "RGB":
+        # JPEG has no alpha channel; flatten onto white like the site background
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+
+    # Write to a temp file and rename so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            image.save(out, pil_format, quality=settings.DESIGN_THUMBNAIL_QUALITY)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    note_thumbnail_written(path)
+    return path
+
+
+def note_thumbnail_written(path: str):
+    """
+    Count a new thumbnail towards the cache size, and scan the cache for
+    eviction only when the count passes the limit, or every
+    ``DESIGN_THUMBNAIL_EVICTION_INTERVAL`` renders to catch other processes.
+    """
+    with _eviction_lock:
+        _tracked["renders"] += 1
+        if _tracked["bytes"] is not None:
+            _tracked["bytes"] += os.path.getsize(path)
+        due = (
+            _tracked["bytes"] is None
+            or _tracked["bytes"] > settings.DESIGN_THUMBNAIL_CACHE_MAX_BYTES
+            or _tracked["renders"] >= settings.DESIGN_THUMBNAIL_EVICTION_INTERVAL
+        )
+    if due:
+        # Keep the new file: the caller is about to serve it
+        evict_thumbnails(keep=path)
+
+
+def evict_thumbnails(max_bytes=None, keep=None):
+    """
+    Delete least recently used thumbnails, other than ``keep``, until the
+    cache fits its budget.
+    """
+    if max_bytes is None:
+        max_bytes = settings.DESIGN_THUMBNAIL_CACHE_MAX_BYTES
+
+    with _eviction_lock:
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(settings.DESIGN_THUMBNAIL_ROOT):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total > max_bytes:
+            # Evict down to 90% so the next scan isn't due right away
+            target = max_bytes * 0.9
+            for _, file_size, path in sorted(entries):
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= file_size
+
+        _tracked["bytes"] = total
+        _tracked["renders"] = 0
+
+
+def design_thumbnail_url(sha256: str, size: int, fmt: str = "webp", request=None) -> str:
+    url = reverse("design-asset-thumbnail", args=[sha256, size, fmt])
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
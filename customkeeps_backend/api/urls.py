@@ -1,14 +1,24 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     RegisterView,
+    TokenObtainView,
     ProductViewSet,
     OrderViewSet,
     CartViewSet,
+    DesignAssetUploadView,
+    design_asset_view,
+    design_thumbnail_view,
+    metrics_view,
+    order_export_view,
+    order_transition_view,
     pay_view,
     preview_coupon,
+    quote_view,
+    sales_report_view,
 )
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
@@ -17,9 +27,33 @@ router.register(r'cart', CartViewSet, basename='cart')
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/', TokenObtainView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('checkout/pay/', pay_view, name='checkout-pay'),
     path('preview_coupon/', preview_coupon, name='preview_coupon'),
+    path('quotes/', quote_view, name='quotes'),
+    path('design-assets/', DesignAssetUploadView.as_view(), name='design-asset-upload'),
+    path('design-assets/<str:sha256>/', design_asset_view, name='design-asset-detail'),
+    path(
+        'design-assets/<str:sha256>/thumb/<int:size>.<str:fmt>',
+        design_thumbnail_view,
+        name='design-asset-thumbnail',
+    ),
+    path('metrics/', metrics_view, name='api-metrics'),
+    path('reports/sales/', sales_report_view, name='api-sales-report'),
+    path('exports/orders/', order_export_view, name='api-order-export'),
+    path('fulfillment/transitions/', order_transition_view, name='api-order-transitions'),
     path('', include(router.urls)),
 ]
+
+if settings.ASGI_MODE:
+    # Async versions of the I/O-bound endpoints, under the same names; they
+    # shadow the views above (see async_views.py)
+    from . import async_views
+
+    urlpatterns = [
+        path('checkout/pay/', async_views.pay_view, name='checkout-pay'),
+        path('preview_coupon/', async_views.preview_coupon, name='preview_coupon'),
+        path('products/', async_views.product_list, name='product-list'),
+        path('orders/', async_views.order_list, name='order-list'),
+    ] + urlpatterns
@@ -1,40 +1,72 @@
-from decimal import Decimal
+import csv
 import uuid
+from decimal import Decimal
 
-import stripe
-from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from django.utils import timezone
 
 from rest_framework import generics, viewsets, status
-from rest_framework.decorators import api_view, permission_classes, action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-
-from .models import Product, Order, OrderItem, CartItem, Coupon
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from .assets import is_sha256
+from .catalog import catalog_response
+from .exports import EXPORT_FORMATS, export_order_lines, render_export
+from .fulfillment import InvalidTransition, transition_orders
+from .hashing import HashingUnavailable
+from .payments import PaymentsUnavailable
+from .pricing import quote_carts
+from .reports import REPORTS, sales_report
+from .routing import ReplicaReadsMixin
+from .summaries import cached_order_history, record_order_summary
+from .pagination import CartCursorPagination, CreatedAtCursorPagination
+from .cart import add_cart_line, apply_cart_operations, quote_cart_lines
+from .checkout import checkout_payment_intent, forget_checkout_intent
+from .coupons import resolve_coupon
+from .metrics import registry
+from .models import Product, Order, OrderItem, OrderSummary, CartItem, DesignAsset
+from .thumbnails import (
+    THUMBNAIL_FORMATS,
+    UnrenderableAsset,
+    UnsupportedThumbnail,
+    cached_thumbnail,
+    render_thumbnail,
+    thumbnail_etag,
+    validate_thumbnail_spec,
+)
 from .serializers import (
     RegisterSerializer,
     ProductSerializer,
     OrderSerializer,
+    OrderListSerializer,
+    OrderSummarySerializer,
     CartItemSerializer,
+    CartBatchSerializer,
+    DesignAssetSerializer,
+    OrderExportQuerySerializer,
+    OrderTransitionSerializer,
+    QuoteRequestSerializer,
+    SalesReportQuerySerializer,
 )
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
-
-
-def apply_tiered_pricing(unit_price: Decimal, quantity: int) -> Decimal:
-    subtotal = unit_price * quantity
-
-    if quantity >= 10:
-        discount_rate = Decimal("0.10")
-    elif quantity >= 5:
-        discount_rate = Decimal("0.05")
-    else:
-        discount_rate = Decimal("0.00")
-
-    return subtotal * (Decimal("1.00") - discount_rate)
-
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -47,137 +79,335 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
 
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except HashingUnavailable as e:
+            return hashing_unavailable_response(e)
+
+
+class TokenObtainView(TokenObtainPairView):
+    """
+    POST /api/token/
+    Body: { "username": "...", "password": "..." }
+    The password is checked on the hashing pool; 503 when it is saturated.
+    """
+
+    def post(self, request, *args, **kwargs):
+        try:
+            return super().post(request, *args, **kwargs)
+        except HashingUnavailable as e:
+            return hashing_unavailable_response(e)
+
+
+def hashing_unavailable_response(error):
+    return Response(
+        {"error": str(error)},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+class DesignAssetUploadView(generics.CreateAPIView):
+    """
+    Upload a design image once and reference it from cart lines.
+
+    POST /api/design-assets/
+    Body: multipart ``file`` or JSON { "data_url": "data:image/png;base64,..." }
+    Identical uploads resolve to the same asset (SHA-256 of the bytes).
+    """
+    queryset = DesignAsset.objects.all()
+    serializer_class = DesignAssetSerializer
+    permission_classes = [IsAuthenticated]
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get("If-None-Match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+def immutable_response(response, etag):
+    """Mark a response for content-addressed bytes as cacheable forever."""
+    response["ETag"] = etag
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def design_asset_view(request, sha256):
+    """Serve the original bytes of a design asset."""
+    if not is_sha256(sha256):
+        raise Http404
+    etag = f'"{sha256}"'
+    if etag_matches(request, etag):
+        return immutable_response(HttpResponseNotModified(), etag)
+    try:
+        asset = DesignAsset.objects.get(pk=sha256)
+    except DesignAsset.DoesNotExist:
+        raise Http404
+    response = FileResponse(asset.file.open("rb"), content_type=asset.content_type)
+    return immutable_response(response, etag)
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def design_thumbnail_view(request, sha256, size, fmt):
+    """
+    Serve a sized thumbnail of a design asset.
+
+    GET /api/design-assets/<sha256>/thumb/<size>.<webp|jpg>
+    Rendered once, then served from the on-disk thumbnail cache.
+    """
+    if not is_sha256(sha256):
+        raise Http404
+    try:
+        validate_thumbnail_spec(size, fmt)
+    except UnsupportedThumbnail:
+        raise Http404
+
+    etag = thumbnail_etag(sha256, size, fmt)
+    if etag_matches(request, etag):
+        return immutable_response(HttpResponseNotModified(), etag)
+
+    thumbnail = None
+    path = cached_thumbnail(sha256, size, fmt)
+    if path is not None:
+        try:
+            thumbnail = open(path, "rb")
+        except FileNotFoundError:
+            # Evicted since the lookup; render it again
+            pass
+    if thumbnail is None:
+        try:
+            asset = DesignAsset.objects.get(pk=sha256)
+        except DesignAsset.DoesNotExist:
+            raise Http404
+        try:
+            thumbnail = open(render_thumbnail(asset, size, fmt), "rb")
+        except UnrenderableAsset:
+            return Response(
+                {"error": "This design image can't be rendered."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+    response = FileResponse(thumbnail, content_type=THUMBNAIL_FORMATS[fmt][1])
+    return immutable_response(response, etag)
+
+
+class ProductViewSet(ReplicaReadsMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        """Serve the catalog from the versioned cache (see catalog.py)."""
+        return catalog_response(request, self.render_catalog)
+
+    def render_catalog(self):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return JSONRenderer().render(serializer.data)
+
+
+class SparseFieldsetMixin:
+    """
+    List responses accept ``?fields=a,b`` (sparse fieldset) and
+    ``?expand=x`` (opt-in heavy fields), and only load the columns the
+    resulting serializer needs.
+    """
+    list_serializer = None
+
+    def get_query_list(self, name):
+        value = self.request.query_params.get(name, "")
+        return [part.strip() for part in value.split(",") if part.strip()]
+
+    def get_serializer_class(self):
+        if self.action == "list" and self.list_serializer is not None:
+            return self.list_serializer
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "list":
+            kwargs.setdefault("fields", self.get_query_list("fields"))
+            kwargs.setdefault("expand", self.get_query_list("expand"))
+        return super().get_serializer(*args, **kwargs)
 
-class CartViewSet(viewsets.ModelViewSet):
+    def get_list_columns(self, serializer):
+        """Columns to load for a list page: serializer fields plus the cursor keys."""
+        columns = set(serializer.get_model_field_names())
+        ordering = getattr(self.pagination_class, "ordering", ())
+        columns.update(field.lstrip("-") for field in ordering)
+        return sorted(columns)
+
+
+class CartViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = CartItemSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CartCursorPagination
 
     def get_queryset(self):
-        return CartItem.objects.filter(user=self.request.user)
+        queryset = CartItem.objects.filter(user_id=self.request.user.id)
+        if self.action == "list":
+            queryset = queryset.only(*self.get_list_columns(self.get_serializer()))
+        return queryset
 
     def create(self, request, *args, **kwargs):
-        existing_item = CartItem.objects.filter(
-            user=request.user,
-            product_name=request.data.get("product_name"),
-            base_color=request.data.get("base_color"),
-            customization_text=request.data.get("customization_text", ""),
-            design_image_url=request.data.get("design_image_url", ""),
-        ).first()
-
-        if existing_item:
-            existing_item.quantity += int(request.data.get("quantity", 1))
-            existing_item.save()
-            serializer = self.get_serializer(existing_item)
+        # Validate first so inline data URLs are already resolved to assets
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        item, created = add_cart_line(request.user.id, serializer.validated_data)
+
+        serializer = self.get_serializer(item)
+        if not created:
             return Response(serializer.data, status=status.HTTP_200_OK)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-        return super().create(request, *args, **kwargs)
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError("An identical item is already in your cart.")
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """
+        Apply many cart changes atomically in one request.
+
+        POST /api/cart/batch/
+        Body: { "operations": [
+            { "op": "add", "product_name": "...", "price": "...", "quantity": 2, ... },
+            { "op": "update", "id": 12, "quantity": 3 },
+            { "op": "remove", "id": 13 }
+        ] }
+        Returns the resulting cart.
+        """
+        batch = CartBatchSerializer(data=request.data, context=self.get_serializer_context())
+        batch.is_valid(raise_exception=True)
+        items = apply_cart_operations(request.user.id, batch.validated_data["operations"])
+        serializer = self.get_serializer(items, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def quote(self, request):
+        """Line-by-line price breakdown of the cart; ``?coupon_code=`` applies a coupon."""
+        quote = quote_cart_lines(list(self.get_queryset()), request.query_params.get("coupon_code"))
+        return Response(quote.as_dict())
 
     @action(detail=False, methods=["delete"])
     def clear(self, request):
-        CartItem.objects.filter(user=request.user).delete()
-        return Response(
-            {"message": "Cart cleared"},
-            status=status.HTTP_204_NO_CONTENT,
-        )
+        CartItem.objects.filter(user_id=request.user.id).delete()
+        # 204 carries no body; uvicorn rejects one and keep-alive clients desync
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+class OrderViewSet(ReplicaReadsMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderSerializer
+    list_serializer = OrderSummarySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_serializer_class(self):
+        # Order lines aren't in the summary; ?expand=items lists the orders themselves
+        if self.action == "list" and "items" in self.get_query_list("expand"):
+            return OrderListSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        """
+        Summary pages are cached per user (invalidated on any change to the
+        user's orders); ``?expand=items`` pages are always read fresh.
+        """
+        if self.get_serializer_class() is not self.list_serializer:
+            return super().list(request, *args, **kwargs)
+        data = cached_order_history(
+            request.user.id,
+            request.build_absolute_uri(),
+            lambda: super(OrderViewSet, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data)
 
     def get_queryset(self):
-        return (
-            Order.objects.filter(user=self.request.user)
-            .prefetch_related("items")
-        )
+        if self.action != "list":
+            return Order.objects.filter(user_id=self.request.user.id).prefetch_related("items")
+
+        serializer = self.get_serializer()
+        columns = self.get_list_columns(serializer)
+        if serializer.Meta.model is OrderSummary:
+            return OrderSummary.objects.filter(user_id=self.request.user.id).only(*columns)
+
+        queryset = Order.objects.filter(user_id=self.request.user.id).only(*columns)
+        if "items" in serializer.fields:
+            item_fields = serializer.fields["items"].child.get_model_field_names()
+            queryset = queryset.prefetch_related(
+                Prefetch("items", queryset=OrderItem.objects.only("order", *item_fields))
+            )
+        return queryset
 
     @transaction.atomic
     @action(detail=False, methods=["post"])
     def create_from_cart(self, request):
-        cart_items = CartItem.objects.filter(user=request.user)
+        # Materialize the cart once, locking its rows so a concurrent
+        # checkout of the same cart blocks here and then finds it empty
+        cart_items = list(
+            CartItem.objects.select_for_update().filter(user_id=request.user.id)
+        )
 
-        if not cart_items.exists():
+        if not cart_items:
             return Response(
                 {"error": "Cart is empty"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 1) Raw subtotal BEFORE any discounts
-        raw_subtotal = sum(item.price * item.quantity for item in cart_items)
-
-        # 2) Subtotal AFTER bulk (tiered) discount
-        line_totals_after_bulk = [
-            apply_tiered_pricing(item.price, item.quantity) for item in cart_items
+        # Same pricing as checkout/pay: current catalog prices, bulk tier
+        # per line, then the coupon on the bulk-discounted subtotal. Items
+        # keep the effective per-unit price AFTER bulk discount.
+        quote = quote_cart_lines(cart_items, request.data.get("coupon_code"))
+        if quote.amount_cents <= 0:
+            return Response(
+                {"error": "Invalid payment amount."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        order_items = [
+            OrderItem(
+                product_id=line.item.product_id,
+                product_name=line.item.product_name,
+                price=line.unit_price_after_bulk,
+                quantity=line.quantity,
+                base_color=line.item.base_color,
+                customization_text=line.item.customization_text,
+                design_image_url=line.item.design_image_url,
+                design_asset_id=line.item.design_asset_id,
+            )
+            for line in quote.lines
         ]
-        subtotal_after_bulk = sum(line_totals_after_bulk)
-
-        # Bulk discount = difference between raw and bulked subtotal
-        bulk_discount = raw_subtotal - subtotal_after_bulk
-
-        coupon_code = request.data.get("coupon_code", "").upper()
-        coupon_discount = Decimal("0.00")
-
-        if coupon_code:
-            now = timezone.now()
-            try:
-                coupon = Coupon.objects.get(
-                    code__iexact=coupon_code,
-                    active=True,
-                    valid_from__lte=now,
-                    valid_to__gte=now,
-                )
-                coupon_discount = subtotal_after_bulk * (
-                    coupon.discount_percent / Decimal("100")
-                )
-            except Coupon.DoesNotExist:
-                coupon = None
-        else:
-            coupon = None
-
-        # 3) Total discount = bulk + coupon
-        total_discount = bulk_discount + coupon_discount
-
-        # 4) Final amount actually charged
-        final_amount = raw_subtotal - total_discount
-
-        # 5) Persist order
+
+        # Persist the order
         order = Order.objects.create(
-            user=request.user,
+            user_id=request.user.id,
             order_id=str(uuid.uuid4())[:8].upper(),
-            total_amount=raw_subtotal,
-            discount_amount=total_discount,
-            final_amount=final_amount,
-            coupon_code=coupon_code if coupon else "",
+            total_amount=quote.raw_subtotal,
+            discount_amount=quote.total_discount,
+            final_amount=quote.final_amount,
+            coupon_code=quote.coupon.code if quote.coupon else "",
             payment_intent_id=request.data.get("payment_intent_id", ""),
         )
 
-        # Save items with effective per‑unit price AFTER bulk discount
-        for cart_item in cart_items:
-            line_total_after_bulk = apply_tiered_pricing(
-                cart_item.price, cart_item.quantity
-            )
-            effective_unit_price = line_total_after_bulk / cart_item.quantity
-
-            OrderItem.objects.create(
-                order=order,
-                product_name=cart_item.product_name,
-                price=effective_unit_price,
-                quantity=cart_item.quantity,
-                base_color=cart_item.base_color,
-                customization_text=cart_item.customization_text,
-                design_image_url=cart_item.design_image_url,
-            )
+        # One INSERT for all items, one DELETE for exactly the lines ordered
+        for order_item in order_items:
+            order_item.order = order
+        OrderItem.objects.bulk_create(order_items)
+        record_order_summary(order, order_items, username=request.user.username)
+        CartItem.objects.filter(pk__in=[item.pk for item in cart_items]).delete()
+        transaction.on_commit(lambda: forget_checkout_intent(request.user.id))
 
-        cart_items.delete()
         serializer = self.get_serializer(order)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -185,66 +415,225 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def preview_coupon(request):
-    coupon_code = request.data.get("coupon_code", "").upper()
-    cart_total = Decimal(str(request.data.get("cart_total", "0")))
-    now = timezone.now()
+    """
+    Price the user's cart with a coupon applied. The discount is computed
+    server-side from the cart; ``cart_total`` from older clients is ignored.
+    """
+    coupon = resolve_coupon(request.data.get("coupon_code"))
 
-    try:
-        coupon = Coupon.objects.get(
-            code__iexact=coupon_code,
-            active=True,
-            valid_from__lte=now,
-            valid_to__gte=now,
-        )
-        discount_percent = float(coupon.discount_percent)
-        discount_amount = float(cart_total) * (discount_percent / 100)
-        return Response(
-            {
-                "valid": True,
-                "discount_percent": discount_percent,
-                "discount_amount": discount_amount,
-            }
-        )
-    except Coupon.DoesNotExist:
+    if coupon is None:
         return Response(
             {"valid": False, "error": "Invalid coupon code."},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    quote = quote_cart_lines(list(CartItem.objects.filter(user_id=request.user.id)), coupon.code)
+    return Response(coupon_preview_data(coupon, quote))
+
+
+def coupon_preview_data(coupon, quote):
+    return {
+        "valid": True,
+        "discount_percent": float(coupon.discount_percent),
+        "discount_amount": float(quote.coupon_discount),
+        "subtotal_after_bulk": str(quote.subtotal_after_bulk),
+        "final_amount": str(quote.final_amount),
+    }
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def quote_view(request):
+    """
+    Price one or more carts of catalog products without touching the user's
+    cart, e.g. for bulk (B2B) quotes.
+
+    POST /api/quotes/
+    Body: { "carts": [
+        { "lines": [{ "product_name": "...", "quantity": 250 }, ...],
+          "coupon_code": "..." },
+        ...
+    ] }
+    Returns { "quotes": [...] } with a line breakdown for each cart.
+    """
+    serializer = QuoteRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    quotes = quote_carts(
+        (cart["lines"], cart.get("coupon_code")) for cart in serializer.validated_data["carts"]
+    )
+    return Response({"quotes": [quote.as_dict() for quote in quotes]})
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def pay_view(request):
+    """
+    Create (or reuse) the PaymentIntent for the user's current cart.
+
+    The amount is computed server-side from the cart with the same pricing
+    as create_from_cart; only the coupon code comes from the client.
+    Paying again for an unchanged cart returns the cached intent without a
+    Stripe round trip (see checkout.py for how it stays payable).
+    """
     try:
-        amount_php = float(request.data.get("amount", 0))
-        coupon_code = str(request.data.get("coupon_code", "") or "").upper()
-        amount_cents = int(amount_php * 100)
+        cart_items = list(CartItem.objects.filter(user_id=request.user.id))
+        if not cart_items:
+            return Response(
+                {"error": "Cart is empty"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        if amount_cents <= 0:
+        quote = quote_cart_lines(cart_items, request.data.get("coupon_code"))
+        if quote.amount_cents <= 0:
             return Response(
                 {"error": "Invalid payment amount."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        payment_intent = stripe.PaymentIntent.create(
-            amount=amount_cents,
-            currency="php",
-            automatic_payment_methods={"enabled": True},
-            metadata={
-                "user_id": request.user.id,
-                "username": request.user.username,
-                "coupon_code": coupon_code,
-            },
-        )
+        payment_intent = checkout_payment_intent(request.user, cart_items, quote)
+
+        return Response(payment_intent_data(payment_intent, quote), status=status.HTTP_200_OK)
+    except ValidationError:
+        raise
+    except PaymentsUnavailable as e:
         return Response(
-            {
-                "clientSecret": payment_intent["client_secret"],
-                "paymentIntentId": payment_intent["id"],
-            },
-            status=status.HTTP_200_OK,
+            {"error": str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "2"},
         )
     except Exception as e:
         return Response(
             {"error": str(e)},
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+
+def payment_intent_data(payment_intent, quote):
+    return {
+        "clientSecret": payment_intent["client_secret"],
+        "paymentIntentId": payment_intent["id"],
+        "amount": str(quote.final_amount),
+    }
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Per-endpoint request metrics collected by this process since start-up
+    (or the last reset): counts, query counts, DB/serializer time, response
+    size and latency percentiles. DELETE resets the counters.
+    """
+    if request.method == "DELETE":
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(registry.snapshot())
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def sales_report_view(request):
+    """
+    Sales totals from the daily rollups, for staff.
+
+    GET /api/reports/sales/?report=orders|products&start=YYYY-MM-DD
+        &end=YYYY-MM-DD&group_by=date,product_name&output=json|csv
+    Defaults: the orders report for the last 30 days, grouped by date.
+    Reads the rollups as of their last update (``manage.py
+    rebuild_sales_rollups --pending`` or the admin), never writes them.
+    """
+    serializer = SalesReportQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    rows = sales_report(params["report"], params["start"], params["end"], params["group_by"])
+
+    if params["output"] == "csv":
+        columns = params["group_by"] + REPORTS[params["report"]][2]
+        response = HttpResponse(content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = (
+            f'attachment; filename="{params["report"]}-{params["start"]}-{params["end"]}.csv"'
+        )
+        writer = csv.DictWriter(response, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+        return response
+
+    return Response(
+        {
+            "report": params["report"],
+            "start": params["start"],
+            "end": params["end"],
+            "group_by": params["group_by"],
+            "rows": [
+                {name: str(value) if isinstance(value, Decimal) else value for name, value in row.items()}
+                for row in rows
+            ],
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def order_export_view(request):
+    """
+    Stream order lines for fulfillment, for staff.
+
+    GET /api/exports/orders/?status=preparing,ready_for_delivery
+        &start=YYYY-MM-DD&end=YYYY-MM-DD&output=csv|ndjson
+    One row per order line, oldest first; designs are exported as asset
+    references, never as inline image data.
+    """
+    serializer = OrderExportQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+
+    rows = export_order_lines(
+        statuses=params.get("status"),
+        start=params.get("start"),
+        end=params.get("end"),
+        request=request,
+    )
+    output = params["output"]
+    response = StreamingHttpResponse(
+        render_export(rows, output), content_type=EXPORT_FORMATS[output]
+    )
+    stamp = timezone.localtime().strftime("%Y%m%d-%H%M%S")
+    response["Content-Disposition"] = f'attachment; filename="orders-{stamp}.{output}"'
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def order_transition_view(request):
+    """
+    Move a batch of orders to the next fulfillment status, for staff.
+
+    POST /api/fulfillment/transitions/
+    Body: { "order_ids": ["5ADA69EE", ...], "status": "in_transit", "note": "..." }
+    All orders move, or none do: unknown codes and orders that are not at
+    the step before ``status`` are listed in the 400 response.
+    """
+    serializer = OrderTransitionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    codes = set(serializer.validated_data["order_ids"])
+    orders = Order.objects.filter(order_id__in=codes)
+    missing = sorted(codes - set(orders.values_list("order_id", flat=True)))
+    if missing:
+        return Response(
+            {"error": "Unknown orders.", "missing": missing},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        result = transition_orders(
+            orders,
+            serializer.validated_data["status"],
+            changed_by=request.user,
+            note=serializer.validated_data["note"],
+        )
+    except InvalidTransition as e:
+        return Response(
+            {"error": str(e), "invalid": e.invalid},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response({"status": result.to_status, "count": result.count, "order_ids": result.order_codes})
@@ -3,6 +3,12 @@ ASGI config for customkeeps_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with ``ASGI_MODE=True`` (see gunicorn.conf.py), which switches the
+I/O-bound API endpoints to their async views. WhiteNoise is left out of the
+middleware in that mode, so static files (the admin's) are served here.
+Django answers only HTTP, so the ASGI lifespan protocol is handled here too:
+on shutdown the worker's pooled Stripe connections are closed.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +20,39 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'customkeeps_backend.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from api.payments import aclose_async_stripe_client  # noqa: E402
+
+if settings.ASGI_MODE:
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan events, which uvicorn sends once per worker."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await aclose_async_stripe_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+def with_lifespan(http_application):
+    """``http_application`` for HTTP (and websocket) scopes, ``lifespan`` for lifespan ones."""
+
+    async def application(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await lifespan(scope, receive, send)
+        else:
+            await http_application(scope, receive, send)
+
+    return application
+
+
+application = with_lifespan(application)
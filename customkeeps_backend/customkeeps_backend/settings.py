@@ -1,8 +1,10 @@
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
+import importlib.util
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -60,6 +62,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.routing.ReplicaRoutingMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
 ]
 
 
@@ -141,7 +145,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Stateless JWT: the user comes from token claims (see api/auth.py)
+        'api.auth.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -159,6 +164,7 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'api.auth.ClaimsTokenObtainPairSerializer',
 }
 
 
@@ -180,3 +186,189 @@ SILENCED_SYSTEM_CHECKS = ['security.W019']
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+
+# Design assets (content-addressed customer uploads)
+DESIGN_ASSET_STORAGE = {
+    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    'OPTIONS': {
+        'location': os.path.join(MEDIA_ROOT, 'design_assets'),
+    },
+}
+DESIGN_ASSET_MAX_BYTES = int(os.getenv('DESIGN_ASSET_MAX_BYTES', 10 * 1024 * 1024))
+
+# Design thumbnails (rendered on demand, LRU-bounded disk cache)
+DESIGN_THUMBNAIL_ROOT = os.path.join(MEDIA_ROOT, 'design_thumbnails')
+DESIGN_THUMBNAIL_SIZES = [60, 80, 100, 300]
+DESIGN_THUMBNAIL_QUALITY = 80
+DESIGN_THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv('DESIGN_THUMBNAIL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Rescan the thumbnail cache after this many renders (other processes write to it too)
+DESIGN_THUMBNAIL_EVICTION_INTERVAL = int(os.getenv('DESIGN_THUMBNAIL_EVICTION_INTERVAL', 100))
+
+# Product catalog cache (invalidated by version bumps on product changes)
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Coupon lookup cache (per process; cleared on coupon edits)
+COUPON_CACHE_TTL = 60
+COUPON_NEGATIVE_CACHE_TTL = 30
+COUPON_CACHE_MAX_ENTRIES = 1024
+
+# Request metrics (query counts, DB/serializer time, Server-Timing headers)
+API_METRICS_ENABLED = os.getenv('API_METRICS_ENABLED', 'True') == 'True'
+API_METRICS_SAMPLE_SIZE = 1000
+API_SERVER_TIMING = os.getenv('API_SERVER_TIMING', 'True') == 'True'
+# Max SQL queries per request, by "METHOD url-name" or url-name
+API_QUERY_BUDGETS = {
+    'POST register': 2,
+    'POST token_obtain_pair': 2,  # 1, plus the UPDATE when the password is rehashed
+    'GET product-list': 2,
+    'GET cart-list': 2,
+    # 4 warm; cold caches add the user and two price table reads, and a
+    # design sent inline as a data URL (older clients) its asset read and insert
+    'POST cart-list': 9,
+    'POST cart-batch': 6,
+    'GET cart-quote': 4,
+    'POST preview_coupon': 5,
+    'POST quotes': 4,
+    'POST checkout-pay': 5,
+    'POST order-create-from-cart': 8,
+    'GET order-list': 3,
+    'GET order-detail': 3,
+    # The user, then one read of the rollups; cron updates them (api/reports.py)
+    'GET api-sales-report': 2,
+    # Rows are read while the response streams, after this is measured
+    'GET api-order-export': 1,
+    # 9 for any batch size, plus the user on a cold cache
+    'POST api-order-transitions': 10,
+}
+# Raise instead of logging when a budget is exceeded; the test runner turns it on
+API_QUERY_BUDGET_STRICT = os.getenv('API_QUERY_BUDGET_STRICT', 'False') == 'True'
+
+# Stripe HTTP client (pooled, with timeouts, retries and a concurrency bulkhead)
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE', '')  # e.g. http://127.0.0.1:12111 for api.stripe_stub
+STRIPE_CONNECT_TIMEOUT = float(os.getenv('STRIPE_CONNECT_TIMEOUT', 3.05))
+STRIPE_READ_TIMEOUT = float(os.getenv('STRIPE_READ_TIMEOUT', 10))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', 2))
+STRIPE_MAX_CONCURRENCY = int(os.getenv('STRIPE_MAX_CONCURRENCY', 4))
+STRIPE_MAX_QUEUED = int(os.getenv('STRIPE_MAX_QUEUED', 4))
+STRIPE_CALL_DEADLINE = float(os.getenv('STRIPE_CALL_DEADLINE', 15))
+
+# Open checkout PaymentIntent per user, reused while the cart is unchanged
+CHECKOUT_INTENT_CACHE_TIMEOUT = 60 * 60
+
+# Bulk price tier table (cleared on product and tier changes)
+PRICING_CACHE_TIMEOUT = 60 * 5
+
+# Stateless JWT auth: per-process cache of users for token checks
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 30))  # seconds; revocation delay across processes
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 10000))
+
+# Password hashing: hasher profile (pbkdf2 | scrypt | argon2) and the bounded
+# pool registration and login hash on. Other profiles stay listed so their
+# hashes still verify; they are rehashed with the current profile on login.
+PASSWORD_HASHER_PROFILE = os.getenv('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', 2**14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.getenv('PASSWORD_SCRYPT_BLOCK_SIZE', 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv('PASSWORD_SCRYPT_PARALLELISM', 1))
+PASSWORD_SCRYPT_MAXMEM = int(os.getenv('PASSWORD_SCRYPT_MAXMEM', 64 * 1024 * 1024))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', 64 * 1024))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', 1))
+_PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'api.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'api.hashers.TunedScryptPasswordHasher',
+    'argon2': 'api.hashers.TunedArgon2PasswordHasher',
+}
+if PASSWORD_HASHER_PROFILE not in _PASSWORD_HASHER_PROFILES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER_PROFILE must be one of {', '.join(_PASSWORD_HASHER_PROFILES)}"
+    )
+if PASSWORD_HASHER_PROFILE == 'argon2' and importlib.util.find_spec('argon2') is None:
+    raise ImproperlyConfigured("PASSWORD_HASHER_PROFILE=argon2 needs `pip install argon2-cffi`")
+PASSWORD_HASHERS = [_PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in _PASSWORD_HASHER_PROFILES.items()
+    if profile != PASSWORD_HASHER_PROFILE
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+AUTHENTICATION_BACKENDS = ['api.hashing.PooledModelBackend']
+PASSWORD_HASHING_MAX_CONCURRENCY = int(os.getenv('PASSWORD_HASHING_MAX_CONCURRENCY', os.cpu_count() or 2))
+PASSWORD_HASHING_MAX_QUEUED = int(os.getenv('PASSWORD_HASHING_MAX_QUEUED', 16))
+PASSWORD_HASHING_DEADLINE = float(os.getenv('PASSWORD_HASHING_DEADLINE', 5))
+
+# Shared cache: Redis (or any Redis-compatible server) when REDIS_URL is set,
+# e.g. redis://127.0.0.1:6379/0 for a local one; otherwise per-process memory
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'customkeeps',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'customkeeps',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+# Tiered cache (api/cache.py): per-process LRU in front of the shared cache
+CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', 5))  # seconds; how long other processes may lag an invalidation
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', 1024))
+CACHE_LOCK_TIMEOUT = 30  # seconds a recompute may hold its stampede lock
+CACHE_LOCK_WAIT = 5  # seconds to wait for another process's recompute before doing it too
+
+# Cached order history pages (per user, invalidated on order changes)
+ORDER_SUMMARY_CACHE_TIMEOUT = 60 * 10
+
+# ASGI mode: run under uvicorn workers (gunicorn.conf.py) and serve the
+# I/O-bound endpoints from api/async_views.py. WhiteNoise is sync-only and
+# would push every request through a thread, so asgi.py serves static files
+# instead.
+ASGI_MODE = os.getenv('ASGI_MODE', 'False') == 'True'
+if ASGI_MODE:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+STRIPE_ASYNC_MAX_CONCURRENCY = int(os.getenv('STRIPE_ASYNC_MAX_CONCURRENCY', 64))
+
+# Read replica (api/routing.py): uncached product and order reads use it,
+# writes and everything else use the primary. A user's reads stick to the primary
+# for DATABASE_REPLICA_STICKY_SECONDS after their writes (replication lag).
+# For local testing, a copy of the SQLite file works: sqlite:///replica.sqlite3
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL', '')
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 15))
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['api.routing.PrimaryReplicaRouter']
+
+# manage.py test: strict query budgets, and a replica that mirrors the test
+# database when none is configured (customkeeps_backend/test_runner.py)
+TEST_RUNNER = 'customkeeps_backend.test_runner.TestRunner'
+
+# PostgreSQL connection pool (psycopg 3's, per process and database) instead of
+# one persistent connection per thread. Needs psycopg[pool]; replaces
+# conn_max_age, which Django doesn't allow together with a pool.
+DATABASE_POOL = os.getenv('DATABASE_POOL', 'False') == 'True'
+if DATABASE_POOL:
+    if importlib.util.find_spec('psycopg_pool') is None:
+        raise ImproperlyConfigured("DATABASE_POOL needs the psycopg[pool] package.")
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            database['CONN_MAX_AGE'] = 0
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', 8)),
+                'timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+            }
+elif ASGI_MODE:
+    # Persistent connections aren't safe under ASGI: the async views' ORM calls
+    # run in executor threads that request_finished never cleans up, so idle
+    # connections pile up. Without a pool, connect per request instead.
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 0
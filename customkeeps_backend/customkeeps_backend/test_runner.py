@@ -0,0 +1,42 @@
+"""
+Test runner for ``manage.py test`` (``TEST_RUNNER`` in settings.py).
+
+Tests run with settings that production doesn't use:
+
+* query budgets are strict (``API_QUERY_BUDGET_STRICT``), so a view that
+  runs more queries than its budget fails its test instead of logging,
+  unless the ``API_QUERY_BUDGET_STRICT`` environment variable says otherwise;
+* without ``DATABASE_REPLICA_URL``, a ``replica`` alias that mirrors the test
+  database is added and ``PrimaryReplicaRouter`` installed, so replica
+  routing is exercised on every run.
+"""
+import os
+
+from django.conf import settings
+from django.db import connections, router
+from django.test.runner import DiscoverRunner
+
+REPLICA_ROUTER = 'api.routing.PrimaryReplicaRouter'
+
+
+def use_test_settings():
+    """Apply the test-only settings above. Call it before the test databases are set up."""
+    if 'API_QUERY_BUDGET_STRICT' not in os.environ:
+        settings.API_QUERY_BUDGET_STRICT = True
+
+    if 'replica' not in settings.DATABASES:
+        settings.DATABASES['replica'] = {
+            **settings.DATABASES['default'],
+            'TEST': {'MIRROR': 'default'},
+        }
+        settings.DATABASE_ROUTERS = [REPLICA_ROUTER]
+        # Both read their setting once and cache it
+        connections.__dict__.pop('settings', None)
+        router._routers = None
+        router.__dict__.pop('routers', None)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        use_test_settings()
@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration (loaded automatically from this directory).
+
+Two profiles, picked by the ``ASGI_MODE`` environment variable:
+
+* WSGI (default): ``gthread`` workers running customkeeps_backend.wsgi.
+  Each worker serves ``GUNICORN_THREADS`` requests at once; a request
+  waiting on Stripe or the database holds one of those threads.
+* ASGI (``ASGI_MODE=True``): uvicorn workers running
+  customkeeps_backend.asgi, with the I/O-bound endpoints served by async
+  views. A request waiting on Stripe holds no thread, so one worker keeps
+  many shoppers in flight.
+
+Either way ``WEB_CONCURRENCY`` (set by Render and most PaaS) overrides the
+number of worker processes. Measure a profile on your own hardware with
+``python manage.py bench_server`` before changing these numbers.
+"""
+import multiprocessing
+import os
+
+asgi_mode = os.getenv("ASGI_MODE", "False") == "True"
+cpus = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+if asgi_mode:
+    wsgi_app = "customkeeps_backend.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    # One event loop per core; concurrency comes from the loop, not threads
+    workers = int(os.getenv("WEB_CONCURRENCY", cpus))
+else:
+    wsgi_app = "customkeeps_backend.wsgi:application"
+    worker_class = "gthread"
+    workers = int(os.getenv("WEB_CONCURRENCY", cpus * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Stripe calls give up after STRIPE_CALL_DEADLINE (15s), well inside this
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound slow memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")